@@ -10,7 +10,11 @@ import { redisClient } from '../../shared/config/redis';
  * Falls back gracefully when ML is unavailable.
  */
 export class RideMLService {
-    
+
+    // Last X-Model-Version seen from the scoring API, part of the cache key so a
+    // retrained model does not keep serving ratings cached from the old one
+    private static modelVersion: string | null = null;
+
 
     /**
      * Score ride using ML and zone detection.
@@ -41,9 +45,9 @@ export class RideMLService {
         }
         
         try {
-            // Cache key based on zones and hour of day (predictions vary by time)
+            // Cache key based on model version, zones and hour of day (predictions vary by time)
             const hourOfDay = new Date().getHours();
-            const cacheKey = `ml:prediction:${zones.originZone}:${zones.destinationZone}:${hourOfDay}`;
+            const cacheKey = this.predictionCacheKey(zones.originZone, zones.destinationZone, hourOfDay);
             
             // Check cache first
             const cached = await redisClient.get(cacheKey);
@@ -66,8 +70,15 @@ export class RideMLService {
             
             const rating = this.convertPredictionToRating(prediction);
 
+            // Store under the version that produced the score; once it changes,
+            // lookups stop matching entries cached from the previous model
+            if (scoreResult.model_version) {
+                this.modelVersion = scoreResult.model_version;
+            }
+            const versionedKey = this.predictionCacheKey(zones.originZone, zones.destinationZone, hourOfDay);
+
             // Cache for 1 hour (predictions change by hour)
-            await redisClient.setEx(cacheKey, 3600, rating.toString());
+            await redisClient.setEx(versionedKey, 3600, rating.toString());
             console.log(`INFO: ML Cache MISS - Route: ${zones.originZone} → ${zones.destinationZone}, Hour: ${hourOfDay}, New Rating: ${rating} (cached for 1h)`);
 
             return { rating, zones };
@@ -81,6 +92,14 @@ export class RideMLService {
         }
     }
     
+    /**
+     * Redis key of a cached rating. Holds the last model version seen, or
+     * "unknown" before the first scoring response of this process.
+     */
+    private static predictionCacheKey(originZone: string, destinationZone: string, hourOfDay: number): string {
+        return `ml:prediction:${this.modelVersion ?? 'unknown'}:${originZone}:${destinationZone}:${hourOfDay}`;
+    }
+
     /**
      * Convert ML score (0-1) to user rating (1-5).
      * Maps: 0->1, 0.25->2, 0.5->3, 0.75->4, 1->5
@@ -17,6 +17,7 @@ interface ScoringRequest {
 interface ScoringResponse {
   predicted_score: number;
   final_score: number;
+  model_version?: string; // X-Model-Version header: fingerprint of the model files that produced the score
 }
 
 
@@ -49,12 +50,12 @@ export async function getHotspotPredictions(time?: string): Promise<HotspotPredi
 /**
  * Score a trip using XGBoost model
  * @param request - Trip details including pickup/dropoff zones and datetime
- * @returns Scoring results including score, weighted score, and percentile
+ * @returns Scoring results including score, weighted score, and percentile, plus the model version that produced them
  */
 export async function scoreTripXGB(request: ScoringRequest): Promise<ScoringResponse> {
   try {
     const response = await axios.post<ScoringResponse>(`${DATA_API_URL}/score_xgb`, request);
-    return response.data;
+    return { ...response.data, model_version: response.headers['x-model-version'] };
   } catch (error) {
     if (axios.isAxiosError(error)) {
       const errorMessage = error.response?.data?.error || error.message;
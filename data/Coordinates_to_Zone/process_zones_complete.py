@@ -5,7 +5,16 @@ This script:
 1. Reads NYC taxi zone CSV with WKT geometry in EPSG:2263 (NAD83 / New York Long Island)
 2. Parses WKT polygons using Shapely
 3. Converts coordinates from State Plane (feet) to WGS84 (lat/lng) using pyproj
-4. Creates pre-processed JSON for efficient point-in-polygon checks in the backend
+4. Creates pre-processed JSON for efficient point-in-polygon checks in the backend,
+   plus a compact binary (zone_coordinates_processed.npz) for Python consumers
+5. Rasterizes the zones into a uint16 lookup grid (zone_raster.*) for O(1) lookups
+
+Zones are converted in a process pool and each ring is transformed with one
+array-wide pyproj call. Optionally, geometries are simplified (Douglas-Peucker)
+before conversion.
+
+Usage:
+    python process_zones_complete.py [--workers N] [--simplify-tolerance FEET] [--geoparquet]
 
 References:
 - EPSG:2263 to WGS84 conversion: https://gis.stackexchange.com/questions/280292/converting-epsg2263-to-wgs84-using-python-pyproj
@@ -13,12 +22,17 @@ References:
 - pyproj documentation: https://pyproj4.github.io/pyproj/stable/examples.html
 """
 
+import argparse
 import csv
 import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from typing import List, Tuple, Dict, Any
 
+import numpy as np
+
 # Increase CSV field size limit
 csv.field_size_limit(sys.maxsize)
 
@@ -35,6 +49,28 @@ except ImportError:
     print("Error: pyproj is required. Install with: pip install pyproj")
     sys.exit(1)
 
+from zone_index import ZoneIndex
+from zone_raster import ZoneRaster, build_zone_raster, save_zone_raster, validate_zone_raster
+
+# Raster cell edge in meters and number of random points checked against Shapely
+RASTER_CELL_METERS = 20.0
+RASTER_VALIDATION_POINTS = 1_000_000
+
+# One transformer per process, created on first use (also in pool workers)
+_transformer = None
+
+
+def get_transformer() -> Transformer:
+    """
+    Transformer from EPSG:2263 to WGS84.
+    EPSG:2263 uses US survey feet, so preserve_units is handled internally;
+    always_xy=True ensures we get (lon, lat) order
+    """
+    global _transformer
+    if _transformer is None:
+        _transformer = Transformer.from_crs("EPSG:2263", "EPSG:4326", always_xy=True)
+    return _transformer
+
 
 def convert_coordinates_to_wgs84(coords: List[Tuple[float, float]], transformer: Transformer) -> List[List[float]]:
     """
@@ -47,13 +83,11 @@ def convert_coordinates_to_wgs84(coords: List[Tuple[float, float]], transformer:
     Returns:
         List of [longitude, latitude] pairs
     """
-    wgs84_coords = []
-    for x, y in coords:
-        # Transform from EPSG:2263 to WGS84
-        # Note: transformer returns (lon, lat) when always_xy=True
-        lon, lat = transformer.transform(x, y)
-        wgs84_coords.append([lon, lat])
-    return wgs84_coords
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    # Transform the whole ring in one call
+    # Note: transformer returns (lon, lat) when always_xy=True
+    lons, lats = transformer.transform(coords[:, 0], coords[:, 1])
+    return np.column_stack([lons, lats]).tolist()
 
 
 def process_polygon(polygon: Polygon, transformer: Transformer) -> Dict[str, Any]:
@@ -84,13 +118,14 @@ def process_polygon(polygon: Polygon, transformer: Transformer) -> Dict[str, Any
     return result
 
 
-def parse_and_convert_geometry(wkt: str, transformer: Transformer) -> List[Dict[str, Any]]:
+def parse_and_convert_geometry(wkt: str, transformer: Transformer, simplify_tolerance: float = 0.0) -> List[Dict[str, Any]]:
     """
     Parse WKT geometry and convert to WGS84 coordinates
     
     Args:
         wkt: Well-Known Text string
         transformer: pyproj Transformer object
+        simplify_tolerance: Douglas-Peucker tolerance in feet (EPSG:2263 units), 0 keeps every vertex
     
     Returns:
         List of polygon dictionaries with WGS84 coordinates
@@ -98,6 +133,11 @@ def parse_and_convert_geometry(wkt: str, transformer: Transformer) -> List[Dict[
     try:
         # Parse WKT using Shapely
         geometry = loads(wkt)
+        if simplify_tolerance > 0:
+            # Topology-preserving Douglas-Peucker, in feet before reprojection.
+            # Zones are simplified independently, so shared edges may drift apart
+            # by up to the tolerance.
+            geometry = geometry.simplify(simplify_tolerance, preserve_topology=True)
         
         polygons = []
         
@@ -121,7 +161,8 @@ def parse_and_convert_geometry(wkt: str, transformer: Transformer) -> List[Dict[
 def check_point_in_zone(lat: float, lon: float, zone_polygons: List[Dict[str, Any]]) -> bool:
     """
     Check if a point (lat, lon) is inside any of the zone's polygons
-    This is a reference implementation for the backend
+    This is a reference implementation for the backend; for lookups in
+    Python use zone_index.ZoneIndex, which builds the polygons once
     
     Args:
         lat: Latitude
@@ -150,54 +191,110 @@ def check_point_in_zone(lat: float, lon: float, zone_polygons: List[Dict[str, An
     return False
 
 
+def process_zone_row(row: Dict[str, str], simplify_tolerance: float = 0.0) -> Dict[str, Any]:
+    """
+    Convert one CSV row into its processed zone entry ('polygons' is missing
+    if the geometry could not be converted). Runs in the pool workers.
+    """
+    # Convert numeric fields
+    zone_data = {
+        'id': int(row['LocationID']),
+        'name': row['zone'],
+        'borough': row['borough'],
+        'centroid': {
+            'lat': float(row['centroid_lat']),
+            'lon': float(row['centroid_lon'])
+        }
+    }
+
+    # Parse and convert geometry
+    polygons = parse_and_convert_geometry(row['geometry'], get_transformer(), simplify_tolerance)
+    if polygons:
+        zone_data['polygons'] = polygons
+    return zone_data
+
+
+def write_geoparquet(index: ZoneIndex, path: str) -> bool:
+    """
+    Optional GeoParquet copy of the zones, needs geopandas and pyarrow
+    """
+    try:
+        import geopandas as gpd
+    except ImportError:
+        print("Skipping GeoParquet: geopandas (and pyarrow) are required. Install with: pip install geopandas pyarrow")
+        return False
+    gdf = gpd.GeoDataFrame(
+        {'LocationID': index.ids, 'zone': index.names, 'borough': index.boroughs},
+        geometry=list(index.geometries),
+        crs="EPSG:4326"
+    )
+    gdf.to_parquet(path)
+    return True
+
+
 def main():
     """Main processing function"""
+    parser = argparse.ArgumentParser(description="Convert NYC taxi zones to WGS84 lookup artifacts")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processes converting zones and labelling the raster")
+    parser.add_argument('--simplify-tolerance', type=float, default=0.0,
+                        help="Douglas-Peucker tolerance in feet, 0 keeps every vertex")
+    parser.add_argument('--raster-cell-meters', type=float, default=RASTER_CELL_METERS)
+    parser.add_argument('--geoparquet', action='store_true', help="Also write zone_coordinates_processed.parquet")
+    args = parser.parse_args()
+
     # File paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     csv_file = os.path.join(script_dir, 'zone_coordinates.csv')
     output_file = os.path.join(script_dir, 'zone_coordinates_processed.json')
-    
-    # Create transformer from EPSG:2263 to WGS84
-    # EPSG:2263 uses US survey feet, so preserve_units is handled internally
-    # always_xy=True ensures we get (lon, lat) order
-    transformer = Transformer.from_crs("EPSG:2263", "EPSG:4326", always_xy=True)
+    binary_file = os.path.join(script_dir, 'zone_coordinates_processed.npz')
+    parquet_file = os.path.join(script_dir, 'zone_coordinates_processed.parquet')
     
     # Process CSV file
-    zones = []
-    
     print(f"Reading {csv_file}...")
     with open(csv_file, 'r', encoding='utf-8') as file:
-        csv_reader = csv.DictReader(file)
-        
-        for row in csv_reader:
-            # Convert numeric fields
-            zone_data = {
-                'id': int(row['LocationID']),
-                'name': row['zone'],
-                'borough': row['borough'],
-                'centroid': {
-                    'lat': float(row['centroid_lat']),
-                    'lon': float(row['centroid_lon'])
-                }
-            }
-            
-            # Parse and convert geometry
-            wkt = row['geometry']
-            polygons = parse_and_convert_geometry(wkt, transformer)
-            
-            if polygons:
-                zone_data['polygons'] = polygons
-                zones.append(zone_data)
-                print(f"Processed zone {zone_data['id']}: {zone_data['name']}")
-            else:
-                print(f"Warning: Failed to process zone {zone_data['id']}: {zone_data['name']}")
-    
-    # Write output JSON
+        rows = list(csv.DictReader(file))
+
+    convert = partial(process_zone_row, simplify_tolerance=args.simplify_tolerance)
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            processed = list(pool.map(convert, rows, chunksize=8))
+    else:
+        processed = [convert(row) for row in rows]
+
+    zones = []
+    for zone_data in processed:
+        if 'polygons' in zone_data:
+            zones.append(zone_data)
+        else:
+            print(f"Warning: Failed to process zone {zone_data['id']}: {zone_data['name']}")
+    
+    # Write output JSON, compact: consumers parse it, nobody reads it by hand
     print(f"\nWriting {output_file}...")
     with open(output_file, 'w', encoding='utf-8') as file:
-        json.dump(zones, file, indent=2)
+        json.dump(zones, file, separators=(',', ':'))
     
     print(f"\nSuccessfully processed {len(zones)} zones")
+
+    # Compact binary (and optionally GeoParquet) copies for Python consumers
+    index = ZoneIndex.from_processed(zones)
+    centroids = [(zone['centroid']['lat'], zone['centroid']['lon']) for zone in zones]
+    index.save(binary_file, centroids=centroids)
+    print(f"  wrote {output_file} ({os.path.getsize(output_file) / 1e6:.1f} MB)")
+    print(f"  wrote {binary_file} ({os.path.getsize(binary_file) / 1e6:.1f} MB)")
+    if args.geoparquet and write_geoparquet(index, parquet_file):
+        print(f"  wrote {parquet_file} ({os.path.getsize(parquet_file) / 1e6:.1f} MB)")
+
+    # Raster lookup table next to the JSON
+    print(f"\nBuilding {args.raster_cell_meters:g} m zone raster...")
+    raster, manifest, exceptions = build_zone_raster(index, args.raster_cell_meters, workers=args.workers)
+    for path in save_zone_raster(raster, manifest, exceptions, script_dir):
+        print(f"  wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"  {raster.shape[0]} x {raster.shape[1]} cells, {manifest['n_exception_cells']} boundary cells")
+
+    report = validate_zone_raster(ZoneRaster.load(script_dir, index), index, RASTER_VALIDATION_POINTS)
+    print(f"  validated on {report['points']} random points: "
+          f"{report['mismatches']} mismatches (accuracy {report['accuracy']:.6f})")
     
     # Test with known coordinates
     print("\nTesting with known locations:")
@@ -210,11 +307,8 @@ def main():
     
     for name, lat, lon in test_locations:
         # Find which zone contains this point
-        found_zone = None
-        for zone in zones:
-            if check_point_in_zone(lat, lon, zone['polygons']):
-                found_zone = zone['name']
-                break
+        found = index.lookup_point(lat, lon)
+        found_zone = found['zone'] if found else None
         
         if found_zone:
             print(f"  {name} ({lat}, {lon}) is in zone: {found_zone}")
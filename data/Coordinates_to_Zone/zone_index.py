@@ -0,0 +1,202 @@
+"""
+Spatial index for NYC taxi zone lookup: (lat, lon) -> taxi zone
+
+Builds the zone polygons once, prepares them and puts them in a Shapely 2
+STRtree. Lookups are vectorized: the tree returns the zones whose bounding box
+holds each point and shapely.contains_xy runs the exact test on the prepared
+polygons for all candidates at once, instead of rebuilding a Polygon per zone
+per point as check_point_in_zone does.
+
+Containment follows check_point_in_zone (Polygon.contains, so points exactly on
+a boundary match no zone). If zones overlap, the first zone in file order wins,
+like the linear scan.
+
+Usage:
+    index = ZoneIndex.load()
+    index.lookup_point(40.7580, -73.9855)
+    index.lookup(lats, lons)  # array of row positions, -1 outside every zone
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import Transformer
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV_PATH = os.path.join(SCRIPT_DIR, 'zone_coordinates.csv')
+DEFAULT_JSON_PATH = os.path.join(SCRIPT_DIR, 'zone_coordinates_processed.json')
+DEFAULT_BINARY_PATH = os.path.join(SCRIPT_DIR, 'zone_coordinates_processed.npz')
+
+
+def transform_geometries(geometries: np.ndarray, transformer: Transformer) -> np.ndarray:
+    """
+    Transform every vertex of an array of geometries with one pyproj call
+    per geometry array (pyproj transforms whole coordinate arrays at once).
+    """
+    def transform_coords(coords: np.ndarray) -> np.ndarray:
+        x, y = transformer.transform(coords[:, 0], coords[:, 1])
+        return np.column_stack([x, y])
+
+    return shapely.transform(geometries, transform_coords)
+
+
+def polygons_from_processed(polygons: List[Dict[str, Any]]):
+    """
+    Shapely geometry for one zone's "polygons" entry of zone_coordinates_processed.json
+    """
+    parts = [shapely.Polygon(p["exterior"], p.get("holes", [])) for p in polygons]
+    return parts[0] if len(parts) == 1 else shapely.MultiPolygon(parts)
+
+
+class ZoneIndex:
+    """
+    STRtree over prepared zone polygons in WGS84 (lon, lat).
+    """
+
+    def __init__(self, ids, names, boroughs, geometries):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = np.asarray(names, dtype=object)
+        self.boroughs = np.asarray(boroughs, dtype=object)
+        self.geometries = np.asarray(geometries, dtype=object)
+        shapely.prepare(self.geometries)
+        self.tree = shapely.STRtree(self.geometries)
+
+    @classmethod
+    def from_csv(cls, csv_path: str = DEFAULT_CSV_PATH) -> "ZoneIndex":
+        """
+        Build from the NYC taxi zone CSV (WKT in EPSG:2263)
+        """
+        df = pd.read_csv(csv_path)
+        geometries = shapely.from_wkt(df['geometry'].to_numpy())
+        transformer = Transformer.from_crs("EPSG:2263", "EPSG:4326", always_xy=True)
+        return cls(df['LocationID'], df['zone'], df['borough'], transform_geometries(geometries, transformer))
+
+    @classmethod
+    def from_processed(cls, zones: List[Dict[str, Any]]) -> "ZoneIndex":
+        """
+        Build from the zone list written to zone_coordinates_processed.json
+        """
+        return cls(
+            [zone['id'] for zone in zones],
+            [zone['name'] for zone in zones],
+            [zone['borough'] for zone in zones],
+            [polygons_from_processed(zone['polygons']) for zone in zones]
+        )
+
+    @classmethod
+    def from_json(cls, json_path: str = DEFAULT_JSON_PATH) -> "ZoneIndex":
+        with open(json_path, 'r', encoding='utf-8') as file:
+            return cls.from_processed(json.load(file))
+
+    @classmethod
+    def from_npz(cls, npz_path: str = DEFAULT_BINARY_PATH) -> "ZoneIndex":
+        """
+        Build from the compact binary written by save (geometries as
+        GeoArrow-style ragged coordinate arrays)
+        """
+        with np.load(npz_path) as data:
+            offsets = (data['ring_offsets'], data['polygon_offsets'], data['zone_offsets'])
+            geometries = shapely.from_ragged_array(shapely.GeometryType.MULTIPOLYGON, data['coords'], offsets)
+            return cls(data['ids'], data['names'].astype(object), data['boroughs'].astype(object), geometries)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "ZoneIndex":
+        """
+        Build from `path` (.npz, .json or .csv), defaulting to the first
+        generated artifact (binary, then JSON) and the source CSV otherwise.
+        """
+        if path is None:
+            path = next(
+                (p for p in (DEFAULT_BINARY_PATH, DEFAULT_JSON_PATH) if os.path.exists(p)),
+                DEFAULT_CSV_PATH
+            )
+        if path.endswith('.npz'):
+            return cls.from_npz(path)
+        if path.endswith('.json'):
+            return cls.from_json(path)
+        return cls.from_csv(path)
+
+    def save(self, npz_path: str = DEFAULT_BINARY_PATH, centroids: Optional[np.ndarray] = None) -> str:
+        """
+        Write the zones as a compressed .npz: ids, names, boroughs and the
+        geometries as one float64 (lon, lat) array plus ring/polygon/zone offsets.
+
+        Args:
+            npz_path: Output path
+            centroids: Optional (n_zones, 2) array of (lat, lon) stored alongside
+        """
+        _, coords, (ring_offsets, polygon_offsets, zone_offsets) = shapely.to_ragged_array(
+            shapely.multipolygons(shapely.get_parts(self.geometries.copy()), indices=np.repeat(
+                np.arange(len(self)), shapely.get_num_geometries(self.geometries)
+            ))
+        )
+        arrays = {
+            'ids': self.ids.astype(np.int32),
+            'names': self.names.astype(str),
+            'boroughs': self.boroughs.astype(str),
+            'coords': coords,
+            'ring_offsets': ring_offsets,
+            'polygon_offsets': polygon_offsets,
+            'zone_offsets': zone_offsets
+        }
+        if centroids is not None:
+            arrays['centroids'] = np.asarray(centroids, dtype=np.float64)
+        np.savez_compressed(npz_path, **arrays)
+        return npz_path
+
+    def __len__(self) -> int:
+        return len(self.geometries)
+
+    def lookup(self, lats, lons) -> np.ndarray:
+        """
+        Vectorized point -> zone lookup.
+
+        Args:
+            lats: Latitudes (array-like)
+            lons: Longitudes (array-like)
+
+        Returns:
+            int64 array of zone row positions, -1 for points outside every zone
+        """
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        result = np.full(len(lats), -1, dtype=np.int64)
+        if len(lats) == 0:
+            return result
+
+        # Bounding-box candidates from the tree, then the exact test on all pairs at once
+        point_idx, zone_idx = self.tree.query(shapely.points(lons, lats))
+        inside = shapely.contains_xy(self.geometries[zone_idx], lons[point_idx], lats[point_idx])
+        point_idx, zone_idx = point_idx[inside], zone_idx[inside]
+
+        # First zone in file order wins where zones overlap
+        order = np.lexsort((zone_idx, point_idx))
+        first_points, first = np.unique(point_idx[order], return_index=True)
+        result[first_points] = zone_idx[order][first]
+        return result
+
+    def zone_info(self, position: int) -> Optional[Dict[str, Any]]:
+        if position < 0:
+            return None
+        return {
+            'location_id': int(self.ids[position]),
+            'zone': self.names[position],
+            'borough': self.boroughs[position]
+        }
+
+    def lookup_point(self, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+        """
+        Zone for a single point as {location_id, zone, borough}, or None
+        """
+        return self.zone_info(int(self.lookup([lat], [lon])[0]))
+
+    def lookup_names(self, lats, lons) -> np.ndarray:
+        """
+        Zone names for many points, None outside every zone
+        """
+        positions = self.lookup(lats, lons)
+        return np.where(positions >= 0, self.names[np.maximum(positions, 0)], None)
@@ -0,0 +1,274 @@
+"""
+Raster lookup table for NYC taxi zone detection: (lat, lon) -> LocationID in O(1)
+
+A uniform lat/lng grid (about 20 m cells by default) over the zones' bounding
+box, stored as a uint16 array of zone IDs (0 = no zone). Cells crossed by a zone
+boundary cannot take a single value; they hold EXCEPTION_CELL and are listed in
+a small exceptions table with the zones that may contain them, which are then
+tested exactly with Shapely. Every other cell lies entirely inside one zone (or
+outside all of them), so a lookup is just an index computation and a read.
+
+Files written next to zone_coordinates_processed.json:
+- zone_raster.npy             uint16 raster, loaded with mmap_mode="r"
+- zone_raster.json            grid origin, cell size and zone ID vocabulary
+- zone_raster_exceptions.npz  boundary cells and their candidate zones
+
+Usage:
+    raster = ZoneRaster.load(index=ZoneIndex.load())
+    raster.lookup(lats, lons)  # LocationIDs, 0 outside every zone
+"""
+
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from zone_index import SCRIPT_DIR, ZoneIndex
+
+NO_ZONE = 0
+EXCEPTION_CELL = np.iinfo(np.uint16).max
+METERS_PER_DEGREE_LAT = 111320.0
+DEFAULT_CELL_METERS = 20.0
+
+
+def raster_paths(output_dir: str = SCRIPT_DIR) -> Tuple[str, str, str]:
+    return (
+        os.path.join(output_dir, 'zone_raster.npy'),
+        os.path.join(output_dir, 'zone_raster.json'),
+        os.path.join(output_dir, 'zone_raster_exceptions.npz')
+    )
+
+
+def grid_for_bounds(bounds, cell_meters: float = DEFAULT_CELL_METERS) -> Dict[str, float]:
+    """
+    Grid origin, cell size in degrees and shape covering `bounds` (lon/lat
+    min/max) with one spare cell on each side.
+    """
+    min_lon, min_lat, max_lon, max_lat = bounds
+    cell_lat = cell_meters / METERS_PER_DEGREE_LAT
+    cell_lon = cell_meters / (METERS_PER_DEGREE_LAT * math.cos(math.radians((min_lat + max_lat) / 2)))
+    return {
+        'min_lon': min_lon - cell_lon,
+        'min_lat': min_lat - cell_lat,
+        'cell_lon': cell_lon,
+        'cell_lat': cell_lat,
+        'n_rows': int(math.ceil((max_lat - min_lat) / cell_lat)) + 2,
+        'n_cols': int(math.ceil((max_lon - min_lon) / cell_lon)) + 2,
+        'cell_meters': cell_meters
+    }
+
+
+def cell_of(grid: Dict[str, float], lats, lons) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Row, column and in-grid mask for each point
+    """
+    rows = np.floor((np.asarray(lats, dtype=np.float64) - grid['min_lat']) / grid['cell_lat']).astype(np.int64)
+    cols = np.floor((np.asarray(lons, dtype=np.float64) - grid['min_lon']) / grid['cell_lon']).astype(np.int64)
+    inside = (rows >= 0) & (rows < grid['n_rows']) & (cols >= 0) & (cols < grid['n_cols'])
+    return rows, cols, inside
+
+
+def label_zone_cells(geometry, grid: Dict[str, float]) -> Tuple[int, int, np.ndarray]:
+    """
+    Cells of the zone's bounding-box window whose center lies in the zone.
+
+    Returns:
+        (first row, first column, boolean mask of the window)
+    """
+    min_lon, min_lat, max_lon, max_lat = shapely.bounds(geometry)
+    (r0, r1), (c0, c1), _ = cell_of(grid, [min_lat, max_lat], [min_lon, max_lon])
+    r0, c0 = max(r0, 0), max(c0, 0)
+    r1, c1 = min(r1 + 1, grid['n_rows']), min(c1 + 1, grid['n_cols'])
+    lats = grid['min_lat'] + (np.arange(r0, r1) + 0.5) * grid['cell_lat']
+    lons = grid['min_lon'] + (np.arange(c0, c1) + 0.5) * grid['cell_lon']
+    shapely.prepare(geometry)
+    return r0, c0, shapely.contains_xy(geometry, lons[None, :], lats[:, None])
+
+
+def build_zone_raster(index: ZoneIndex, cell_meters: float = DEFAULT_CELL_METERS, workers: int = 1):
+    """
+    Rasterize the zone index.
+
+    Args:
+        index: ZoneIndex to rasterize (its row order decides overlaps, as in lookups)
+        cell_meters: Approximate cell edge in meters
+        workers: Processes labelling zones in parallel, 1 to stay in process
+
+    Returns:
+        (raster, manifest, exceptions) where exceptions holds the boundary cells
+        (sorted flat cell indices) and their candidate zone rows in CSR form
+    """
+    if len(index.ids) and index.ids.max() >= EXCEPTION_CELL:
+        raise ValueError("Zone IDs must fit below the uint16 exception marker")
+
+    grid = grid_for_bounds(shapely.total_bounds(index.geometries), cell_meters)
+    n_rows, n_cols = grid['n_rows'], grid['n_cols']
+    raster = np.zeros((n_rows, n_cols), dtype=np.uint16)
+
+    # Label every cell by the zone holding its center, one bounding-box window per
+    # zone. Zones are painted last to first so the first zone wins where they overlap.
+    grids = [grid] * len(index)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            windows = list(pool.map(label_zone_cells, index.geometries, grids, chunksize=8))
+    else:
+        windows = list(map(label_zone_cells, index.geometries, grids))
+    for zone_row in reversed(range(len(index))):
+        r0, c0, mask = windows[zone_row]
+        raster[r0:r0 + mask.shape[0], c0:c0 + mask.shape[1]][mask] = index.ids[zone_row]
+
+    # Cells a boundary passes through: densify every ring to a quarter cell so each
+    # crossed cell gets a vertex, then widen by one cell to cover corner clips
+    step = min(grid['cell_lat'], grid['cell_lon']) / 4
+    boundaries = shapely.segmentize(shapely.boundary(index.geometries), step)
+    coords, zone_rows = shapely.get_coordinates(boundaries, return_index=True)
+    rows, cols, _ = cell_of(grid, coords[:, 1], coords[:, 0])
+    # Several vertices land in each crossed cell, dedupe before widening
+    n_zones = len(index.ids)
+    base = np.unique((rows * n_cols + cols) * n_zones + zone_rows)
+    rows, cols, zone_rows = base // n_zones // n_cols, base // n_zones % n_cols, base % n_zones
+
+    offsets = np.array([-1, 0, 1])
+    dr = np.repeat(offsets, 3)
+    dc = np.tile(offsets, 3)
+    rows = np.clip((rows[:, None] + dr).ravel(), 0, n_rows - 1)
+    cols = np.clip((cols[:, None] + dc).ravel(), 0, n_cols - 1)
+    zone_rows = np.repeat(zone_rows, 9)
+
+    # Zones containing the cell center are candidates too (a cell inside a zone
+    # can be an exception because a neighbouring or overlapping zone crosses it)
+    cells = rows * n_cols + cols
+    unique_cells = np.unique(cells)
+    center_points = shapely.points(
+        grid['min_lon'] + (unique_cells % n_cols + 0.5) * grid['cell_lon'],
+        grid['min_lat'] + (unique_cells // n_cols + 0.5) * grid['cell_lat']
+    )
+    point_idx, center_zones = index.tree.query(center_points)
+    inside = shapely.intersects_xy(
+        index.geometries[center_zones], shapely.get_x(center_points[point_idx]), shapely.get_y(center_points[point_idx])
+    )
+    point_idx, center_zones = point_idx[inside], center_zones[inside]
+    cells = np.concatenate([cells, unique_cells[point_idx]])
+    zone_rows = np.concatenate([zone_rows, center_zones])
+
+    pairs = np.unique(cells * n_zones + zone_rows)
+    pair_cells, pair_zones = pairs // n_zones, pairs % n_zones
+    exception_cells, counts = np.unique(pair_cells, return_counts=True)
+    exception_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    raster.reshape(-1)[exception_cells] = EXCEPTION_CELL
+
+    exceptions = {
+        'cells': exception_cells.astype(np.uint32),
+        'offsets': exception_offsets.astype(np.uint32),
+        'zones': pair_zones.astype(np.uint16)
+    }
+    manifest = dict(
+        grid,
+        zone_ids=[int(i) for i in index.ids],
+        n_exception_cells=int(len(exception_cells))
+    )
+    return raster, manifest, exceptions
+
+
+def save_zone_raster(raster, manifest, exceptions, output_dir: str = SCRIPT_DIR):
+    raster_path, manifest_path, exceptions_path = raster_paths(output_dir)
+    np.save(raster_path, raster)
+    with open(manifest_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file)
+    np.savez(exceptions_path, **exceptions)
+    return raster_path, manifest_path, exceptions_path
+
+
+class ZoneRaster:
+    """
+    Memory-mapped zone raster with exact fallback for boundary cells.
+    """
+
+    def __init__(self, raster, manifest, exceptions, index: Optional[ZoneIndex] = None):
+        self.raster = raster
+        self.flat = raster.reshape(-1)
+        self.grid = manifest
+        self.zone_ids = np.asarray(manifest['zone_ids'], dtype=np.int64)
+        self.exception_cells = exceptions['cells'].astype(np.int64)
+        self.exception_offsets = exceptions['offsets'].astype(np.int64)
+        self.exception_zones = exceptions['zones'].astype(np.int64)
+        if index is not None and not np.array_equal(index.ids, self.zone_ids):
+            raise ValueError("Zone index does not match the zones the raster was built from")
+        self.index = index
+
+    @classmethod
+    def load(cls, output_dir: str = SCRIPT_DIR, index: Optional[ZoneIndex] = None) -> "ZoneRaster":
+        """
+        Memory-maps the raster. Without `index`, points in boundary cells
+        resolve to 0 instead of the exact zone.
+        """
+        raster_path, manifest_path, exceptions_path = raster_paths(output_dir)
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        with np.load(exceptions_path) as data:
+            exceptions = {key: data[key] for key in data.files}
+        return cls(np.load(raster_path, mmap_mode='r'), manifest, exceptions, index)
+
+    def lookup(self, lats, lons) -> np.ndarray:
+        """
+        Vectorized point -> LocationID, 0 for points outside every zone
+        """
+        lats = np.asarray(lats, dtype=np.float64).ravel()
+        lons = np.asarray(lons, dtype=np.float64).ravel()
+        rows, cols, inside = cell_of(self.grid, lats, lons)
+        cells = np.where(inside, rows * self.grid['n_cols'] + cols, 0)
+
+        result = np.where(inside, self.flat[cells], NO_ZONE).astype(np.int64)
+        pending = np.flatnonzero(result == EXCEPTION_CELL)
+        result[pending] = NO_ZONE
+        if len(pending) and self.index is not None:
+            result[pending] = self._resolve_exceptions(cells[pending], lats[pending], lons[pending])
+        return result
+
+    def _resolve_exceptions(self, cells, lats, lons) -> np.ndarray:
+        # Exact test against only the candidate zones listed for each cell
+        k = np.searchsorted(self.exception_cells, cells)
+        starts = self.exception_offsets[k]
+        counts = self.exception_offsets[k + 1] - starts
+        point_idx = np.repeat(np.arange(len(cells)), counts)
+        pair_idx = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        zone_rows = self.exception_zones[pair_idx]
+
+        inside = shapely.contains_xy(self.index.geometries[zone_rows], lons[point_idx], lats[point_idx])
+        point_idx, zone_rows = point_idx[inside], zone_rows[inside]
+
+        result = np.full(len(cells), NO_ZONE, dtype=np.int64)
+        order = np.lexsort((zone_rows, point_idx))
+        first_points, first = np.unique(point_idx[order], return_index=True)
+        result[first_points] = self.zone_ids[zone_rows[order][first]]
+        return result
+
+    def lookup_point(self, lat: float, lon: float) -> int:
+        return int(self.lookup([lat], [lon])[0])
+
+
+def validate_zone_raster(raster: ZoneRaster, index: ZoneIndex, n_points: int = 1_000_000, seed: int = 0) -> Dict[str, float]:
+    """
+    Compares raster lookups with exact Shapely lookups on uniform random
+    points over the grid.
+    """
+    rng = np.random.default_rng(seed)
+    grid = raster.grid
+    lats = rng.uniform(grid['min_lat'], grid['min_lat'] + grid['n_rows'] * grid['cell_lat'], n_points)
+    lons = rng.uniform(grid['min_lon'], grid['min_lon'] + grid['n_cols'] * grid['cell_lon'], n_points)
+
+    positions = index.lookup(lats, lons)
+    expected = np.where(positions >= 0, index.ids[np.maximum(positions, 0)], NO_ZONE)
+    actual = raster.lookup(lats, lons)
+    mismatches = int((actual != expected).sum())
+    return {
+        'points': n_points,
+        'mismatches': mismatches,
+        'accuracy': 1 - mismatches / n_points,
+        'exception_cell_share': len(raster.exception_cells) / raster.flat.size
+    }
@@ -0,0 +1,301 @@
+"""
+Benchmark suite for the scoring and hotspot hot paths.
+
+Runs on synthetic fixtures built in a temporary directory, so no trip data is
+needed: a July scoring month (the committed models and hotness table plus a
+generated duration variability table) and a generated 2023 historical lag
+table. Each case is timed with timeit.repeat; results are written as JSON
+with the commit and library versions so runs can be compared across commits.
+
+Usage:
+    python benchmark_suite.py --output bench.json
+    python benchmark_suite.py --output new.json --compare bench.json --threshold 0.2
+
+With --compare the exit status is 1 if any case's median got slower than the
+baseline by more than the threshold (and by more than --min-delta-ms).
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytz
+
+import flask_app
+import feature_engineering
+import scoring_utils
+import utils
+from lag_table import LAG_REFERENCE_YEAR
+from model_registry import ModelRegistry
+from month_bundle import load_month_bundle, write_month_bundle
+
+RESULTS_VERSION = 1
+SCORING_SOURCE_DIR = os.path.abspath(os.path.join(flask_app.CURRENT_DIR, "..", "scoring_model"))
+FIXTURE_MONTH = "jul"
+FIXTURE_TRIP = ("JFK Airport", "Times Sq/Theatre District", "07/14/2025 10:00:00 AM")
+FIXTURE_HOTSPOT_TIME = pytz.utc.localize(datetime(2025, 7, 11, 14))
+
+
+# -----------------------------
+# FIXTURES
+# -----------------------------
+def build_scoring_fixture(root, duration_rows=200000, seed=0):
+    """
+    Writes a complete July scoring month under root (july/ and expected_columns/)
+    from the committed July models and hotness table and a random duration
+    variability table. Returns root, for scoring_utils.MODEL_DIR.
+    """
+    month_dir = os.path.join(root, "july")
+    os.makedirs(month_dir)
+    for name in ["model_july_xgb.pkl", "model_july_lgb.pkl", "scaler_july.json",
+                 "scoring_weights_july.json", "hotness_table_july.csv"]:
+        shutil.copy(os.path.join(SCORING_SOURCE_DIR, "july", name), month_dir)
+    shutil.copytree(os.path.join(SCORING_SOURCE_DIR, "models", "expected_columns"), os.path.join(root, "expected_columns"))
+
+    zones = pd.read_csv(os.path.join(month_dir, "hotness_table_july.csv"))["dropoff_zone"].unique()
+    rng = np.random.default_rng(seed)
+    pd.DataFrame({
+        "pickup_zone": rng.choice(zones, duration_rows),
+        "dropoff_zone": rng.choice(zones, duration_rows),
+        "pickup_day_of_week": rng.integers(0, 7, duration_rows),
+        "pickup_hour": rng.integers(0, 24, duration_rows),
+        "trip_duration_variability": rng.random(duration_rows) * 5,
+    }).to_csv(os.path.join(month_dir, "duration_variability_july.csv"), index=False)
+    return root
+
+
+def build_lag_fixture(path, seed=0):
+    """
+    Writes a random historical lag CSV covering every zone and hour of July 2023.
+    """
+    rng = np.random.default_rng(seed)
+    zones = utils.zone_lookup_df["zone"].to_numpy(dtype=object)
+    dates = pd.date_range(f"{LAG_REFERENCE_YEAR}-07-01", f"{LAG_REFERENCE_YEAR}-07-31", freq="D")
+    n = len(dates) * 24 * len(zones)
+    pd.DataFrame({
+        "pickup_date": np.repeat(dates.strftime("%Y-%m-%d"), 24 * len(zones)),
+        "pickup_hour": np.tile(np.repeat(np.arange(24), len(zones)), len(dates)),
+        "pickup_zone": np.tile(zones, len(dates) * 24),
+        "trip_count": rng.integers(0, 400, n),
+    }).to_csv(path, index=False)
+    return path
+
+
+class Fixtures:
+    """
+    Builds the fixtures and points the app at them; restore() undoes it.
+    """
+
+    def __init__(self, root, duration_rows=200000, seed=0):
+        self.model_dir = build_scoring_fixture(os.path.join(root, "scoring"), duration_rows, seed)
+        self.bundle_path = os.path.join(root, "bundles", FIXTURE_MONTH)
+        self.lag_path = build_lag_fixture(os.path.join(root, "historical_lags.csv"), seed)
+
+        self._saved = (scoring_utils.MODEL_DIR, scoring_utils.BUNDLE_DIR, utils._lag_tables.get(utils.LAG_CSV_PATH))
+        scoring_utils.MODEL_DIR = self.model_dir
+        scoring_utils.BUNDLE_DIR = os.path.join(root, "no_bundles")
+        # The app reads lags through the default path, serve it the fixture table
+        utils._lag_tables[utils.LAG_CSV_PATH] = utils.get_lag_table(self.lag_path)
+        flask_app.scoring_registry.clear()
+        flask_app.hotspot_cache.clear()
+
+        self.resources = scoring_utils.load_reference_files(FIXTURE_MONTH)
+        write_month_bundle(self.resources, self.bundle_path, FIXTURE_MONTH)
+
+    def restore(self):
+        scoring_utils.MODEL_DIR, scoring_utils.BUNDLE_DIR, lag_table = self._saved
+        utils._lag_tables.pop(self.lag_path, None)
+        if lag_table is None:
+            utils._lag_tables.pop(utils.LAG_CSV_PATH, None)
+        else:
+            utils._lag_tables[utils.LAG_CSV_PATH] = lag_table
+        flask_app.scoring_registry.clear()
+        flask_app.hotspot_cache.clear()
+
+
+# -----------------------------
+# CASES
+# -----------------------------
+def benchmark_cases(fixtures):
+    """
+    (name, callable, calls per timing) for every benchmark.
+    """
+    r = fixtures.resources
+    trip_args = (r["final_weights"], r["scaler"], r["hotness_df"], r["duration_df"],
+                 r["borough_map"], r["expected_columns"], r["reference_tables"])
+    input_df, _ = scoring_utils.prepare_input(*FIXTURE_TRIP, "xgb", r)
+
+    rng = np.random.default_rng(1)
+    zones = np.asarray(r["reference_tables"].zones, dtype=object)
+    batch = [(rng.choice(zones), rng.choice(zones), FIXTURE_TRIP[2]) for _ in range(1000)]
+
+    nyc_time = FIXTURE_HOTSPOT_TIME.astimezone(pytz.timezone("America/New_York"))
+    hotspot_features = utils.generate_features_for_time(nyc_time)
+    encoding_dir = flask_app.HOTSPOT_ENCODING_DIR
+
+    registry = ModelRegistry("benchmark", scoring_utils.load_reference_files, scoring_utils.reference_file_paths)
+    registry.get(FIXTURE_MONTH)
+
+    client = flask_app.app.test_client()
+    score_body = dict(zip(["pickup_zone", "dropoff_zone", "pickup_datetime"], FIXTURE_TRIP))
+    hotspot_query = {"time": FIXTURE_HOTSPOT_TIME.strftime("%Y-%m-%dT%H:%M:%SZ")}
+
+    def uncached_hotspots():
+        flask_app.hotspot_cache.clear()
+        return client.get("/hotspots", query_string=hotspot_query)
+
+    def uncached_forecast():
+        flask_app.hotspot_cache.clear()
+        return client.get("/hotspots/forecast", query_string={"start": hotspot_query["time"], "hours": 24})
+
+    return [
+        ("scoring.prepare_input", lambda: scoring_utils.prepare_input(*FIXTURE_TRIP, "xgb", r), 200),
+        ("scoring.score_input", lambda: scoring_utils.score_input(input_df, r["xgb_model"], r["scaler"]), 200),
+        ("scoring.score_trip", lambda: scoring_utils.score_trip(*FIXTURE_TRIP, r["xgb_model"], *trip_args), 100),
+        ("scoring.score_trips_1000", lambda: scoring_utils.score_trips(batch, r["xgb_model"], *trip_args), 5),
+        ("scoring.load_reference_files_cold", lambda: scoring_utils.load_reference_files(FIXTURE_MONTH), 1),
+        ("scoring.load_month_bundle_cold", lambda: load_month_bundle(fixtures.bundle_path), 5),
+        ("scoring.load_reference_files_warm", lambda: registry.get(FIXTURE_MONTH), 1000),
+        ("hotspot.generate_features_for_time", lambda: utils.generate_features_for_time(nyc_time), 20),
+        ("hotspot.get_multiple_proxy_lags", lambda: utils.get_multiple_proxy_lags(nyc_time, lookup_path=fixtures.lag_path), 200),
+        ("hotspot.apply_target_encoding", lambda: feature_engineering.apply_target_encoding(hotspot_features.copy(), encoding_dir), 20),
+        ("api.score_xgb", lambda: client.post("/score_xgb", json=score_body), 50),
+        ("api.hotspots_cached", lambda: client.get("/hotspots", query_string=hotspot_query), 50),
+        ("api.hotspots_uncached", uncached_hotspots, 10),
+        ("api.hotspots_forecast_24h_uncached", uncached_forecast, 3),
+    ]
+
+
+def time_case(fn, number, repeat):
+    fn()  # first call pays one-off loads, not part of the timing
+    runs = np.array(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1000
+    return {
+        "median_ms": round(float(np.median(runs)), 4),
+        "min_ms": round(float(runs.min()), 4),
+        "max_ms": round(float(runs.max()), 4),
+        "repeat": repeat,
+        "number": number
+    }
+
+
+def run_suite(repeat=10, duration_rows=200000, seed=0, only=None):
+    """
+    Builds the fixtures, times every case (optionally only names matching the
+    glob `only`) and returns the results document.
+    """
+    with tempfile.TemporaryDirectory() as root:
+        fixtures = Fixtures(root, duration_rows, seed)
+        try:
+            results = {}
+            for name, fn, number in benchmark_cases(fixtures):
+                if only and not fnmatch.fnmatch(name, only):
+                    continue
+                results[name] = time_case(fn, number, repeat)
+                print(f"{name:40s} median {results[name]['median_ms']:10.3f} ms   min {results[name]['min_ms']:10.3f} ms")
+        finally:
+            fixtures.restore()
+    return {"version": RESULTS_VERSION, "meta": run_metadata(repeat, duration_rows, seed), "results": results}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=flask_app.CURRENT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(repeat, duration_rows, seed):
+    import lightgbm
+    import xgboost
+
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "xgboost": xgboost.__version__,
+        "lightgbm": lightgbm.__version__,
+        "repeat": repeat,
+        "duration_rows": duration_rows,
+        "seed": seed
+    }
+
+
+# -----------------------------
+# COMPARISON
+# -----------------------------
+def compare_results(baseline, current, threshold=0.2, min_delta_ms=0.05):
+    """
+    Compares median times case by case.
+
+    Returns:
+        list: one dict per case in both documents with name, baseline_ms,
+        current_ms, ratio and regression (slower by more than threshold and
+        min_delta_ms)
+    """
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["median_ms"]
+        after = result["median_ms"]
+        ratio = after / before if before > 0 else float("inf")
+        rows.append({
+            "name": name,
+            "baseline_ms": before,
+            "current_ms": after,
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold and after - before > min_delta_ms
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scoring and hotspot hot paths")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--duration-rows", type=int, default=200000, help="Rows of the synthetic duration table")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="Glob of case names to run, e.g. 'api.*'")
+    parser.add_argument("--output", help="Write the results JSON here")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown of the median, 0.2 = 20%%")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    current = run_suite(args.repeat, args.duration_rows, args.seed, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        rows = compare_results(baseline, current, args.threshold, args.min_delta_ms)
+        print(f"\nAgainst {args.compare} (commit {baseline['meta'].get('commit')}):")
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['name']:40s} {row['baseline_ms']:10.3f} -> {row['current_ms']:10.3f} ms  x{row['ratio']:<6} {flag}")
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
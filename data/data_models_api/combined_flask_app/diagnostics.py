@@ -0,0 +1,111 @@
+# diagnostics.py
+
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line with the level, logger, message and any fields
+    passed through `extra`.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    """
+    Sets up the root logger from LOG_LEVEL (default INFO) and LOG_FORMAT
+    ("json" or "text", default "text"). Safe to call more than once, only
+    the handler installed here is replaced.
+    """
+    level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+    fmt = (fmt or os.environ.get("LOG_FORMAT", "text")).lower()
+
+    handler = logging.StreamHandler(sys.stdout)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    handler._diagnostics = True
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if getattr(h, "_diagnostics", False)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+
+# Fraction of requests whose debug diagnostics are logged when the level is DEBUG
+DEBUG_SAMPLE_RATE = float(os.environ.get("DEBUG_SAMPLE_RATE", "1.0"))
+
+
+def debug_sampled(logger, rate=None):
+    """
+    True if this request's debug diagnostics should be built and logged.
+    Checks the level first so nothing else runs when debug logging is off.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    rate = DEBUG_SAMPLE_RATE if rate is None else rate
+    return rate >= 1.0 or random.random() < rate
+
+
+def _finite_or_none(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def feature_stats(df, max_unique=10):
+    """
+    Per-column statistics of a model input frame: the first unique values,
+    min/max/mean/std and NaN count, plus the constant columns.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        unique_values = values.dropna().unique()
+        numeric = np.issubdtype(values.dtype, np.number) or values.dtype == bool
+        stats = {
+            "dtype": str(values.dtype),
+            "n_unique": int(len(unique_values)),
+            "unique": [v.item() if hasattr(v, "item") else v for v in unique_values[:max_unique]],
+            "nans": int(values.isna().sum())
+        }
+        if numeric and len(values):
+            numeric_values = values.astype(float)
+            stats.update({
+                "min": _finite_or_none(numeric_values.min()),
+                "max": _finite_or_none(numeric_values.max()),
+                "mean": _finite_or_none(numeric_values.mean()),
+                "std": _finite_or_none(numeric_values.std())
+            })
+        columns[col] = stats
+
+    return {
+        "shape": list(df.shape),
+        "columns": columns,
+        "constant_columns": [col for col, stats in columns.items() if stats["n_unique"] == 1]
+    }
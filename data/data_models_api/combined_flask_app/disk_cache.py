@@ -0,0 +1,163 @@
+# disk_cache.py
+"""
+Persistent prediction cache shared by every worker process on a host.
+
+An SQLite database in WAL mode: readers in different gunicorn workers do not
+block each other or the single writer, and entries survive restarts, so a
+freshly started worker answers warm buckets without recomputing them. Values
+are pickled; keys should include the content fingerprint of the artifacts
+the value was computed from (see artifact_fingerprints), so a retrained model
+never serves stale results.
+
+Entries expire after their TTL. The total value size is capped: every
+prune_every writes, expired rows are deleted and, above max_bytes, the rows
+closest to expiry go first. The cache is best effort, an SQLite error is
+logged and treated as a miss.
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+
+class DiskCache:
+    """
+    Key -> value store in one SQLite file with a per-entry TTL and a size cap.
+    """
+
+    def __init__(self, path, ttl_seconds=3600, max_bytes=256 * 2**20, prune_every=100):
+        """
+        Args:
+            path (str): Database file, created with its folder if missing.
+            ttl_seconds (float): Default lifetime of an entry.
+            max_bytes (int): Cap on the total size of the pickled values.
+            prune_every (int): Writes between two expiry/size passes.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection per thread and process: sqlite3 connections are not
+        # shared across threads and must not be used after a fork
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)")
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """
+        Returns the cached value or None on a miss, an expired entry or an error.
+        """
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+            value = pickle.loads(row[0]) if row is not None else None
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            logger.warning("Disk cache read failed: %s", e)
+            value = None
+        self._count(value is not None)
+        return value
+
+    def put(self, key, value, ttl_seconds=None):
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time() + ttl_seconds)
+            )
+        except sqlite3.Error as e:
+            logger.warning("Disk cache write failed: %s", e)
+            return
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """
+        Deletes expired entries, then the entries closest to expiry until the
+        values fit in max_bytes. Returns the number of rows deleted.
+        """
+        try:
+            conn = self._connection()
+            deleted = conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),)).rowcount
+            deleted += conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY expires_at DESC, key) AS kept FROM entries
+                    ) WHERE kept > ?
+                )
+                """,
+                (self.max_bytes,)
+            ).rowcount
+        except sqlite3.Error as e:
+            logger.warning("Disk cache prune failed: %s", e)
+            return 0
+        with self._lock:
+            self.evictions += deleted
+        return deleted
+
+    def clear(self):
+        try:
+            self._connection().execute("DELETE FROM entries")
+        except sqlite3.Error as e:
+            logger.warning("Disk cache clear failed: %s", e)
+
+    def stats(self):
+        try:
+            size, total = self._connection().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        except sqlite3.Error:
+            size, total = 0, 0
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "size": size,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
@@ -1,27 +1,62 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 import pandas as pd
 import joblib
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import sys
-import traceback
+import logging
+import threading
+import time
+import glob
+import hashlib
 from pytz import timezone
 import pytz
 
 # ==== trip scoring imports ====
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scoring_model")))
-from scoring_utils import load_reference_files, score_trip
+from scoring_utils import load_reference_files, reference_file_paths, available_months, score_trip, score_trips
+from score_cube import ScoreCube
+from native_model import native_model
+from stage_timing import span, stage_histograms
 
 # ==== hotspot imports ====
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 HOTSPOT_UTILS_PATH = os.path.abspath(os.path.join(CURRENT_DIR, "..", "hotspot_model"))
 sys.path.insert(0, HOTSPOT_UTILS_PATH)
-from utils import generate_features_for_time, zone_name_to_id, get_multiple_proxy_lags
+from utils import generate_features_for_time, generate_features_for_times, zone_name_to_id, get_lag_table
+import utils
 import feature_engineering
 
+# ==== zone lookup imports ====
+sys.path.append(os.path.abspath(os.path.join(CURRENT_DIR, "..", "..", "Coordinates_to_Zone")))
+from zone_index import ZoneIndex
+
+from prediction_cache import PredictionCache, start_warmup_thread
+from micro_batcher import MicroBatcher
+from disk_cache import DiskCache
+from artifact_fingerprints import artifact_fingerprint, combine_fingerprints
+from response_encoding import UnsupportedFormat, encode_columns, encode_document, negotiate_format
+from model_registry import ModelRegistry
+from diagnostics import configure_logging, debug_sampled, feature_stats
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics, render_metrics
+
+configure_logging()
+logger = logging.getLogger("flask_app")
+
 app = Flask(__name__)
-loaded_resources = {}
+
+# Load the historical lag table at startup so the first /hotspots call does not pay for it
+try:
+    get_lag_table()
+except FileNotFoundError as e:
+    logger.warning("Historical lags not loaded at startup: %s", e)
+
+# Optional cube serving mode: point SCORE_CUBE_DIR at the output of score_cube.py
+# and /score_* answer from the precomputed cubes, falling back to the model.
+# A cube is only used while it matches the fingerprint of the loaded month.
+SCORE_CUBE_DIR = os.environ.get("SCORE_CUBE_DIR")
+loaded_cubes = {}
 
 # -----------------------------
 # SHARED HELPERS
@@ -33,38 +68,230 @@ def extract_month_from_datetime(dt_string):
     except Exception:
         return None
 
-def get_resources_for_month(month_str):
-    if month_str not in loaded_resources:
-        loaded_resources[month_str] = load_reference_files(month_str)
-    return loaded_resources[month_str]
+def optional_int_env(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
 
-# -----------------------------
-# SCORING ENDPOINTS
-# -----------------------------
-@app.route("/score_xgb", methods=["POST"])
-def score_xgb():
-    data = request.json
-    month = extract_month_from_datetime(data.get("pickup_datetime", ""))
-    if not month:
-        return jsonify({"error": "Invalid pickup_datetime format"}), 400
-    try:
+# Month resources for /score_*, loaded once per month and hot-reloaded when the files change
+scoring_registry = ModelRegistry(
+    "scoring",
+    loader=load_reference_files,
+    source_files=reference_file_paths,
+    max_entries=optional_int_env("MODEL_CACHE_SIZE")
+)
+
+def get_resources_for_month(month_str):
+    return scoring_registry.get(month_str)
+
+# Optional persistent cache (PREDICTION_CACHE_DB=path to an SQLite file): hotspot
+# responses and single-trip scores are shared by every worker on the host and
+# survive restarts. Keys carry the content fingerprint of the artifacts they came from.
+PREDICTION_CACHE_DB = os.environ.get("PREDICTION_CACHE_DB")
+disk_cache = DiskCache(
+    PREDICTION_CACHE_DB,
+    ttl_seconds=int(os.environ.get("PREDICTION_CACHE_DB_TTL", "86400")),
+    max_bytes=int(os.environ.get("PREDICTION_CACHE_DB_MAX_MB", "256")) * 2**20
+) if PREDICTION_CACHE_DB else None
+
+def disk_cache_key(prefix, *parts):
+    return prefix + ":" + hashlib.sha1(repr(parts).encode()).hexdigest()
+
+def get_score_cube(month_str, model_type):
+    """
+    Returns (cube, fingerprint of the loaded month). The cube is None when
+    cube serving is off, the cube has not been built, or it was built from
+    other model files than the loaded ones; it is read again from disk once
+    per new fingerprint, so a rebuilt cube is picked up after a retrain.
+    """
+    if not SCORE_CUBE_DIR:
+        return None, None
+    fingerprint = scoring_registry.get_versioned(month_str)[1]
+    key = (month_str, model_type)
+    entry = loaded_cubes.get(key)
+    if entry is None or entry[1] != fingerprint:
+        cube = ScoreCube.load(SCORE_CUBE_DIR, month_str, model_type)
+        if cube is not None and cube.source_fingerprint != fingerprint:
+            logger.warning(
+                "Score cube %s/%s was built from model %s, the loaded model is %s; scoring with the model",
+                month_str, model_type, cube.source_fingerprint, fingerprint
+            )
+            cube = None
+        entry = loaded_cubes[key] = (cube, fingerprint)
+    return entry
+
+# Optional micro-batching (SCORE_MICROBATCH=1, needs a threaded server): concurrent
+# /score_* requests for the same month and model that arrive within
+# SCORE_BATCH_WINDOW_MS are scored together with one score_trips call
+SCORE_MICROBATCH = os.environ.get("SCORE_MICROBATCH", "0") == "1"
+
+def score_trip_group(group, trips):
+    month, model_type = group
+    # Own pipeline name: the requests in the group already timed their lookup as score_trip
+    with span("score_trips", "model_load"):
         resources = get_resources_for_month(month)
+    return score_trips(
+        trips=trips,
+        model=resources[f"{model_type}_model"],
+        weights=resources["final_weights"],
+        scaler=resources["scaler"],
+        hotness_table=resources["hotness_df"],
+        duration_table=resources["duration_df"],
+        borough_map=resources["borough_map"],
+        expected_columns=resources["expected_columns"],
+        reference_tables=resources.get("reference_tables")
+    )
+
+scoring_batcher = MicroBatcher(
+    score_trip_group,
+    window_seconds=float(os.environ.get("SCORE_BATCH_WINDOW_MS", "3")) / 1000,
+    max_batch=int(os.environ.get("SCORE_BATCH_MAX", "64"))
+)
+
+def score_single_trip(month, model_type, data):
+    """
+    Scores the trip of one /score_* request: from the disk cache when it is
+    enabled, otherwise through the micro-batcher or score_trip. Sets the
+    model version of the response to the fingerprint of the loaded month.
+    """
+    with span("score_trip", "model_load"):
+        resources, fingerprint = scoring_registry.get_versioned(month)
+    g.model_version = fingerprint
+    disk_key = None
+    if disk_cache is not None:
+        # Scores depend only on the zones, weekday and hour of the trip
+        pickup = datetime.strptime(data["pickup_datetime"], "%m/%d/%Y %I:%M:%S %p")
+        disk_key = disk_cache_key(
+            "score", month, model_type, fingerprint,
+            data["pickup_zone"], data["dropoff_zone"], pickup.weekday(), pickup.hour
+        )
+        result = disk_cache.get(disk_key)
+        if result is not None:
+            return result
+
+    if SCORE_MICROBATCH:
+        trip = (data["pickup_zone"], data["dropoff_zone"], data["pickup_datetime"])
+        result = scoring_batcher.submit((month, model_type), trip)
+    else:
         result = score_trip(
             pickup_zone=data["pickup_zone"],
             dropoff_zone=data["dropoff_zone"],
             pickup_datetime=data["pickup_datetime"],
-            model=resources["xgb_model"],
+            model=resources[f"{model_type}_model"],
             weights=resources["final_weights"],
             scaler=resources["scaler"],
             hotness_table=resources["hotness_df"],
             duration_table=resources["duration_df"],
             borough_map=resources["borough_map"],
-            expected_columns=resources["expected_columns"]
+            expected_columns=resources["expected_columns"],
+            reference_tables=resources.get("reference_tables")
         )
 
-        #debugging output
-        print("DEBUG input to score_trip:", data)
-        print("Returned result:", result)
+    if result and disk_key is not None:
+        disk_cache.put(disk_key, result)
+    return result
+
+# -----------------------------
+# ZONE LOOKUP
+# -----------------------------
+# Same taxi zone CSV the hotspot model uses, unless pointed elsewhere
+ZONE_GEOMETRY_PATH = os.environ.get("ZONE_GEOMETRY_PATH", os.path.join(HOTSPOT_UTILS_PATH, "zone_coordinates.csv"))
+_zone_index = None
+_zone_index_lock = threading.Lock()
+
+def get_zone_index():
+    global _zone_index
+    if _zone_index is None:
+        with _zone_index_lock:
+            if _zone_index is None:
+                _zone_index = ZoneIndex.load(ZONE_GEOMETRY_PATH)
+    return _zone_index
+
+def resolve_trip_zones(trips):
+    """
+    Fills pickup_zone/dropoff_zone from pickup_lat/pickup_lng and
+    dropoff_lat/dropoff_lng for trips that give coordinates instead of zone
+    names, with one vectorized lookup per end. Returns an error message or
+    None per trip.
+    """
+    errors = [None] * len(trips)
+    for end in ("pickup", "dropoff"):
+        indices, lats, lngs = [], [], []
+        for i, trip in enumerate(trips):
+            if not isinstance(trip, dict) or f"{end}_zone" in trip or f"{end}_lat" not in trip:
+                continue
+            try:
+                lats.append(float(trip[f"{end}_lat"]))
+                lngs.append(float(trip[f"{end}_lng"]))
+                indices.append(i)
+            except (KeyError, TypeError, ValueError):
+                errors[i] = errors[i] or f"Invalid {end}_lat/{end}_lng"
+        if not indices:
+            continue
+        for i, zone in zip(indices, get_zone_index().lookup_names(lats, lngs)):
+            if zone is None:
+                errors[i] = errors[i] or f"{end} coordinates are not in any taxi zone"
+            else:
+                trips[i][f"{end}_zone"] = zone
+    return errors
+
+@app.route("/zone_lookup", methods=["GET", "POST"])
+def zone_lookup():
+    """
+    GET ?lat=&lng= returns the zone of one point (404 outside every zone).
+    POST {"points": [{"lat": ..., "lng": ...}, ...]} returns {"results": [...]}
+    with one zone or null per point.
+    """
+    try:
+        index = get_zone_index()
+        if request.method == "GET":
+            try:
+                lat, lng = float(request.args["lat"]), float(request.args["lng"])
+            except (KeyError, ValueError):
+                return jsonify({"error": "Expected numeric lat and lng query parameters"}), 400
+            zone = index.lookup_point(lat, lng)
+            if zone is None:
+                return jsonify({"error": "Point is not in any taxi zone"}), 404
+            return jsonify(zone), 200
+
+        points = (request.json or {}).get("points")
+        if not isinstance(points, list):
+            return jsonify({"error": "Expected a 'points' list"}), 400
+        try:
+            lats = [float(p["lat"]) for p in points]
+            lngs = [float(p["lng"]) for p in points]
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"error": "Every point needs numeric lat and lng"}), 400
+        return jsonify({"results": [index.zone_info(int(pos)) for pos in index.lookup(lats, lngs)]}), 200
+
+    except Exception as e:
+        logger.exception("Zone lookup failed")
+        return jsonify({"error": str(e)}), 500
+
+# -----------------------------
+# SCORING ENDPOINTS
+# -----------------------------
+@app.route("/score_xgb", methods=["POST"])
+def score_xgb():
+    data = request.json
+    try:
+        zone_error = resolve_trip_zones([data])[0]
+        if zone_error:
+            return jsonify({"error": zone_error}), 400
+        month = extract_month_from_datetime(data.get("pickup_datetime", ""))
+        if not month:
+            return jsonify({"error": "Invalid pickup_datetime format"}), 400
+
+        cube, fingerprint = get_score_cube(month, "xgb")
+        if cube is not None:
+            result = cube.score_trip(data["pickup_zone"], data["dropoff_zone"], data["pickup_datetime"])
+            if result:
+                g.model_version = fingerprint
+                return jsonify(result), 200
+
+        result = score_single_trip(month, "xgb", data)
+
+        if debug_sampled(logger):
+            logger.debug("score_trip", extra={"request": data, "result": result})
 
         if result:
             return jsonify(result), 200
@@ -72,33 +299,31 @@ def score_xgb():
             return jsonify({"error": "Could not score trip"}), 400
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Scoring request failed")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/score_lgbm", methods=["POST"])
 def score_lgbm():
     data = request.json
-    month = extract_month_from_datetime(data.get("pickup_datetime", ""))
-    if not month:
-        return jsonify({"error": "Invalid pickup_datetime format"}), 400
     try:
-        resources = get_resources_for_month(month)
-        result = score_trip(
-            pickup_zone=data["pickup_zone"],
-            dropoff_zone=data["dropoff_zone"],
-            pickup_datetime=data["pickup_datetime"],
-            model=resources["lgb_model"],
-            weights=resources["final_weights"],
-            scaler=resources["scaler"],
-            hotness_table=resources["hotness_df"],
-            duration_table=resources["duration_df"],
-            borough_map=resources["borough_map"],
-            expected_columns=resources["expected_columns"]
-        )
+        zone_error = resolve_trip_zones([data])[0]
+        if zone_error:
+            return jsonify({"error": zone_error}), 400
+        month = extract_month_from_datetime(data.get("pickup_datetime", ""))
+        if not month:
+            return jsonify({"error": "Invalid pickup_datetime format"}), 400
 
-        #debugging output
-        print("DEBUG input to score_trip:", data)
-        print("Returned result:", result)
+        cube, fingerprint = get_score_cube(month, "lgb")
+        if cube is not None:
+            result = cube.score_trip(data["pickup_zone"], data["dropoff_zone"], data["pickup_datetime"])
+            if result:
+                g.model_version = fingerprint
+                return jsonify(result), 200
+
+        result = score_single_trip(month, "lgb", data)
+
+        if debug_sampled(logger):
+            logger.debug("score_trip", extra={"request": data, "result": result})
 
         
         if result:
@@ -106,9 +331,110 @@ def score_lgbm():
         else:
             return jsonify({"error": "Could not score trip"}), 400
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Scoring request failed")
         return jsonify({"error": str(e)}), 500
 
+# Largest number of trips accepted by one /score_*/batch call
+SCORE_BATCH_MAX_TRIPS = int(os.environ.get("SCORE_BATCH_MAX_TRIPS", "5000"))
+
+def score_batch(model_type):
+    """
+    Scores a list of trips with one batched predict per month.
+    Body: {"trips": [{"pickup_zone", "dropoff_zone", "pickup_datetime"}, ...]}
+    where a zone can be replaced by {end}_lat/{end}_lng coordinates. Trips in
+    a month without models get an error entry like any other unscorable trip.
+    """
+    try:
+        fmt = negotiate_format(request.args.get("format"), request.accept_mimetypes)
+    except UnsupportedFormat as e:
+        return jsonify({"error": str(e)}), 406
+
+    data = request.json or {}
+    trips = data.get("trips")
+    if not isinstance(trips, list) or not trips:
+        return jsonify({"error": "Expected a non-empty 'trips' list"}), 400
+    if len(trips) > SCORE_BATCH_MAX_TRIPS:
+        return jsonify({"error": f"At most {SCORE_BATCH_MAX_TRIPS} trips per batch"}), 413
+
+    results = [None] * len(trips)
+    zone_errors = resolve_trip_zones(trips)
+
+    # Group trips by month so each month's resources are used for one batch
+    trips_by_month = {}
+    for i, trip in enumerate(trips):
+        if zone_errors[i]:
+            results[i] = {"error": zone_errors[i]}
+            continue
+        if not isinstance(trip, dict) or not all(k in trip for k in ("pickup_zone", "dropoff_zone", "pickup_datetime")):
+            results[i] = {"error": "Missing pickup_zone, dropoff_zone or pickup_datetime"}
+            continue
+        month = extract_month_from_datetime(trip["pickup_datetime"])
+        if not month:
+            results[i] = {"error": "Invalid pickup_datetime format"}
+            continue
+        trips_by_month.setdefault(month, []).append(i)
+
+    try:
+        fingerprints = {}
+        for month, indices in trips_by_month.items():
+            try:
+                resources, fingerprints[month] = scoring_registry.get_versioned(month)
+            except (FileNotFoundError, ValueError) as e:
+                logger.warning("No scoring resources for month %s: %s", month, e)
+                for i in indices:
+                    results[i] = {"error": f"No scoring model for month '{month}'"}
+                continue
+
+            cube, _ = get_score_cube(month, model_type)
+            if cube is not None:
+                cube_results = cube.score_trips(
+                    [(trips[i]["pickup_zone"], trips[i]["dropoff_zone"], trips[i]["pickup_datetime"]) for i in indices]
+                )
+                for i, result in zip(indices, cube_results):
+                    results[i] = result
+                # Only trips outside the cube go to the model
+                indices = [i for i, result in zip(indices, cube_results) if result is None]
+                if not indices:
+                    continue
+
+            month_results = score_trips(
+                trips=[(trips[i]["pickup_zone"], trips[i]["dropoff_zone"], trips[i]["pickup_datetime"]) for i in indices],
+                model=resources[f"{model_type}_model"],
+                weights=resources["final_weights"],
+                scaler=resources["scaler"],
+                hotness_table=resources["hotness_df"],
+                duration_table=resources["duration_df"],
+                borough_map=resources["borough_map"],
+                expected_columns=resources["expected_columns"],
+                reference_tables=resources.get("reference_tables")
+            )
+            for i, result in zip(indices, month_results):
+                results[i] = result if result else {"error": "Could not score trip"}
+        if fingerprints:
+            g.model_version = combine_fingerprints(fingerprints)
+
+        if fmt == "json":
+            return jsonify({"results": results}), 200
+        body, mimetype = encode_columns({
+            name: [result.get(name) for result in results]
+            for name in ("predicted_score", "final_score", "error")
+        }, fmt)
+        return Response(body, mimetype=mimetype)
+
+    except UnsupportedFormat as e:
+        return jsonify({"error": str(e)}), 406
+    except Exception as e:
+        logger.exception("Scoring request failed")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/score_xgb/batch", methods=["POST"])
+def score_xgb_batch():
+    return score_batch("xgb")
+
+@app.route("/score_lgbm/batch", methods=["POST"])
+def score_lgbm_batch():
+    return score_batch("lgb")
+
 # -----------------------------
 # HOTSPOT ENDPOINT
 # -----------------------------
@@ -126,118 +452,560 @@ MONTH_MODEL_MAP = {
     12: "hotspot_model_11_to_12.pkl",
 }
 
-def load_model_for_month(month):
+def hotspot_model_path(month):
     model_file = MONTH_MODEL_MAP.get(month)
     if not model_file:
         raise ValueError(f"No model for month {month}")
-    path = os.path.join(HOTSPOT_UTILS_PATH, "models", model_file)
+    return os.path.join(HOTSPOT_UTILS_PATH, "models", model_file)
+
+def load_model_for_month(month):
+    path = hotspot_model_path(month)
     if not os.path.exists(path):
         raise FileNotFoundError(f"Model not found: {path}")
     return joblib.load(path)
 
+# Cached hotspot responses are dropped when a month's model is replaced on disk
+hotspot_registry = ModelRegistry(
+    "hotspot",
+    loader=load_model_for_month,
+    source_files=lambda month: [hotspot_model_path(month)],
+    max_entries=optional_int_env("MODEL_CACHE_SIZE"),
+    on_reload=lambda month: hotspot_cache.clear()
+)
+
+HOTSPOT_ENCODING_DIR = os.path.join(HOTSPOT_UTILS_PATH, "models", "encoding_maps")
+
+def hotspot_reference_paths():
+    """
+    Files every hotspot month shares: target encodings, model feature list,
+    zone and POI tables and the historical lags.
+    """
+    return sorted(glob.glob(os.path.join(HOTSPOT_ENCODING_DIR, "*_target_encoding.pkl"))) + [
+        feature_engineering.default_feature_list_path(),
+        utils.ZONE_CSV_PATH,
+        utils.POI_CSV_PATH,
+        utils.LAG_CSV_PATH
+    ]
+
+_hotspot_reference_version = None
+
+def hotspot_reference_version():
+    """
+    (fingerprint, artifacts) of the shared hotspot files. They are hashed once
+    per process, like the lag table, zone data and target encoder are loaded.
+    """
+    global _hotspot_reference_version
+    if _hotspot_reference_version is None:
+        _hotspot_reference_version = artifact_fingerprint(hotspot_reference_paths())
+    return _hotspot_reference_version
+
+def hotspot_fingerprint(month):
+    """
+    Content fingerprint of everything behind a month's hotspot predictions:
+    the loaded month model and the shared reference files. Loads the model
+    if needed; None for a month without a model.
+    """
+    if month not in MONTH_MODEL_MAP:
+        return None
+    return combine_fingerprints({
+        "model": hotspot_registry.get_versioned(month)[1],
+        "reference": hotspot_reference_version()[0]
+    })
+
+def hotspot_cache_key(pickup_time):
+    """
+    Everything the hotspot pipeline reads from the pickup time: the month picks
+    the model, weekday/hour/holiday drive the features and the day of month
+    selects the historical lag rows. The fingerprint of the loaded model and
+    reference files comes first, so a replaced model never hits old entries.
+    """
+    return (
+        hotspot_fingerprint(pickup_time.month),
+        pickup_time.month,
+        pickup_time.day,
+        pickup_time.weekday(),
+        pickup_time.hour,
+        feature_engineering.is_us_holiday(pickup_time)
+    )
+
+def build_hotspot_inputs(pickup_time):
+    """
+    Builds the model input frame for one NYC pickup time.
+
+    Returns:
+        tuple: (zone names, encoded and aligned feature DataFrame)
+    """
+    with span("hotspots", "features"):
+        df = generate_features_for_time(pickup_time)
+
+    if df.empty:
+        raise RuntimeError("Feature generation failed.")
+    
+    # Add lag features
+    with span("hotspots", "lags"):
+        lag_data = get_lag_table().lag_features(pickup_time, df["pickup_zone"])
+        for col in ["trip_count_1h_ago", "trip_count_2h_ago", "rolling_avg_2h"]:
+            df[col] = lag_data[col]
+
+    # Save pickup_zone before transformations
+    if "pickup_zone" not in df.columns:
+        raise RuntimeError(f"Missing 'pickup_zone' column in features: {df.columns.tolist()}")
+    zone_names = df["pickup_zone"].copy()
+
+    if not os.path.exists(HOTSPOT_ENCODING_DIR):
+        raise RuntimeError("Encoding dir not found.")
+
+    # Target encoding and model column alignment in one pass over the compiled encoder
+    with span("hotspots", "encode_align"):
+        df = feature_engineering.get_target_encoder(HOTSPOT_ENCODING_DIR).transform_and_align(df)
+    return zone_names, df
+
+def compute_hotspots(pickup_time):
+    """
+    Runs the hotspot pipeline for one NYC pickup time.
+
+    Returns:
+        dict: Columns location_id, pickup_zone and predicted_trip_count as
+        arrays in zone order (unsorted), for the zones with a location id.
+    """
+    with span("hotspots", "model_load"):
+        model = hotspot_registry.get(pickup_time.month)
+    zone_names, df = build_hotspot_inputs(pickup_time)
+
+    # The per-column scan is only paid for sampled requests with debug logging on
+    if debug_sampled(logger):
+        logger.debug("Hotspot model input", extra={"pickup_time": pickup_time, "features": feature_stats(df)})
+
+    with span("hotspots", "predict"):
+        preds = np.expm1(native_model(model).predict(df))
+
+    with span("hotspots", "response"):
+        location_ids = zone_names.map(zone_name_to_id)
+        keep = location_ids.notna().to_numpy()
+        return {
+            "location_id": location_ids.to_numpy()[keep].astype(np.int64),
+            "pickup_zone": zone_names.to_numpy(dtype=object)[keep],
+            "predicted_trip_count": np.asarray(preds, dtype=np.float64)[keep]
+        }
+
+def hotspot_order(counts, top=None):
+    """
+    Row order by descending predicted count, ties in zone order. With top, only
+    the top rows are selected and sorted: every row above the top-th count
+    (found with np.partition) plus the first rows equal to it, so the result
+    is the head of the full order even with ties at the cutoff.
+    """
+    if top is not None and top < len(counts):
+        cutoff = -np.partition(-counts, top - 1)[top - 1]
+        above = np.flatnonzero(counts > cutoff)
+        tied = np.flatnonzero(counts == cutoff)[:top - len(above)]
+        rows = np.sort(np.concatenate([above, tied]))
+        return rows[np.argsort(-counts[rows], kind="stable")]
+    return np.argsort(-counts, kind="stable")
+
+hotspot_cache = PredictionCache(
+    maxsize=int(os.environ.get("HOTSPOT_CACHE_SIZE", "256")),
+    ttl_seconds=int(os.environ.get("HOTSPOT_CACHE_TTL", "3600"))
+)
+
+# Optional background warm-up of the next few hours, off by default
+HOTSPOT_WARMUP_HOURS = int(os.environ.get("HOTSPOT_WARMUP_HOURS", "0"))
+
+def upcoming_hotspot_times():
+    now_nyc = datetime.now(pytz.utc).replace(minute=0, second=0, microsecond=0).astimezone(timezone("America/New_York"))
+    upcoming = [now_nyc + timedelta(hours=h) for h in range(HOTSPOT_WARMUP_HOURS + 1)]
+    return [t for t in upcoming if t.month in MONTH_MODEL_MAP]
+
+# MODEL_PRELOAD=1 loads every month's models at startup instead of on first request.
+# Under gunicorn with preload_app this runs once in the master, before the workers fork.
+MODEL_PRELOAD = os.environ.get("MODEL_PRELOAD", "0") == "1"
+registry_warm = False
+
+def warm_registries():
+    global registry_warm
+    scoring_registry.preload(available_months())
+    hotspot_registry.preload(sorted(MONTH_MODEL_MAP))
+    # Build the Booster adapters (and load any compiled models) before workers fork
+    for month in scoring_registry.keys():
+        resources = scoring_registry.get(month)
+        for model_type in ("xgb", "lgb"):
+            native_model(resources[f"{model_type}_model"])
+    for month in hotspot_registry.keys():
+        native_model(hotspot_registry.get(month))
+    try:
+        get_zone_index()
+    except Exception as e:
+        logger.warning("Zone index not built at startup: %s", e)
+    if os.path.exists(HOTSPOT_ENCODING_DIR):
+        feature_engineering.get_target_encoder(HOTSPOT_ENCODING_DIR)
+    # Hash the shared hotspot files once, so no request pays for it
+    hotspot_reference_version()
+    registry_warm = True
+
+if MODEL_PRELOAD:
+    warm_registries()
+
+# Threads do not survive fork, so per-process background work starts on the first request
+_background_pid = None
+_background_lock = threading.Lock()
+
+@app.before_request
+def start_background_tasks():
+    global _background_pid
+    if _background_pid == os.getpid():
+        return
+    with _background_lock:
+        if _background_pid == os.getpid():
+            return
+        _background_pid = os.getpid()
+        if HOTSPOT_WARMUP_HOURS > 0:
+            start_warmup_thread(hotspot_cache, hotspot_cache_key, compute_hotspots, upcoming_hotspot_times)
+
+def parse_hotspot_time(time_str):
+    """
+    Converts the ?time= argument (ISO 8601 UTC) to NYC time, defaulting to the
+    current hour. Raises ValueError on a malformed time.
+    """
+    NYC = timezone("America/New_York")
+    if time_str:
+        # Accept ISO 8601 UTC format: "YYYY-MM-DDTHH:MM:SSZ"
+        dt_utc = datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ")
+        dt_utc = dt_utc.replace(tzinfo=pytz.utc)
+        return dt_utc.astimezone(NYC)
+    # Use current system time in UTC, convert to NYC
+    now_utc = datetime.now(pytz.utc).replace(minute=0, second=0, microsecond=0)
+    return now_utc.astimezone(NYC)
+
+# Part of every hotspot ETag; bump when the pipeline or the response encoding
+# changes so clients do not keep responses computed by the old code
+HOTSPOT_RESPONSE_VERSION = 1
+
+def hotspot_etag(cache_key, fmt, top):
+    """
+    Strong ETag of a /hotspots response, computed without running the
+    pipeline: the cache key (fingerprint and hour bucket), the response
+    version and the encoding options.
+    """
+    parts = (HOTSPOT_RESPONSE_VERSION, cache_key, fmt, top)
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+
+def cached_hotspot_value(cache_key, disk_key, compute):
+    """
+    Looks a hotspot result up in the in-process cache, then in the disk cache
+    (if enabled), and computes and stores it in both on a miss.
+    """
+    value = hotspot_cache.get(cache_key)
+    if value is not None:
+        return value
+    if disk_cache is not None:
+        value = disk_cache.get(disk_key)
+    if value is None:
+        value = compute()
+        if disk_cache is not None:
+            disk_cache.put(disk_key, value)
+    hotspot_cache.put(cache_key, value)
+    return value
+
+def seconds_to_next_hour(now=None):
+    """
+    Seconds until the next full hour, the earliest a new hour bucket can
+    change what /hotspots returns.
+    """
+    now = now if now is not None else time.time()
+    return max(1, int(3600 - now % 3600))
+
+def hotspot_cache_headers(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={seconds_to_next_hour()}"
+    # The encoding can be chosen through Accept
+    response.vary.add("Accept")
+    return response
+
 @app.route("/hotspots", methods=["GET"])
 def predict_hotspots():
-    NYC = timezone("America/New_York")
     try:
-        time_str = request.args.get("time")
-
-        if time_str:
-            try:
-                # Accept ISO 8601 UTC format: "YYYY-MM-DDTHH:MM:SSZ"
-                dt_utc = datetime.strptime(time_str, "%Y-%m-%dT%H:%M:%SZ")
-                dt_utc = dt_utc.replace(tzinfo=pytz.utc)
-                pickup_time = dt_utc.astimezone(NYC)
-            except ValueError:
-                return jsonify({
-                    "error": "Invalid time format. Use ISO format: YYYY-MM-DDTHH:MM:SSZ"
-                }), 400
-        else:
-            # Use current system time in UTC, convert to NYC
-            now_utc = datetime.now(pytz.utc).replace(minute=0, second=0, microsecond=0)
-            pickup_time = now_utc.astimezone(NYC)
+        try:
+            pickup_time = parse_hotspot_time(request.args.get("time"))
+        except ValueError:
+            return jsonify({
+                "error": "Invalid time format. Use ISO format: YYYY-MM-DDTHH:MM:SSZ"
+            }), 400
 
         month = pickup_time.month
 
-        print("DEBUG - pickup_time (NYC):", pickup_time)
-        print("DEBUG - pickup_time.month:", month)
         if month == 1:
             return jsonify({"error": "January predictions not supported."}), 400
 
-        
-        model = load_model_for_month(month)
-        df = generate_features_for_time(pickup_time)
+        try:
+            fmt = negotiate_format(request.args.get("format"), request.accept_mimetypes)
+        except UnsupportedFormat as e:
+            return jsonify({"error": str(e)}), 406
+        top = request.args.get("top")
+        if top is not None:
+            if not top.isdigit() or int(top) < 1:
+                return jsonify({"error": "top must be a positive integer"}), 400
+            top = int(top)
+
+        # A poll for an hour the client already holds is answered before any lookup or pipeline work
+        cache_key = hotspot_cache_key(pickup_time)
+        g.model_version = cache_key[0]
+        etag = hotspot_etag(cache_key, fmt, top)
+        if request.if_none_match.contains(etag):
+            return hotspot_cache_headers(Response(status=304), etag)
+
+        disk_key = disk_cache_key("hotspots", HOTSPOT_RESPONSE_VERSION, cache_key)
+        hotspots = cached_hotspot_value(cache_key, disk_key, lambda: compute_hotspots(pickup_time))
+
+        order = hotspot_order(hotspots["predicted_trip_count"], top)
+        body, mimetype = encode_columns({name: values[order] for name, values in hotspots.items()}, fmt)
+        return hotspot_cache_headers(Response(body, mimetype=mimetype), etag)
+
+    except UnsupportedFormat as e:
+        return jsonify({"error": str(e)}), 406
+    except Exception as e:
+        logger.exception("Hotspot request failed")
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
-        if df.empty:
-            return jsonify({"error": "Feature generation failed."}), 500
-        
-        # Add lag features
-        lag_data = get_multiple_proxy_lags(pickup_time)
+# -----------------------------
+# MULTI-HOUR FORECAST
+# -----------------------------
+HOTSPOT_FORECAST_MAX_HOURS = int(os.environ.get("HOTSPOT_FORECAST_MAX_HOURS", "168"))
+
+def forecast_times(start, hours):
+    """
+    NYC times of `hours` consecutive hours from start, stepped in UTC so the
+    daylight saving changes are counted correctly.
+    """
+    start_utc = start.astimezone(pytz.utc)
+    NYC = timezone("America/New_York")
+    return [(start_utc + timedelta(hours=h)).astimezone(NYC) for h in range(hours)]
+
+def compute_hotspot_forecast(pickup_times):
+    """
+    Runs the hotspot pipeline for several NYC pickup times at once: one feature
+    frame, one lag gather and one encoding pass for all times x zones, then one
+    predict per month model.
+
+    Returns:
+        tuple: (zone names, list with one array of predicted trip counts per
+        time, or None for a month without a model)
+    """
+    with span("forecast", "features"):
+        df = generate_features_for_times(pickup_times)
+    if df.empty:
+        raise RuntimeError("Feature generation failed.")
+    n_zones = len(df) // len(pickup_times)
+    zone_names = df["pickup_zone"].iloc[:n_zones].tolist()
+
+    with span("forecast", "lags"):
+        lag_data = get_lag_table().lag_features_for_times(pickup_times, zone_names)
         for col in ["trip_count_1h_ago", "trip_count_2h_ago", "rolling_avg_2h"]:
-            df[col] = df["pickup_zone"].map(lag_data[col]).fillna(0)
-
-        # Save pickup_zone before transformations
-        if "pickup_zone" not in df.columns:
-            return jsonify({"error": "Missing 'pickup_zone' column in features", "columns": df.columns.tolist()}), 500
-        zone_names = df["pickup_zone"].copy()
-
-        BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        encoding_dir = os.path.join(BASE_DIR, "hotspot_model", "models", "encoding_maps")
-        if not os.path.exists(encoding_dir):
-            return jsonify({"error": "Encoding dir not found."}), 500
-
-        df = feature_engineering.apply_target_encoding(df, encoding_dir)
-        df = feature_engineering.align_with_model_features(df)
-        print(df.head())
-        print(df.columns)
-        
-        print("="*60)
-        print("Debug Info: DataFrame to model before prediction")
-        print(f"Shape: {df.shape}")
-        print("First 5 rows:")
-        print(df.head())
-        print("\nColumn names:", list(df.columns))
-
-        # Show column statistics for each feature
-        for col in df.columns:
-            col_vals = df[col]
-            unique_vals = np.unique(col_vals)
-            print(f"Column: {col}")
-            print(f"  unique: {unique_vals[:10]}{' ...' if len(unique_vals)>10 else ''}")
-            print(f"  min: {col_vals.min()}, max: {col_vals.max()}, mean: {col_vals.mean()}, std: {col_vals.std()}")
-            print(f"  NaNs: {col_vals.isna().sum()}")
-            print("-"*20)
-
-        # Summary of columns with constant value
-        constant_cols = [col for col in df.columns if df[col].nunique() == 1]
-        print("\nConstant columns:", constant_cols)
-
-        # Print number of unique values in lag features
-        for lag in ['trip_count_1h_ago', 'trip_count_2h_ago', 'rolling_avg_2h']:
-            if lag in df.columns:
-                print(f"{lag}: unique={df[lag].unique()}, min={df[lag].min()}, max={df[lag].max()}")
-
-        print("="*60)
-        
-
-        preds = np.expm1(model.predict(df))
-
-        response = []
-        for zone, pred in zip(zone_names, preds):
-            zone_id = zone_name_to_id.get(zone)
-            if zone_id is not None:
-                response.append({
-                    "pickup_zone": zone,
-                    "location_id": int(zone_id),
-                    "predicted_trip_count": float(pred)
-                })
+            df[col] = lag_data[col]
+
+    if not os.path.exists(HOTSPOT_ENCODING_DIR):
+        raise RuntimeError("Encoding dir not found.")
+    with span("forecast", "encode_align"):
+        df = feature_engineering.get_target_encoder(HOTSPOT_ENCODING_DIR).transform_and_align(df)
+
+    # Rows are time-major, so each time is a block of n_zones rows
+    times_by_month = {}
+    for i, pickup_time in enumerate(pickup_times):
+        times_by_month.setdefault(pickup_time.month, []).append(i)
+
+    predictions = [None] * len(pickup_times)
+    for month, indices in times_by_month.items():
+        if month not in MONTH_MODEL_MAP:
+            continue
+        with span("forecast", "model_load"):
+            model = hotspot_registry.get(month)
+        rows = np.concatenate([np.arange(i * n_zones, (i + 1) * n_zones) for i in indices])
+        with span("forecast", "predict"):
+            preds = np.expm1(native_model(model).predict(df.iloc[rows]))
+        for block, i in enumerate(indices):
+            predictions[i] = preds[block * n_zones:(block + 1) * n_zones]
+    return zone_names, predictions
+
+def hotspot_forecast_response(start, hours):
+    """
+    Builds the /hotspots/forecast body: the zones once, then one row of
+    predicted trip counts per hour (null for hours in a month without a model).
+    """
+    pickup_times = forecast_times(start, hours)
+    zone_names, predictions = compute_hotspot_forecast(pickup_times)
+
+    keep = [i for i, zone in enumerate(zone_names) if zone_name_to_id.get(zone) is not None]
+    return {
+        "start": pickup_times[0].astimezone(pytz.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "hours": hours,
+        "times": [t.astimezone(pytz.utc).strftime("%Y-%m-%dT%H:%M:%SZ") for t in pickup_times],
+        "zones": [zone_names[i] for i in keep],
+        "location_ids": [int(zone_name_to_id[zone_names[i]]) for i in keep],
+        "predicted_trip_count": [
+            None if preds is None else preds[keep].tolist() for preds in predictions
+        ]
+    }
+
+@app.route("/hotspots/forecast", methods=["GET"])
+def forecast_hotspots():
+    """
+    Predicted trip counts for every zone over the `hours` hours (default 24)
+    from ?start= (ISO 8601 UTC, default the current hour), as a time x zone matrix.
+    """
+    try:
+        start = parse_hotspot_time(request.args.get("start"))
+    except ValueError:
+        return jsonify({"error": "Invalid start format. Use ISO format: YYYY-MM-DDTHH:MM:SSZ"}), 400
+    try:
+        hours = int(request.args.get("hours", "24"))
+    except ValueError:
+        return jsonify({"error": "hours must be an integer"}), 400
+    if not 1 <= hours <= HOTSPOT_FORECAST_MAX_HOURS:
+        return jsonify({"error": f"hours must be between 1 and {HOTSPOT_FORECAST_MAX_HOURS}"}), 400
+    try:
+        fmt = negotiate_format(request.args.get("format"), request.accept_mimetypes, supported=("json", "msgpack"))
+    except UnsupportedFormat as e:
+        return jsonify({"error": str(e)}), 406
 
-        response.sort(key=lambda x: x["predicted_trip_count"], reverse=True)
-        return jsonify(response)
+    try:
+        # Same buckets as /hotspots, so a forecast is reused until an hour's inputs change
+        pickup_times = forecast_times(start, hours)
+        # Each hour's key carries the fingerprint of its month
+        cache_key = ("forecast",) + tuple(hotspot_cache_key(t) for t in pickup_times)
+        g.model_version = combine_fingerprints({str(key[1]): key[0] for key in cache_key[1:] if key[0] is not None})
+        disk_key = disk_cache_key("forecast", HOTSPOT_RESPONSE_VERSION, cache_key)
+        response = cached_hotspot_value(cache_key, disk_key, lambda: hotspot_forecast_response(start, hours))
+        body, mimetype = encode_document(response, fmt)
+        return Response(body, mimetype=mimetype)
+    except UnsupportedFormat as e:
+        return jsonify({"error": str(e)}), 406
+    except Exception as e:
+        logger.exception("Hotspot forecast failed")
+        return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
+# -----------------------------
+# DIAGNOSTICS
+# -----------------------------
+# Opt-in: the per-column stats that used to be printed on every /hotspots call
+DEBUG_ENDPOINTS = os.environ.get("DEBUG_ENDPOINTS", "0") == "1"
+
+@app.route("/debug/features", methods=["GET"])
+def debug_features():
+    """
+    Per-column statistics of the hotspot model input for ?time=, computed on
+    demand. Returns 404 unless DEBUG_ENDPOINTS=1.
+    """
+    if not DEBUG_ENDPOINTS:
+        return jsonify({"error": "Not found"}), 404
+    try:
+        pickup_time = parse_hotspot_time(request.args.get("time"))
+    except ValueError:
+        return jsonify({"error": "Invalid time format. Use ISO format: YYYY-MM-DDTHH:MM:SSZ"}), 400
+    try:
+        _, df = build_hotspot_inputs(pickup_time)
+        return jsonify(dict(feature_stats(df), pickup_time=pickup_time.isoformat()))
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Feature diagnostics failed")
         return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
+# -----------------------------
+# MODEL REGISTRY STATUS
+# -----------------------------
+@app.route("/models", methods=["GET"])
+def models_status():
+    return jsonify({
+        "scoring": scoring_registry.stats(),
+        "hotspot": hotspot_registry.stats()
+    })
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness probe: 503 until the model registries are warm when MODEL_PRELOAD
+    is on, so a load balancer only routes to processes that can answer at once.
+    """
+    is_ready = registry_warm or not MODEL_PRELOAD
+    body = {
+        "ready": is_ready,
+        "preload": MODEL_PRELOAD,
+        "scoring_months": scoring_registry.keys(),
+        "hotspot_months": hotspot_registry.keys()
+    }
+    return jsonify(body), 200 if is_ready else 503
+
+# -----------------------------
+# ARTIFACT VERSIONS
+# -----------------------------
+_service_fingerprint = (None, None)
+
+def service_fingerprint():
+    """
+    Fingerprint of every artifact this process has loaded, the model version
+    of responses that do not come from one model. Recomputed only after a
+    registry loads, reloads or evicts an entry.
+    """
+    global _service_fingerprint
+    generations = (scoring_registry.generation, hotspot_registry.generation)
+    cached_generations, fingerprint = _service_fingerprint
+    if cached_generations == generations:
+        return fingerprint
+    parts = {
+        f"{registry.name}:{key}": version["fingerprint"]
+        for registry in (scoring_registry, hotspot_registry)
+        for key, version in registry.versions().items()
+    }
+    parts["hotspot_reference"] = hotspot_reference_version()[0]
+    fingerprint = combine_fingerprints(parts)
+    _service_fingerprint = (generations, fingerprint)
+    return fingerprint
+
+@app.route("/version", methods=["GET"])
+def version():
+    """
+    Content fingerprints of the loaded models and the hotspot reference files,
+    with the sha256 of every file behind them.
+    """
+    reference_fingerprint, reference_artifacts = hotspot_reference_version()
+    return jsonify({
+        "fingerprint": service_fingerprint(),
+        "response_version": HOTSPOT_RESPONSE_VERSION,
+        "scoring": scoring_registry.versions(),
+        "hotspot": {str(month): v for month, v in hotspot_registry.versions().items()},
+        "hotspot_reference": {"fingerprint": reference_fingerprint, "artifacts": reference_artifacts}
+    })
+
+# -----------------------------
+# METRICS
+# -----------------------------
+request_metrics = RequestMetrics()
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        request_metrics.record(request.method, route, response.status_code, time.perf_counter() - start)
+    # Lets clients and caches in front of the API tell which artifacts produced a response
+    response.headers["X-Model-Version"] = g.pop("model_version", None) or service_fingerprint()
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    Prometheus scrape endpoint for this process.
+    """
+    body = render_metrics(
+        request_metrics,
+        stage_histograms(),
+        caches=dict({"hotspot": hotspot_cache.stats()}, **({"disk": disk_cache.stats()} if disk_cache is not None else {})),
+        registries=[scoring_registry.stats(), hotspot_registry.stats()],
+        batchers={"scoring": scoring_batcher.stats()} if SCORE_MICROBATCH else {}
+    )
+    return Response(body, content_type=METRICS_CONTENT_TYPE)
+
 # -----------------------------
 # Health Check or Root Route
 # -----------------------------
@@ -246,4 +1014,5 @@ def home():
     return "Combined Trip Scoring + Hotspot Prediction API is running!"
 
 if __name__ == "__main__":
+    start_background_tasks()
     app.run(host='0.0.0.0', port=5050, debug=False)
\ No newline at end of file
@@ -0,0 +1,50 @@
+# gunicorn.conf.py
+"""
+Production serving configuration.
+
+    gunicorn --config data/data_models_api/combined_flask_app/gunicorn.conf.py flask_app:app
+
+The app is imported once in the master (preload_app) with MODEL_PRELOAD on, so
+every month's models, the lag table and the target encoder are loaded before
+the workers fork and their memory pages are shared copy-on-write instead of
+being loaded again in each worker.
+"""
+
+import gc
+import multiprocessing
+import os
+
+# Load everything in the master unless explicitly turned off
+os.environ.setdefault("MODEL_PRELOAD", "1")
+# One OpenMP thread per worker: the worker count provides the parallelism, and
+# XGBoost/LightGBM thread pools do not survive fork
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5050")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+# Micro-batching needs concurrent requests inside one process to group, so it
+# runs threaded workers; otherwise one request per worker at a time
+if os.environ.get("SCORE_MICROBATCH", "0") == "1":
+    worker_class = "gthread"
+    threads = int(os.environ.get("GUNICORN_THREADS", "16"))
+else:
+    worker_class = "sync"
+preload_app = True
+
+# Graceful recycling: each worker is replaced after MAX_REQUESTS (+ jitter so
+# they do not all restart together) and gets GRACEFUL_TIMEOUT to finish requests
+max_requests = int(os.environ.get("MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", "200"))
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.environ.get("WORKER_TIMEOUT", "60"))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("LOG_LEVEL", "info").lower()
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the collector's generations so GC
+    # passes in the workers do not write to (and copy) the shared pages
+    gc.freeze()
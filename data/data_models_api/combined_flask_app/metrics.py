@@ -0,0 +1,145 @@
+# metrics.py
+"""
+Prometheus text exposition (format 0.0.4) of the app's in-process metrics:
+request counts and latency per route, the per-stage histograms recorded by
+stage_timing, response cache hit rates, model registry load counts and, when
+micro-batching is on, batch counts.
+
+Written by hand rather than with prometheus_client so the app keeps its
+dependency list; everything here is read from counters the app already keeps.
+"""
+
+import math
+import threading
+from collections import defaultdict
+
+from stage_timing import Histogram
+
+METRIC_PREFIX = "taximize"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestMetrics:
+    """
+    Thread-safe request counts per (method, route, status) and a latency
+    histogram per route. Routes are the URL rule ("/hotspots"), not the raw
+    path, so the label set stays bounded.
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+        self._latency = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, route, status, seconds):
+        with self._lock:
+            self._counts[(method, route, str(status))] += 1
+            hist = self._latency.get(route)
+            if hist is None:
+                hist = self._latency[route] = Histogram()
+        hist.observe(seconds)
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def latency(self):
+        with self._lock:
+            items = list(self._latency.items())
+        return {route: hist.snapshot() for route, hist in sorted(items)}
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def header(self, name, metric_type, help_text):
+        self.lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+        self.lines.append(f"# TYPE {METRIC_PREFIX}_{name} {metric_type}")
+
+    def sample(self, name, labels, value):
+        self.lines.append(f"{METRIC_PREFIX}_{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name, labels, snapshot):
+        for bound, count in snapshot["buckets"]:
+            self.sample(f"{name}_bucket", dict(labels, le=_number(bound)), count)
+        self.sample(f"{name}_sum", labels, snapshot["sum"])
+        self.sample(f"{name}_count", labels, snapshot["count"])
+
+
+def render_metrics(request_metrics, stage_histograms, caches, registries, batchers=None):
+    """
+    Builds the /metrics response body.
+
+    Args:
+        request_metrics (RequestMetrics): Per-route counts and latency.
+        stage_histograms (dict): (pipeline, stage) -> histogram snapshot.
+        caches (dict): Cache name -> PredictionCache.stats().
+        registries (list): ModelRegistry.stats() of every registry.
+        batchers (dict): Batcher name -> MicroBatcher.stats(), if micro-batching is on.
+
+    Returns:
+        str: Prometheus text format.
+    """
+    out = _Writer()
+
+    out.header("http_requests_total", "counter", "Requests handled, by method, route and status.")
+    for (method, route, status), count in sorted(request_metrics.counts().items()):
+        out.sample("http_requests_total", {"method": method, "route": route, "status": status}, count)
+
+    out.header("http_request_duration_seconds", "histogram", "Request latency by route.")
+    for route, snapshot in request_metrics.latency().items():
+        out.histogram("http_request_duration_seconds", {"route": route}, snapshot)
+
+    out.header("stage_duration_seconds", "histogram", "Latency of each pipeline stage.")
+    for (pipeline, stage), snapshot in stage_histograms.items():
+        out.histogram("stage_duration_seconds", {"pipeline": pipeline, "stage": stage}, snapshot)
+
+    for name, metric_type, key, help_text in [
+        ("cache_hits_total", "counter", "hits", "Response cache hits."),
+        ("cache_misses_total", "counter", "misses", "Response cache misses, including expired entries."),
+        ("cache_evictions_total", "counter", "evictions", "Entries evicted to respect the cache size."),
+        ("cache_entries", "gauge", "size", "Entries currently cached."),
+        ("cache_hit_ratio", "gauge", "hit_rate", "Hits over lookups since start."),
+    ]:
+        out.header(name, metric_type, help_text)
+        for cache_name, stats in sorted(caches.items()):
+            out.sample(name, {"cache": cache_name}, stats[key])
+
+    for name, metric_type, key, help_text in [
+        ("model_loads_total", "counter", "loads", "Models loaded for the first time."),
+        ("model_reloads_total", "counter", "reloads", "Models reloaded after their files changed."),
+        ("model_evictions_total", "counter", "evictions", "Models dropped to respect MODEL_CACHE_SIZE."),
+        ("models_loaded", "gauge", "size", "Models currently held in memory."),
+        ("model_memory_bytes", "gauge", "memory_bytes", "Estimated memory of the loaded models."),
+    ]:
+        out.header(name, metric_type, help_text)
+        for stats in registries:
+            out.sample(name, {"registry": stats["name"]}, stats[key])
+
+    if batchers:
+        for name, key, help_text in [
+            ("microbatch_batches_total", "batches", "Batches run by the request micro-batcher."),
+            ("microbatch_items_total", "items", "Requests answered through the micro-batcher."),
+        ]:
+            out.header(name, "counter", help_text)
+            for batcher_name, stats in sorted(batchers.items()):
+                out.sample(name, {"batcher": batcher_name}, stats[key])
+
+    return "\n".join(out.lines) + "\n"
@@ -0,0 +1,104 @@
+# micro_batcher.py
+"""
+Micro-batching of concurrent single-item requests.
+
+Requests handled by different threads at the same moment (gunicorn gthread
+workers, or Flask's threaded dev server) submit their item under a group key.
+The first item of a group becomes the leader: it waits up to window_seconds
+for more items of the same group (or until max_batch have arrived), then runs
+process_batch once for the whole group and hands every waiting caller its own
+result. Later items start a new batch, so a caller never waits longer than
+one window plus one batch.
+
+The leader runs the batch on its own request thread, so no background thread
+is needed and nothing has to be restarted after a fork.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class _Batch:
+    __slots__ = ("items", "futures", "full")
+
+    def __init__(self):
+        self.items = []
+        self.futures = []
+        self.full = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent submissions per group key into batches.
+    """
+
+    def __init__(self, process_batch, window_seconds=0.003, max_batch=64):
+        """
+        Args:
+            process_batch (callable): (group key, list of items) -> list of
+                results in the same order. An exception is raised to every
+                caller of the batch.
+            window_seconds (float): How long the first item of a batch waits for others.
+            max_batch (int): A batch is run as soon as it holds this many items.
+        """
+        self.process_batch = process_batch
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def submit(self, group, item):
+        """
+        Adds item to the open batch of its group and blocks until the batch
+        has run. Returns this item's result.
+        """
+        future = Future()
+        with self._lock:
+            batch = self._pending.get(group)
+            leader = batch is None
+            if leader:
+                batch = self._pending[group] = _Batch()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_batch:
+                # Closed to new items; the next submission opens a new batch
+                del self._pending[group]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window_seconds)
+            with self._lock:
+                if self._pending.get(group) is batch:
+                    del self._pending[group]
+                self.batches += 1
+                self.items += len(batch.items)
+                self.largest_batch = max(self.largest_batch, len(batch.items))
+            self._run(group, batch)
+
+        return future.result()
+
+    def _run(self, group, batch):
+        try:
+            results = self.process_batch(group, batch.items)
+            if len(results) != len(batch.items):
+                raise RuntimeError(f"Batch of {len(batch.items)} items returned {len(results)} results")
+        except Exception as e:
+            for future in batch.futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(batch.futures, results):
+            future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "window_seconds": self.window_seconds,
+                "max_batch": self.max_batch,
+                "batches": self.batches,
+                "items": self.items,
+                "largest_batch": self.largest_batch,
+                "mean_batch": self.items / self.batches if self.batches else 0.0
+            }
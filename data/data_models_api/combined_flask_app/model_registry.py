@@ -0,0 +1,246 @@
+# model_registry.py
+
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from artifact_fingerprints import artifact_fingerprint
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_memory_bytes(obj, _seen=None):
+    """
+    Rough in-memory size of a loaded model or resource bundle. DataFrames and
+    arrays report their buffers (memory-mapped arrays their mapped size,
+    without reading pages), containers and plain objects such as
+    ReferenceTables are walked. Native booster memory is not visible from
+    Python and is left out rather than measured by serializing the model.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return 0
+    if isinstance(obj, dict):
+        return sum(estimate_memory_bytes(v, _seen) for v in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(estimate_memory_bytes(v, _seen) for v in obj)
+    if isinstance(getattr(obj, "__dict__", None), dict) and not isinstance(obj, type):
+        return sum(estimate_memory_bytes(v, _seen) for v in vars(obj).values())
+    return 0
+
+
+class ModelRegistry:
+    """
+    Thread-safe registry of loaded models keyed by month.
+
+    Entries are loaded on first use (or up front with preload) and kept in LRU
+    order, bounded by max_entries when set. Each entry remembers the mtimes of
+    the files it was loaded from; when one changes on disk the request that
+    notices it loads the new version and swaps it in atomically, while
+    concurrent requests keep using the old model until the new one is ready.
+    Each entry also records the content fingerprint of the files it was
+    loaded from, so responses can say which artifacts produced them.
+    """
+
+    def __init__(self, name, loader, source_files, max_entries=None, check_interval=5, on_reload=None):
+        """
+        Args:
+            name (str): Used in stats and log messages.
+            loader (callable): key -> loaded object.
+            source_files (callable): key -> list of paths the object is read from.
+            max_entries (int): Most entries kept in memory, None for no bound.
+            check_interval (float): Seconds between mtime checks of an entry, None to disable hot reload.
+            on_reload (callable): Called with the key after an entry is replaced.
+        """
+        self.name = name
+        self.loader = loader
+        self.source_files = source_files
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.on_reload = on_reload
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+        # Bumped whenever the set of loaded entries changes, so derived values can be memoized on it
+        self.generation = 0
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _mtimes(self, key):
+        mtimes = {}
+        for path in self.source_files(key):
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _load(self, key):
+        start = time.perf_counter()
+        mtimes = self._mtimes(key)
+        fingerprint, artifacts = artifact_fingerprint(list(mtimes))
+        value = self.loader(key)
+        load_seconds = time.perf_counter() - start
+        return {
+            "value": value,
+            "mtimes": mtimes,
+            "fingerprint": fingerprint,
+            "artifacts": artifacts,
+            "load_seconds": load_seconds,
+            "memory_bytes": estimate_memory_bytes(value),
+            "loaded_at": time.time(),
+            "checked_at": time.monotonic()
+        }
+
+    def _store(self, key, entry):
+        with self._lock:
+            replaced = key in self._entries
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self.generation += 1
+        return replaced
+
+    def _is_stale(self, key, entry):
+        if self.check_interval is None:
+            return False
+        now = time.monotonic()
+        if now - entry["checked_at"] < self.check_interval:
+            return False
+        entry["checked_at"] = now
+        return self._mtimes(key) != entry["mtimes"]
+
+    def get(self, key):
+        """
+        Returns the loaded object for key, loading or reloading it if needed.
+        Loader errors propagate to the caller; on a failed reload the previous
+        object stays in place.
+        """
+        return self._get_entry(key)["value"]
+
+    def get_versioned(self, key):
+        """
+        Same as get, with the fingerprint of the artifacts that object was
+        loaded from.
+
+        Returns:
+            tuple: (loaded object, fingerprint)
+        """
+        entry = self._get_entry(key)
+        return entry["value"], entry["fingerprint"]
+
+    def _get_entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None and not self._is_stale(key, entry):
+            return entry
+
+        # One load per key at a time, outside the registry lock so other keys keep serving
+        with self._key_lock(key):
+            with self._lock:
+                current = self._entries.get(key)
+            if current is not None and current is not entry:
+                return current
+            try:
+                new_entry = self._load(key)
+            except Exception as e:
+                if entry is None:
+                    raise
+                logger.warning("%s: reload of %s failed, keeping the loaded version: %s", self.name, key, e)
+                return entry
+
+            replaced = self._store(key, new_entry)
+            if replaced:
+                self.reloads += 1
+                if self.on_reload is not None:
+                    self.on_reload(key)
+            else:
+                self.loads += 1
+            return new_entry
+
+    def preload(self, keys):
+        """
+        Loads every key up front. Failures are reported and skipped so one
+        missing month does not stop the others.
+        """
+        loaded = []
+        for key in keys:
+            try:
+                self.get(key)
+                loaded.append(key)
+            except Exception as e:
+                logger.warning("%s: could not preload %s: %s", self.name, key, e)
+        return loaded
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def versions(self):
+        """
+        Returns:
+            dict: Key -> {"fingerprint", "artifacts": {file name: sha256}} of
+            every loaded entry.
+        """
+        with self._lock:
+            return {
+                key: {"fingerprint": entry["fingerprint"], "artifacts": dict(entry["artifacts"])}
+                for key, entry in self._entries.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            entries = [
+                {
+                    "key": key,
+                    "fingerprint": entry["fingerprint"],
+                    "load_seconds": round(entry["load_seconds"], 4),
+                    "memory_bytes": entry["memory_bytes"],
+                    "loaded_at": entry["loaded_at"]
+                }
+                for key, entry in self._entries.items()
+            ]
+            return {
+                "name": self.name,
+                "size": len(entries),
+                "max_entries": self.max_entries,
+                "loads": self.loads,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "memory_bytes": sum(e["memory_bytes"] for e in entries),
+                "entries": entries
+            }
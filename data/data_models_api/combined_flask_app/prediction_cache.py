@@ -0,0 +1,104 @@
+# prediction_cache.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL.
+
+    Holds final endpoint responses keyed on the inputs that determine them, so
+    repeated requests for the same bucket skip the feature and model pipeline.
+    """
+
+    def __init__(self, maxsize=256, ttl_seconds=3600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the cached value or None on a miss or an expired entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] >= time.monotonic()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+def start_warmup_thread(cache, key_fn, compute_fn, next_times_fn, interval_seconds=300):
+    """
+    Starts a daemon thread that keeps upcoming buckets in the cache.
+
+    Args:
+        cache (PredictionCache): Cache to fill.
+        key_fn (callable): Maps a time to its cache key.
+        compute_fn (callable): Computes the value for a time.
+        next_times_fn (callable): Returns the times to warm on each pass.
+        interval_seconds (int): Pause between passes.
+    """
+    def warm():
+        while True:
+            for pickup_time in next_times_fn():
+                key = key_fn(pickup_time)
+                if key in cache:
+                    continue
+                try:
+                    cache.put(key, compute_fn(pickup_time))
+                except Exception as e:
+                    logger.warning("Cache warm-up failed for %s: %s", pickup_time, e)
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=warm, name="prediction-cache-warmup", daemon=True)
+    thread.start()
+    return thread
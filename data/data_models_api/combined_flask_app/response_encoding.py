@@ -0,0 +1,137 @@
+# response_encoding.py
+"""
+Content negotiation and encoding of tabular responses.
+
+Endpoints that return one row per zone or per trip keep their results as
+columns (name -> 1-D array or list) and encode them on the way out in the
+format the client asked for, with ?format= taking precedence over Accept:
+- json: a list of row objects, the default and the historical shape
+- columnar: one JSON object of parallel arrays
+- msgpack: the same parallel arrays as MessagePack (needs msgpack)
+- arrow: an Arrow IPC stream with one record batch (needs pyarrow)
+
+Columns are converted with one ndarray.tolist() each and serialized by the C
+encoders of json and msgpack; Arrow takes the arrays as they are.
+"""
+
+import io
+import json
+
+import numpy as np
+
+FORMATS = ("json", "columnar", "msgpack", "arrow")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columnar": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Accept media types that select a format without ?format=
+ACCEPT_FORMATS = {
+    "application/json": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.apache.arrow.stream": "arrow",
+}
+
+
+class UnsupportedFormat(ValueError):
+    """
+    The requested format is unknown, not offered by the endpoint, or its
+    encoder library is not installed. Endpoints answer 406.
+    """
+
+
+def negotiate_format(format_arg, accept_mimetypes, supported=FORMATS):
+    """
+    Picks the response format from ?format= or the Accept header.
+
+    Args:
+        format_arg (str): Value of ?format=, or None.
+        accept_mimetypes (werkzeug MIMEAccept): request.accept_mimetypes.
+        supported (tuple): Formats the endpoint can produce.
+
+    Returns:
+        str: One of supported, "json" when nothing specific was asked for.
+    """
+    if format_arg:
+        fmt = format_arg.lower()
+        if fmt not in supported:
+            raise UnsupportedFormat(f"Unsupported format '{format_arg}', use one of: {', '.join(supported)}")
+        return fmt
+    offered = [media for media, fmt in ACCEPT_FORMATS.items() if fmt in supported]
+    best = accept_mimetypes.best_match(offered, default="application/json")
+    return ACCEPT_FORMATS.get(best, "json")
+
+
+def _as_list(values):
+    return values.tolist() if isinstance(values, np.ndarray) else list(values)
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise UnsupportedFormat("MessagePack responses need the msgpack package")
+    return msgpack
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise UnsupportedFormat("Arrow responses need the pyarrow package")
+    return pyarrow
+
+
+def encode_columns(columns, fmt):
+    """
+    Encodes equal-length columns in the given format.
+
+    Args:
+        columns (dict): Column name -> ndarray or list, in output order.
+        fmt (str): One of FORMATS.
+
+    Returns:
+        tuple: (body as bytes or str, media type)
+    """
+    if fmt == "arrow":
+        pa = _import_pyarrow()
+        batch = pa.RecordBatch.from_pydict(dict(columns))
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue(), MEDIA_TYPES[fmt]
+
+    lists = {name: _as_list(values) for name, values in columns.items()}
+    if fmt == "json":
+        # Filled column by column, about twice as fast as dict(zip(names, row)) per row
+        rows = [{} for _ in range(len(next(iter(lists.values()), [])))]
+        for name, values in lists.items():
+            for row, value in zip(rows, values):
+                row[name] = value
+        body = json.dumps(rows, separators=(",", ":"))
+    elif fmt == "columnar":
+        body = json.dumps(lists, separators=(",", ":"))
+    elif fmt == "msgpack":
+        body = _import_msgpack().packb(lists)
+    else:
+        raise UnsupportedFormat(f"Unsupported format '{fmt}'")
+    return body, MEDIA_TYPES[fmt]
+
+
+def encode_document(document, fmt):
+    """
+    Encodes a JSON-like document that is already columnar (e.g. the forecast
+    matrix) as JSON or MessagePack.
+
+    Returns:
+        tuple: (body as bytes or str, media type)
+    """
+    if fmt in ("json", "columnar"):
+        return json.dumps(document, separators=(",", ":")), MEDIA_TYPES["json"]
+    if fmt == "msgpack":
+        return _import_msgpack().packb(document), MEDIA_TYPES["msgpack"]
+    raise UnsupportedFormat(f"Unsupported format '{fmt}'")
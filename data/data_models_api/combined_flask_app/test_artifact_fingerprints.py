@@ -0,0 +1,151 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import benchmark_suite
+import flask_app
+from artifact_fingerprints import artifact_fingerprint, combine_fingerprints, file_digest
+from model_registry import ModelRegistry
+from score_cube import save_score_cube
+
+
+class TestArtifactFingerprints(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_fingerprint_follows_content_not_mtime(self):
+        path = self.write("model.pkl", b"v1")
+        before, digests = artifact_fingerprint([path])
+        self.assertEqual(list(digests), ["model.pkl"])
+        os.utime(path, ns=(0, 10**9))
+        self.assertEqual(artifact_fingerprint([path])[0], before)
+        self.write("model.pkl", b"v2")
+        self.assertNotEqual(artifact_fingerprint([path])[0], before)
+
+    def test_same_bytes_elsewhere_give_the_same_fingerprint(self):
+        first = self.write("model.pkl", b"weights")
+        os.mkdir(os.path.join(self.tmp.name, "copy"))
+        second = self.write(os.path.join("copy", "model.pkl"), b"weights")
+        self.assertEqual(artifact_fingerprint([first])[0], artifact_fingerprint([second])[0])
+
+    def test_missing_file_and_order(self):
+        self.assertIsNone(file_digest(os.path.join(self.tmp.name, "missing.pkl")))
+        self.assertEqual(combine_fingerprints({"a": "1", "b": "2"}), combine_fingerprints({"b": "2", "a": "1"}))
+
+    def test_registry_records_the_loaded_fingerprint(self):
+        path = self.write("jul.txt", b"a")
+        registry = ModelRegistry("test", lambda key: open(path).read(), lambda key: [path], check_interval=0)
+        value, fingerprint = registry.get_versioned("jul")
+        self.assertEqual((value, fingerprint), ("a", artifact_fingerprint([path])[0]))
+        self.assertEqual(registry.versions()["jul"]["fingerprint"], fingerprint)
+        self.assertEqual(registry.stats()["entries"][0]["fingerprint"], fingerprint)
+
+        self.write("jul.txt", b"bb")
+        os.utime(path, ns=(0, 10**9))
+        self.assertNotEqual(registry.get_versioned("jul")[1], fingerprint)
+
+
+class TestVersionEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.client = flask_app.app.test_client()
+
+    def test_version_lists_reference_artifacts(self):
+        body = self.client.get("/version").get_json()
+        self.assertEqual(body["response_version"], flask_app.HOTSPOT_RESPONSE_VERSION)
+        self.assertIn("pickup_zone_target_encoding.pkl", body["hotspot_reference"]["artifacts"])
+        self.assertEqual(len(body["fingerprint"]), 16)
+
+    def test_every_response_carries_a_model_version(self):
+        response = self.client.get("/")
+        self.assertEqual(response.headers["X-Model-Version"], flask_app.service_fingerprint())
+        error = self.client.get("/hotspots", query_string={"time": "bad"})
+        self.assertIn("X-Model-Version", error.headers)
+
+    def test_service_fingerprint_is_reused_until_a_registry_changes(self):
+        fingerprint = flask_app.service_fingerprint()
+        with mock.patch.object(flask_app, "hotspot_reference_version", side_effect=AssertionError):
+            self.assertEqual(flask_app.service_fingerprint(), fingerprint)
+        flask_app.hotspot_registry.generation += 1
+        with mock.patch.object(flask_app, "hotspot_reference_version", return_value=("changed", {})):
+            self.assertNotEqual(flask_app.service_fingerprint(), fingerprint)
+
+    def test_hotspots_carry_the_month_fingerprint(self):
+        fake = {
+            "location_id": np.array([211]),
+            "pickup_zone": np.array(["SoHo"], dtype=object),
+            "predicted_trip_count": np.array([1.0])
+        }
+        flask_app.hotspot_cache.clear()
+        try:
+            with mock.patch.object(flask_app, "compute_hotspots", lambda pickup_time: fake):
+                response = self.client.get("/hotspots", query_string={"time": "2025-07-11T10:00:00Z"})
+        finally:
+            flask_app.hotspot_cache.clear()
+        self.assertEqual(response.headers["X-Model-Version"], flask_app.hotspot_fingerprint(7))
+
+
+class TestScoringVersion(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fixtures = benchmark_suite.Fixtures(self.tmp.name, duration_rows=2000)
+        self.client = flask_app.app.test_client()
+
+    def tearDown(self):
+        self.fixtures.restore()
+        self.tmp.cleanup()
+
+    def test_scores_carry_the_loaded_month_fingerprint(self):
+        trip = dict(zip(["pickup_zone", "dropoff_zone", "pickup_datetime"], benchmark_suite.FIXTURE_TRIP))
+        # Registry versions only, no directory probing at request time
+        with mock.patch.object(flask_app, "reference_file_paths", side_effect=AssertionError):
+            single = self.client.post("/score_xgb", json=trip)
+            batch = self.client.post("/score_xgb/batch", json={"trips": [trip]})
+        self.assertEqual((single.status_code, batch.status_code), (200, 200))
+        fingerprint = flask_app.scoring_registry.versions()["jul"]["fingerprint"]
+        self.assertEqual(single.headers["X-Model-Version"], fingerprint)
+        self.assertEqual(batch.headers["X-Model-Version"], combine_fingerprints({"jul": fingerprint}))
+
+    def save_cube(self, cube_dir, fingerprint):
+        # A cube that answers 0.0 everywhere, so its answers are easy to tell from the model's
+        manifest = {
+            "model_type": "xgb", "dtype": "uint8", "zones": list(benchmark_suite.FIXTURE_TRIP[:2]),
+            "scaler": {"min": 0.0, "max": 1.0}, "final_score_tolerance": 0.0, "source_fingerprint": fingerprint
+        }
+        save_score_cube(np.zeros((2, 2, 7, 24), dtype=np.uint8), manifest, cube_dir, "jul")
+
+    def test_cube_of_another_model_version_is_not_served(self):
+        trip = dict(zip(["pickup_zone", "dropoff_zone", "pickup_datetime"], benchmark_suite.FIXTURE_TRIP))
+        cube_dir = os.path.join(self.tmp.name, "cubes")
+        fingerprint = flask_app.scoring_registry.get_versioned("jul")[1]
+        self.save_cube(cube_dir, "old model")
+        with mock.patch.object(flask_app, "SCORE_CUBE_DIR", cube_dir), \
+                mock.patch.dict(flask_app.loaded_cubes, clear=True):
+            stale = self.client.post("/score_xgb", json=trip)
+            # A rebuilt cube is picked up once the fingerprint changes
+            self.save_cube(cube_dir, fingerprint)
+            flask_app.loaded_cubes.clear()
+            fresh = self.client.post("/score_xgb", json=trip)
+        self.assertNotEqual(stale.get_json()["final_score"], 0.0)
+        self.assertEqual(fresh.get_json()["final_score"], 0.0)
+        self.assertEqual(fresh.headers["X-Model-Version"], fingerprint)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import benchmark_suite
+import scoring_utils
+import utils
+
+
+def results(**medians):
+    return {"results": {name: {"median_ms": ms} for name, ms in medians.items()}}
+
+
+class TestCompareResults(unittest.TestCase):
+
+    def test_slowdown_beyond_threshold_is_a_regression(self):
+        rows = benchmark_suite.compare_results(results(a=1.0, b=1.0), results(a=1.3, b=1.1), threshold=0.2)
+        self.assertEqual({row["name"]: row["regression"] for row in rows}, {"a": True, "b": False})
+
+    def test_tiny_absolute_changes_are_ignored(self):
+        rows = benchmark_suite.compare_results(results(a=0.01), results(a=0.03), threshold=0.2, min_delta_ms=0.05)
+        self.assertFalse(rows[0]["regression"])
+
+    def test_cases_missing_from_baseline_are_skipped(self):
+        rows = benchmark_suite.compare_results(results(a=1.0), results(a=1.0, new=5.0))
+        self.assertEqual([row["name"] for row in rows], ["a"])
+
+
+class TestSuiteSmoke(unittest.TestCase):
+
+    def test_runs_on_synthetic_fixtures_and_restores_state(self):
+        model_dir, lag_tables = scoring_utils.MODEL_DIR, dict(utils._lag_tables)
+        document = benchmark_suite.run_suite(repeat=1, duration_rows=2000, only="api.*")
+        self.assertEqual(sorted(document["results"]), ["api.hotspots_cached", "api.hotspots_forecast_24h_uncached", "api.hotspots_uncached", "api.score_xgb"])
+        self.assertGreater(document["results"]["api.score_xgb"]["median_ms"], 0)
+        self.assertEqual(document["meta"]["duration_rows"], 2000)
+        self.assertEqual(scoring_utils.MODEL_DIR, model_dir)
+        self.assertEqual(utils._lag_tables.keys(), lag_tables.keys())
+
+
+if __name__ == "__main__":
+    unittest.main()
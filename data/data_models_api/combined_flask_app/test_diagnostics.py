@@ -0,0 +1,69 @@
+import unittest
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import diagnostics
+import flask_app
+from diagnostics import JsonFormatter, debug_sampled, feature_stats
+
+
+class TestDiagnostics(unittest.TestCase):
+
+    def test_feature_stats(self):
+        df = pd.DataFrame({"a": [1.0, 2.0, np.nan], "b": [5, 5, 5]})
+        stats = feature_stats(df)
+        self.assertEqual(stats["shape"], [3, 2])
+        self.assertEqual(stats["columns"]["a"]["nans"], 1)
+        self.assertEqual(stats["columns"]["a"]["max"], 2.0)
+        self.assertEqual(stats["constant_columns"], ["b"])
+        json.dumps(stats)
+
+    def test_sampling_is_off_below_debug_level(self):
+        logger = logging.getLogger("test_diagnostics.quiet")
+        logger.setLevel(logging.INFO)
+        self.assertFalse(debug_sampled(logger, rate=1.0))
+        logger.setLevel(logging.DEBUG)
+        self.assertTrue(debug_sampled(logger, rate=1.0))
+        self.assertFalse(debug_sampled(logger, rate=0.0))
+
+    def test_json_formatter_includes_extra_fields(self):
+        record = logging.LogRecord("x", logging.INFO, __file__, 1, "hello %s", ("world",), None)
+        record.month = "jul"
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual((entry["message"], entry["level"], entry["month"]), ("hello world", "INFO", "jul"))
+
+
+class TestDebugFeaturesEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.client = flask_app.app.test_client()
+        self.original = flask_app.DEBUG_ENDPOINTS
+
+    def tearDown(self):
+        flask_app.DEBUG_ENDPOINTS = self.original
+
+    def test_disabled_by_default(self):
+        flask_app.DEBUG_ENDPOINTS = False
+        self.assertEqual(self.client.get("/debug/features").status_code, 404)
+
+    def test_reports_column_stats(self):
+        flask_app.DEBUG_ENDPOINTS = True
+        original_build = flask_app.build_hotspot_inputs
+        flask_app.build_hotspot_inputs = lambda t: (None, pd.DataFrame({"hour": [10, 10]}))
+        try:
+            response = self.client.get("/debug/features", query_string={"time": "2025-07-11T14:00:00Z"})
+        finally:
+            flask_app.build_hotspot_inputs = original_build
+        body = response.get_json()
+        self.assertEqual(body["constant_columns"], ["hour"])
+        self.assertEqual(body["pickup_time"], "2025-07-11T10:00:00-04:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import flask_app
+from disk_cache import DiskCache
+
+
+def put_from_child(path):
+    DiskCache(path).put("child", {"pid": os.getpid()})
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "predictions.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_values_survive_a_new_instance(self):
+        DiskCache(self.path).put("k", {"counts": np.arange(3)})
+        cache = DiskCache(self.path)
+        np.testing.assert_array_equal(cache.get("k")["counts"], [0, 1, 2])
+        self.assertIsNone(cache.get("missing"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+    def test_expired_entries_are_misses_and_pruned(self):
+        cache = DiskCache(self.path, ttl_seconds=60)
+        cache.put("old", 1, ttl_seconds=0.01)
+        cache.put("new", 2)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("old"))
+        self.assertEqual(cache.prune(), 1)
+        self.assertEqual(cache.get("new"), 2)
+
+    def test_size_cap_drops_entries_closest_to_expiry(self):
+        cache = DiskCache(self.path, max_bytes=2500, prune_every=1)
+        for i, ttl in enumerate([10, 30, 20]):
+            cache.put(f"k{i}", b"x" * 1000, ttl_seconds=ttl)
+        self.assertIsNone(cache.get("k0"))
+        self.assertIsNotNone(cache.get("k1"))
+        self.assertIsNotNone(cache.get("k2"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_shared_between_processes(self):
+        cache = DiskCache(self.path)
+        cache.get("warm-up")
+        process = multiprocessing.get_context("fork").Process(target=put_from_child, args=(self.path,))
+        process.start()
+        process.join(10)
+        self.assertEqual(cache.get("child"), {"pid": process.pid})
+
+
+class TestHotspotDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.calls = []
+        self.client = flask_app.app.test_client()
+        self.original_compute = flask_app.compute_hotspots
+
+        def fake_compute(pickup_time):
+            self.calls.append(pickup_time)
+            return {
+                "location_id": np.array([211]),
+                "pickup_zone": np.array(["SoHo"], dtype=object),
+                "predicted_trip_count": np.array([1.0])
+            }
+        flask_app.compute_hotspots = fake_compute
+        flask_app.hotspot_cache.clear()
+
+    def tearDown(self):
+        flask_app.compute_hotspots = self.original_compute
+        flask_app.hotspot_cache.clear()
+        self.tmp.cleanup()
+
+    def test_restarted_worker_is_served_from_disk(self):
+        cache = DiskCache(os.path.join(self.tmp.name, "predictions.db"))
+        with mock.patch.object(flask_app, "disk_cache", cache):
+            first = self.client.get("/hotspots", query_string={"time": "2025-07-11T10:00:00Z"})
+            # An empty in-process cache stands in for a new worker
+            flask_app.hotspot_cache.clear()
+            second = self.client.get("/hotspots", query_string={"time": "2025-07-11T10:30:00Z"})
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
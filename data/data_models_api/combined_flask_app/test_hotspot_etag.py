@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import flask_app
+from model_registry import ModelRegistry
+
+
+class TestHotspotConditionalGet(unittest.TestCase):
+
+    def setUp(self):
+        self.client = flask_app.app.test_client()
+        self.calls = []
+        self.original_compute = flask_app.compute_hotspots
+        flask_app.hotspot_cache.clear()
+
+        def fake_compute(pickup_time):
+            self.calls.append(pickup_time)
+            return {
+                "location_id": np.array([211]),
+                "pickup_zone": np.array(["SoHo"], dtype=object),
+                "predicted_trip_count": np.array([1.0])
+            }
+        flask_app.compute_hotspots = fake_compute
+
+    def tearDown(self):
+        flask_app.compute_hotspots = self.original_compute
+        flask_app.hotspot_cache.clear()
+
+    def get(self, time="2025-07-11T10:00:00Z", etag=None, **query):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get("/hotspots", query_string=dict(time=time, **query), headers=headers)
+
+    def test_matching_etag_gets_304_without_the_pipeline(self):
+        first = self.get()
+        etag = first.headers["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        flask_app.hotspot_cache.clear()
+
+        second = self.get(etag=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b"")
+        self.assertEqual(second.headers["ETag"], etag)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_same_hour_shares_the_etag_and_other_hours_do_not(self):
+        etag = self.get().headers["ETag"]
+        self.assertEqual(self.get(time="2025-07-11T10:45:00Z").headers["ETag"], etag)
+        self.assertEqual(self.get(time="2025-07-11T11:00:00Z", etag=etag).status_code, 200)
+
+    def test_encoding_options_are_part_of_the_etag(self):
+        etag = self.get().headers["ETag"]
+        self.assertEqual(self.get(etag=etag, format="columnar").status_code, 200)
+        self.assertEqual(self.get(etag=etag, top=5).status_code, 200)
+
+    def test_replaced_model_file_changes_the_etag(self):
+        with tempfile.NamedTemporaryFile() as model_file:
+            registry = ModelRegistry("hotspot", lambda month: open(model_file.name).read(),
+                                     lambda month: [model_file.name], check_interval=0)
+            model_file.write(b"model v1")
+            model_file.flush()
+            with mock.patch.object(flask_app, "hotspot_registry", registry):
+                etag = self.get().headers["ETag"]
+                # Touching the file without changing its bytes keeps the ETag
+                os.utime(model_file.name, ns=(0, 10**9))
+                self.assertEqual(self.get(etag=etag).status_code, 304)
+                model_file.write(b", retrained")
+                model_file.flush()
+                os.utime(model_file.name, ns=(0, 2 * 10**9))
+                response = self.get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        # The in-process cache entry of the old model is not reused either
+        self.assertEqual(len(self.calls), 2)
+
+    def test_cache_control_ends_at_the_next_hour(self):
+        response = self.get()
+        self.assertRegex(response.headers["Cache-Control"], r"^public, max-age=\d+$")
+        self.assertIn("Accept", response.headers["Vary"])
+        self.assertEqual(flask_app.seconds_to_next_hour(7200 + 600.25), 2999)
+        self.assertEqual(flask_app.seconds_to_next_hour(7200 + 3599.9), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
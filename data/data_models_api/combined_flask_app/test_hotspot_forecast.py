@@ -0,0 +1,64 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import flask_app
+import utils
+from benchmark_suite import build_lag_fixture
+
+
+class TestHotspotForecast(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        lag_path = build_lag_fixture(os.path.join(cls.tmp.name, "historical_lags.csv"))
+        cls.saved_lags = utils._lag_tables.get(utils.LAG_CSV_PATH)
+        utils._lag_tables[utils.LAG_CSV_PATH] = utils.LagTable.from_csv(lag_path)
+        cls.client = flask_app.app.test_client()
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.saved_lags is None:
+            utils._lag_tables.pop(utils.LAG_CSV_PATH, None)
+        else:
+            utils._lag_tables[utils.LAG_CSV_PATH] = cls.saved_lags
+        flask_app.hotspot_cache.clear()
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        flask_app.hotspot_cache.clear()
+
+    def test_matrix_matches_single_hour_predictions_across_months(self):
+        # 10 PM on July 31 in New York, so the last hours use the August model
+        response = self.client.get("/hotspots/forecast", query_string={"start": "2025-08-01T02:00:00Z", "hours": 4})
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["times"], ["2025-08-01T02:00:00Z", "2025-08-01T03:00:00Z", "2025-08-01T04:00:00Z", "2025-08-01T05:00:00Z"])
+        self.assertEqual(len(body["zones"]), len(body["location_ids"]))
+
+        for time_str, row in zip(body["times"], body["predicted_trip_count"]):
+            single = self.client.get("/hotspots", query_string={"time": time_str}).get_json()
+            # Some zone names share a location id, so compare sorted (id, count) pairs
+            expected = sorted((entry["location_id"], entry["predicted_trip_count"]) for entry in single)
+            actual = sorted(zip(body["location_ids"], row))
+            self.assertEqual([loc for loc, _ in actual], [loc for loc, _ in expected])
+            self.assertEqual([v for _, v in actual], [v for _, v in expected])
+
+    def test_months_without_a_model_are_null(self):
+        # 11 PM on January 31 in New York: one hour of January, then February
+        body = self.client.get("/hotspots/forecast", query_string={"start": "2025-02-01T04:00:00Z", "hours": 2}).get_json()
+        self.assertIsNone(body["predicted_trip_count"][0])
+        self.assertEqual(len(body["predicted_trip_count"][1]), len(body["zones"]))
+
+    def test_invalid_arguments(self):
+        for query in [{"start": "tomorrow"}, {"hours": "x"}, {"hours": 0}, {"hours": flask_app.HOTSPOT_FORECAST_MAX_HOURS + 1}]:
+            self.assertEqual(self.client.get("/hotspots/forecast", query_string=query).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
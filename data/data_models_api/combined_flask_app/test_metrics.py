@@ -0,0 +1,55 @@
+import unittest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import flask_app
+from metrics import RequestMetrics, render_metrics
+
+
+class TestRenderMetrics(unittest.TestCase):
+
+    def test_prometheus_text_format(self):
+        requests = RequestMetrics()
+        requests.record("GET", "/hotspots", 200, 0.003)
+        requests.record("GET", "/hotspots", 200, 0.02)
+        stages = {("hotspots", "predict"): {"buckets": [(0.005, 1), (float("inf"), 2)], "count": 2, "sum": 0.5}}
+        text = render_metrics(
+            requests, stages,
+            caches={"hotspot": {"hits": 3, "misses": 1, "evictions": 0, "size": 1, "hit_rate": 0.75}},
+            registries=[{"name": "scoring", "loads": 2, "reloads": 0, "evictions": 0, "size": 2, "memory_bytes": 1024}]
+        )
+        lines = text.splitlines()
+        self.assertIn('taximize_http_requests_total{method="GET",route="/hotspots",status="200"} 2', lines)
+        self.assertIn('taximize_http_request_duration_seconds_bucket{route="/hotspots",le="0.005"} 1', lines)
+        self.assertIn('taximize_stage_duration_seconds_bucket{pipeline="hotspots",stage="predict",le="+Inf"} 2', lines)
+        self.assertIn('taximize_stage_duration_seconds_count{pipeline="hotspots",stage="predict"} 2', lines)
+        self.assertIn('taximize_cache_hit_ratio{cache="hotspot"} 0.75', lines)
+        self.assertIn('taximize_model_loads_total{registry="scoring"} 2', lines)
+        self.assertIn("# TYPE taximize_stage_duration_seconds histogram", lines)
+
+    def test_label_values_are_escaped(self):
+        requests = RequestMetrics()
+        requests.record("GET", 'a"b\\c', 404, 0.001)
+        text = render_metrics(requests, {}, caches={}, registries=[])
+        self.assertIn('route="a\\"b\\\\c"', text)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+
+    def test_requests_are_counted_by_route(self):
+        client = flask_app.app.test_client()
+        client.get("/")
+        client.get("/no/such/path")
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        text = response.get_data(as_text=True)
+        self.assertIn('taximize_http_requests_total{method="GET",route="/",status="200"}', text)
+        self.assertIn('route="unmatched",status="404"', text)
+        self.assertIn('taximize_cache_hits_total{cache="hotspot"}', text)
+        self.assertIn('taximize_model_loads_total{registry="hotspot"}', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from micro_batcher import MicroBatcher
+
+
+class TestMicroBatcher(unittest.TestCase):
+
+    def run_concurrently(self, batcher, submissions):
+        with ThreadPoolExecutor(max_workers=len(submissions)) as pool:
+            return list(pool.map(lambda args: batcher.submit(*args), submissions))
+
+    def test_concurrent_items_are_grouped_and_fanned_back(self):
+        calls = []
+        lock = threading.Lock()
+
+        def process(group, items):
+            with lock:
+                calls.append((group, list(items)))
+            return [f"{group}:{item}" for item in items]
+
+        batcher = MicroBatcher(process, window_seconds=0.2, max_batch=100)
+        submissions = [("jul", i) for i in range(8)] + [("aug", i) for i in range(4)]
+        results = self.run_concurrently(batcher, submissions)
+
+        self.assertEqual(results, [f"{group}:{item}" for group, item in submissions])
+        self.assertEqual(sorted(group for group, _ in calls), ["aug", "jul"])
+        self.assertEqual({group: sorted(items) for group, items in calls}, {"jul": list(range(8)), "aug": list(range(4))})
+        self.assertEqual(batcher.stats()["batches"], 2)
+
+    def test_full_batch_runs_without_waiting_for_the_window(self):
+        sizes = []
+        batcher = MicroBatcher(lambda group, items: sizes.append(len(items)) or list(items), window_seconds=30, max_batch=4)
+        results = self.run_concurrently(batcher, [("jul", i) for i in range(4)])
+        self.assertEqual(sorted(results), [0, 1, 2, 3])
+        self.assertEqual(sizes, [4])
+
+    def test_lone_item_runs_after_the_window(self):
+        batcher = MicroBatcher(lambda group, items: [item * 2 for item in items], window_seconds=0.001)
+        self.assertEqual(batcher.submit("jul", 21), 42)
+        self.assertEqual(batcher.stats()["largest_batch"], 1)
+
+    def test_batch_failure_is_raised_to_every_caller(self):
+        def process(group, items):
+            raise FileNotFoundError("no model")
+
+        batcher = MicroBatcher(process, window_seconds=0.1)
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(batcher.submit, "jul", i) for i in range(3)]
+            for future in futures:
+                with self.assertRaises(FileNotFoundError):
+                    future.result()
+
+
+if __name__ == "__main__":
+    unittest.main()
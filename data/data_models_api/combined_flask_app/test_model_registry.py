@@ -0,0 +1,128 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import flask_app
+from model_registry import ModelRegistry, estimate_memory_bytes
+from reference_tables import ReferenceTables
+
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, key):
+        return os.path.join(self.tmp.name, f"{key}.txt")
+
+    def write(self, key, text, mtime=None):
+        with open(self.path(key), "w") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(self.path(key), (mtime, mtime))
+
+    def loader(self, key):
+        self.calls.append(key)
+        with open(self.path(key)) as f:
+            return f.read()
+
+    def registry(self, **kwargs):
+        return ModelRegistry("test", self.loader, lambda key: [self.path(key)], **kwargs)
+
+    def test_each_key_is_loaded_once(self):
+        self.write("jul", "a")
+        registry = self.registry()
+        self.assertEqual(registry.get("jul"), "a")
+        self.assertEqual(registry.get("jul"), "a")
+        self.assertEqual(self.calls, ["jul"])
+        entry = registry.stats()["entries"][0]
+        self.assertEqual(entry["key"], "jul")
+        self.assertGreaterEqual(entry["load_seconds"], 0)
+
+    def test_least_recently_used_month_is_evicted(self):
+        for key in ["jul", "aug", "sep"]:
+            self.write(key, key)
+        registry = self.registry(max_entries=2)
+        registry.get("jul")
+        registry.get("aug")
+        registry.get("jul")
+        registry.get("sep")
+        self.assertEqual(sorted(registry.keys()), ["jul", "sep"])
+        self.assertEqual(registry.stats()["evictions"], 1)
+
+    def test_changed_file_is_reloaded(self):
+        self.write("jul", "old", mtime=1_000_000)
+        reloaded = []
+        registry = self.registry(check_interval=0, on_reload=reloaded.append)
+        self.assertEqual(registry.get("jul"), "old")
+        self.write("jul", "new", mtime=2_000_000)
+        self.assertEqual(registry.get("jul"), "new")
+        self.assertEqual(reloaded, ["jul"])
+        self.assertEqual(registry.stats()["reloads"], 1)
+
+    def test_failed_reload_keeps_loaded_version(self):
+        self.write("jul", "old", mtime=1_000_000)
+        registry = self.registry(check_interval=0)
+        registry.get("jul")
+        os.remove(self.path("jul"))
+        self.assertEqual(registry.get("jul"), "old")
+
+    def test_preload_skips_missing_keys(self):
+        self.write("jul", "a")
+        registry = self.registry()
+        self.assertEqual(registry.preload(["jul", "missing"]), ["jul"])
+        self.assertIn("jul", registry)
+
+
+class TestEstimateMemoryBytes(unittest.TestCase):
+
+    def test_reference_tables_are_sized_from_their_arrays(self):
+        hotness_df = pd.DataFrame({
+            "dropoff_zone": ["SoHo", "JFK Airport"], "pickup_day_of_week": [0, 1],
+            "pickup_hour": [8, 9], "dropoff_zone_hotness": [1.5, 2.0]
+        })
+        duration_df = pd.DataFrame({
+            "pickup_zone": ["SoHo"], "dropoff_zone": ["JFK Airport"], "pickup_day_of_week": [0],
+            "pickup_hour": [8], "trip_duration_variability": [3.0]
+        })
+        tables = ReferenceTables(hotness_df, duration_df, {"SoHo": "Manhattan"})
+        expected = (
+            tables.hotness.nbytes + tables.duration_keys.nbytes + tables.duration_values.nbytes
+            + tables.zone_borough.nbytes + tables.zone_is_airport.nbytes
+            + int(tables.zones.memory_usage(deep=True))
+        )
+        with mock.patch("pickle.dumps", side_effect=AssertionError):
+            self.assertEqual(estimate_memory_bytes({"reference_tables": tables, "model": object()}), expected)
+
+
+class TestReadiness(unittest.TestCase):
+
+    def setUp(self):
+        self.client = flask_app.app.test_client()
+        self.original = (flask_app.MODEL_PRELOAD, flask_app.registry_warm)
+
+    def tearDown(self):
+        flask_app.MODEL_PRELOAD, flask_app.registry_warm = self.original
+
+    def test_not_ready_until_preloaded(self):
+        flask_app.MODEL_PRELOAD, flask_app.registry_warm = True, False
+        self.assertEqual(self.client.get("/ready").status_code, 503)
+        flask_app.registry_warm = True
+        self.assertEqual(self.client.get("/ready").status_code, 200)
+
+    def test_lazy_mode_is_always_ready(self):
+        flask_app.MODEL_PRELOAD, flask_app.registry_warm = False, False
+        self.assertTrue(self.client.get("/ready").get_json()["ready"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import flask_app
+from prediction_cache import PredictionCache
+
+
+class TestPredictionCache(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        cache = PredictionCache(maxsize=2, ttl_seconds=60)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", [1])
+        self.assertEqual(cache.get("a"), [1])
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (1, 1, 1))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = PredictionCache(maxsize=2, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertNotIn("b", cache)
+        self.assertIn("a", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_misses(self):
+        cache = PredictionCache(maxsize=2, ttl_seconds=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+
+class TestHotspotCaching(unittest.TestCase):
+
+    def setUp(self):
+        self.client = flask_app.app.test_client()
+        self.calls = []
+        self.original_compute = flask_app.compute_hotspots
+        flask_app.hotspot_cache.clear()
+
+        def fake_compute(pickup_time):
+            self.calls.append(pickup_time)
+            return {
+                "location_id": np.array([211]),
+                "pickup_zone": np.array(["SoHo"], dtype=object),
+                "predicted_trip_count": np.array([1.0])
+            }
+        flask_app.compute_hotspots = fake_compute
+
+    def tearDown(self):
+        flask_app.compute_hotspots = self.original_compute
+        flask_app.hotspot_cache.clear()
+
+    def test_same_hour_bucket_is_computed_once(self):
+        first = self.client.get("/hotspots", query_string={"time": "2025-07-11T10:00:00Z"})
+        second = self.client.get("/hotspots", query_string={"time": "2025-07-11T10:45:00Z"})
+        self.assertEqual(first.get_json(), second.get_json())
+        self.assertEqual(len(self.calls), 1)
+
+    def test_different_hours_are_cached_separately(self):
+        self.client.get("/hotspots", query_string={"time": "2025-07-11T10:00:00Z"})
+        self.client.get("/hotspots", query_string={"time": "2025-07-11T11:00:00Z"})
+        self.assertEqual(len(self.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
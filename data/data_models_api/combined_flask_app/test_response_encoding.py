@@ -0,0 +1,130 @@
+import unittest
+import io
+import json
+import os
+import sys
+
+import numpy as np
+from werkzeug.datastructures import MIMEAccept
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import flask_app
+from response_encoding import UnsupportedFormat, encode_columns, negotiate_format
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+COLUMNS = {
+    "location_id": np.array([4, 7]),
+    "pickup_zone": np.array(["SoHo", "Midtown Center"], dtype=object),
+    "predicted_trip_count": np.array([2.5, 1.0])
+}
+
+
+class TestNegotiateFormat(unittest.TestCase):
+
+    def test_format_argument_wins_over_accept(self):
+        accept = MIMEAccept([("application/msgpack", 1)])
+        self.assertEqual(negotiate_format("columnar", accept), "columnar")
+
+    def test_accept_header_selects_binary_formats(self):
+        self.assertEqual(negotiate_format(None, MIMEAccept([("application/x-msgpack", 1)])), "msgpack")
+        self.assertEqual(negotiate_format(None, MIMEAccept([("application/vnd.apache.arrow.stream", 1)])), "arrow")
+
+    def test_default_is_json(self):
+        self.assertEqual(negotiate_format(None, MIMEAccept([("*/*", 1)])), "json")
+        self.assertEqual(negotiate_format(None, MIMEAccept([("application/msgpack", 1)]), supported=("json",)), "json")
+
+    def test_unknown_format_is_rejected(self):
+        with self.assertRaises(UnsupportedFormat):
+            negotiate_format("xml", MIMEAccept())
+        with self.assertRaises(UnsupportedFormat):
+            negotiate_format("arrow", MIMEAccept(), supported=("json", "msgpack"))
+
+
+class TestEncodeColumns(unittest.TestCase):
+
+    def test_json_rows_and_columnar_arrays(self):
+        rows, mimetype = encode_columns(COLUMNS, "json")
+        self.assertEqual(mimetype, "application/json")
+        self.assertEqual(json.loads(rows), [
+            {"location_id": 4, "pickup_zone": "SoHo", "predicted_trip_count": 2.5},
+            {"location_id": 7, "pickup_zone": "Midtown Center", "predicted_trip_count": 1.0}
+        ])
+        columnar, _ = encode_columns(COLUMNS, "columnar")
+        self.assertEqual(json.loads(columnar), {name: values.tolist() for name, values in COLUMNS.items()})
+
+    @unittest.skipUnless(msgpack, "msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        body, mimetype = encode_columns(COLUMNS, "msgpack")
+        self.assertEqual(mimetype, "application/msgpack")
+        self.assertEqual(msgpack.unpackb(body), {name: values.tolist() for name, values in COLUMNS.items()})
+
+    @unittest.skipUnless(pyarrow, "pyarrow is not installed")
+    def test_arrow_round_trip(self):
+        body, _ = encode_columns(COLUMNS, "arrow")
+        table = pyarrow.ipc.open_stream(io.BytesIO(body)).read_all()
+        self.assertEqual(table.to_pydict(), {name: values.tolist() for name, values in COLUMNS.items()})
+
+    @unittest.skipIf(msgpack, "msgpack is installed")
+    def test_missing_encoder_library_is_unsupported(self):
+        with self.assertRaises(UnsupportedFormat):
+            encode_columns(COLUMNS, "msgpack")
+
+
+class TestHotspotFormats(unittest.TestCase):
+
+    def setUp(self):
+        self.client = flask_app.app.test_client()
+        self.original_compute = flask_app.compute_hotspots
+        flask_app.hotspot_cache.clear()
+        counts = np.array([3.0, 9.0, 1.0, 9.0, 5.0])
+        flask_app.compute_hotspots = lambda pickup_time: {
+            "location_id": np.arange(1, 6),
+            "pickup_zone": np.array([f"Zone {i}" for i in range(1, 6)], dtype=object),
+            "predicted_trip_count": counts
+        }
+
+    def tearDown(self):
+        flask_app.compute_hotspots = self.original_compute
+        flask_app.hotspot_cache.clear()
+
+    def get(self, **query):
+        return self.client.get("/hotspots", query_string=dict(time="2025-07-11T10:00:00Z", **query))
+
+    def test_default_response_is_sorted_rows(self):
+        body = self.get().get_json()
+        self.assertEqual([row["location_id"] for row in body], [2, 4, 5, 1, 3])
+        self.assertEqual(body[0], {"location_id": 2, "pickup_zone": "Zone 2", "predicted_trip_count": 9.0})
+
+    def test_top_k_matches_the_head_of_the_full_order(self):
+        body = self.get(top=3, format="columnar").get_json()
+        self.assertEqual(body["location_id"], [2, 4, 5])
+        self.assertEqual(body["predicted_trip_count"], [9.0, 9.0, 5.0])
+        self.assertEqual(len(self.get(top=100).get_json()), 5)
+
+    def test_top_k_with_ties_at_the_cutoff(self):
+        counts = np.array([5, 1, 5, 5, 2, 5, 0, 5, 3, 5], dtype=float)
+        self.assertEqual(flask_app.hotspot_order(counts, 4).tolist(), [0, 2, 3, 5])
+        rng = np.random.default_rng(0)
+        for _ in range(50):
+            counts = rng.integers(0, 4, size=30).astype(float)
+            full = flask_app.hotspot_order(counts)
+            for top in range(1, 30):
+                np.testing.assert_array_equal(flask_app.hotspot_order(counts, top), full[:top])
+
+    def test_invalid_top_and_format(self):
+        self.assertEqual(self.get(top=0).status_code, 400)
+        self.assertEqual(self.get(top="x").status_code, 400)
+        self.assertEqual(self.get(format="xml").status_code, 406)
+
+
+if __name__ == "__main__":
+    unittest.main()
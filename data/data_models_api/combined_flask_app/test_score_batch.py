@@ -0,0 +1,49 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import benchmark_suite
+import flask_app
+import stage_timing
+
+
+class TestScoreBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fixtures = benchmark_suite.Fixtures(self.tmp.name, duration_rows=2000)
+        self.client = flask_app.app.test_client()
+        self.trip = dict(zip(["pickup_zone", "dropoff_zone", "pickup_datetime"], benchmark_suite.FIXTURE_TRIP))
+
+    def tearDown(self):
+        self.fixtures.restore()
+        self.tmp.cleanup()
+
+    def test_month_without_models_only_fails_its_trips(self):
+        january = dict(self.trip, pickup_datetime="01/14/2025 10:00:00 AM")
+        response = self.client.post("/score_xgb/batch", json={"trips": [self.trip, january]})
+        self.assertEqual(response.status_code, 200)
+        scored, failed = response.get_json()["results"]
+        self.assertIn("final_score", scored)
+        self.assertIn("jan", failed["error"])
+
+    def test_oversized_batch_is_rejected(self):
+        with mock.patch.object(flask_app, "SCORE_BATCH_MAX_TRIPS", 2):
+            response = self.client.post("/score_xgb/batch", json={"trips": [self.trip] * 3})
+        self.assertEqual(response.status_code, 413)
+
+    def test_micro_batched_requests_time_model_load_once(self):
+        stage_timing.reset()
+        with mock.patch.object(flask_app, "SCORE_MICROBATCH", True):
+            response = self.client.post("/score_xgb", json=self.trip)
+        self.assertEqual(response.status_code, 200)
+        stages = stage_timing.stage_histograms()
+        self.assertEqual(stages[("score_trip", "model_load")]["count"], 1)
+        self.assertEqual(stages[("score_trips", "model_load")]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
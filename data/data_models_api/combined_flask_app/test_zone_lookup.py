@@ -0,0 +1,147 @@
+import unittest
+import os
+import sys
+import tempfile
+import csv
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import flask_app
+from process_zones_complete import check_point_in_zone, process_zone_row
+from zone_index import DEFAULT_CSV_PATH, ZoneIndex
+from zone_raster import ZoneRaster, build_zone_raster, save_zone_raster, validate_zone_raster
+
+
+def processed_polygons(geometry):
+    parts = geometry.geoms if geometry.geom_type == "MultiPolygon" else [geometry]
+    return [
+        {"exterior": [list(c) for c in part.exterior.coords], "holes": [[list(c) for c in ring.coords] for ring in part.interiors]}
+        for part in parts
+    ]
+
+
+class TestZoneIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = flask_app.get_zone_index()
+
+    def test_known_locations(self):
+        self.assertEqual(self.index.lookup_point(40.6396, -73.7828)["zone"], "JFK Airport")
+        self.assertEqual(self.index.lookup_point(40.7829, -73.9654)["zone"], "Central Park")
+        self.assertIsNone(self.index.lookup_point(39.9526, -75.1652))
+
+    def test_matches_linear_scan(self):
+        rng = np.random.default_rng(0)
+        lats = rng.uniform(40.49, 40.92, 100)
+        lons = rng.uniform(-74.26, -73.70, 100)
+        positions = self.index.lookup(lats, lons)
+
+        zones = [processed_polygons(g) for g in self.index.geometries]
+        for lat, lon, position in zip(lats, lons, positions):
+            expected = next((k for k, polygons in enumerate(zones) if check_point_in_zone(lat, lon, polygons)), -1)
+            self.assertEqual(position, expected)
+
+    def test_empty_input(self):
+        self.assertEqual(len(self.index.lookup([], [])), 0)
+
+
+class TestZonePreprocessing(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        with open(DEFAULT_CSV_PATH) as f:
+            cls.row = next(row for row in csv.DictReader(f) if row["zone"] == "JFK Airport")
+
+    def test_vectorized_conversion_matches_index(self):
+        zone = process_zone_row(self.row)
+        index = flask_app.get_zone_index()
+        position = list(index.names).index("JFK Airport")
+        converted = ZoneIndex.from_processed([zone]).geometries[0]
+        self.assertTrue(converted.equals_exact(index.geometries[position], 1e-9))
+
+    def test_simplification_drops_vertices(self):
+        full = process_zone_row(self.row)
+        simplified = process_zone_row(self.row, simplify_tolerance=20.0)
+        count = lambda zone: sum(len(p["exterior"]) for p in zone["polygons"])
+        self.assertLess(count(simplified), count(full))
+
+    def test_binary_round_trip(self):
+        index = flask_app.get_zone_index()
+        with tempfile.TemporaryDirectory() as tmp:
+            loaded = ZoneIndex.from_npz(index.save(os.path.join(tmp, "zones.npz")))
+        self.assertEqual(list(loaded.names), list(index.names))
+        self.assertTrue(all(a.equals(b) for a, b in zip(loaded.geometries, index.geometries)))
+
+
+class TestZoneRaster(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.index = flask_app.get_zone_index()
+        # Coarse cells keep the build fast; exactness does not depend on the cell size
+        cls.tmp = tempfile.TemporaryDirectory()
+        save_zone_raster(*build_zone_raster(cls.index, cell_meters=200), cls.tmp.name)
+        cls.raster = ZoneRaster.load(cls.tmp.name, cls.index)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_matches_exact_lookup(self):
+        report = validate_zone_raster(self.raster, self.index, n_points=50000)
+        self.assertEqual(report["mismatches"], 0)
+
+    def test_raster_is_memory_mapped_uint16(self):
+        self.assertEqual(self.raster.raster.dtype, "uint16")
+        self.assertIsNotNone(getattr(self.raster.raster, "filename", None))
+        self.assertEqual(self.raster.lookup_point(40.6396, -73.7828), 132)
+        self.assertEqual(self.raster.lookup_point(39.9526, -75.1652), 0)
+
+
+class TestZoneLookupEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.client = flask_app.app.test_client()
+
+    def test_single_point(self):
+        response = self.client.get("/zone_lookup", query_string={"lat": 40.6396, "lng": -73.7828})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["location_id"], 132)
+        response = self.client.get("/zone_lookup", query_string={"lat": 39.9526, "lng": -75.1652})
+        self.assertEqual(response.status_code, 404)
+
+    def test_many_points(self):
+        response = self.client.post("/zone_lookup", json={"points": [
+            {"lat": 40.6396, "lng": -73.7828}, {"lat": 39.9526, "lng": -75.1652}
+        ]})
+        results = response.get_json()["results"]
+        self.assertEqual(results[0]["zone"], "JFK Airport")
+        self.assertIsNone(results[1])
+
+    def test_trip_coordinates_resolve_to_zones(self):
+        trips = [
+            {"pickup_lat": 40.6396, "pickup_lng": -73.7828, "dropoff_zone": "SoHo"},
+            {"pickup_lat": 39.9526, "pickup_lng": -75.1652, "dropoff_zone": "SoHo"},
+            {"pickup_lat": "north", "pickup_lng": 0, "dropoff_zone": "SoHo"},
+        ]
+        errors = flask_app.resolve_trip_zones(trips)
+        self.assertEqual(trips[0]["pickup_zone"], "JFK Airport")
+        self.assertIsNone(errors[0])
+        self.assertIsNotNone(errors[1])
+        self.assertIsNotNone(errors[2])
+
+    def test_zone_index_failure_is_a_json_error(self):
+        trip = {"pickup_lat": 40.6396, "pickup_lng": -73.7828, "dropoff_zone": "SoHo",
+                "pickup_datetime": "07/14/2025 10:00:00 AM"}
+        with mock.patch.object(flask_app, "get_zone_index", side_effect=FileNotFoundError("zone_coordinates.csv")):
+            for route in ("/score_xgb", "/score_lgbm"):
+                response = self.client.post(route, json=trip)
+                self.assertEqual(response.status_code, 500)
+                self.assertIn("zone_coordinates.csv", response.get_json()["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Micro-benchmark for hotspot feature generation: the original per-zone
+build_feature_row loop against the columnar builder.
+
+Usage:
+    python benchmark_features.py [--repeat 20]
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timedelta
+
+from pytz import timezone
+
+from rowwise_features import rowwise_features
+from utils import generate_features_for_time, generate_features_for_times
+
+NYC = timezone("America/New_York")
+
+
+def best_ms(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hotspot feature generation")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pickup_time = NYC.localize(datetime(2025, 7, 11, 6))
+    day = [pickup_time + timedelta(hours=h) for h in range(24)]
+
+    rowwise = best_ms(lambda: rowwise_features(pickup_time), args.repeat)
+    columnar = best_ms(lambda: generate_features_for_time(pickup_time), args.repeat)
+    rowwise_day = best_ms(lambda: [rowwise_features(t) for t in day], max(1, args.repeat // 10))
+    columnar_day = best_ms(lambda: generate_features_for_times(day), args.repeat)
+
+    print(f"1 hour   rowwise: {rowwise:8.2f} ms   columnar: {columnar:8.2f} ms   speed-up: {rowwise / columnar:5.1f}x")
+    print(f"24 hours rowwise: {rowwise_day:8.2f} ms   columnar: {columnar_day:8.2f} ms   speed-up: {rowwise_day / columnar_day:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
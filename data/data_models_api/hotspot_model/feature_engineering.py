@@ -1,10 +1,14 @@
 from datetime import datetime
+import hashlib
+import logging
 import holidays
 import pandas as pd
 import joblib
 import os
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 # Load allowed features from training time
 try:
     allowed_features = joblib.load("model_features.pkl")
@@ -35,6 +39,129 @@ def load_poi_dict(csv_path):
     poi_df_filtered = poi_df[['zone'] + list(numeric_cols)]
     return poi_df_filtered.set_index("zone").T.to_dict()
 
+TIME_OF_DAY_CODES = {
+    'Early Morning': 0,
+    'Morning Rush': 1,
+    'Midday': 2,
+    'Evening Rush': 3,
+    'Night': 4
+}
+
+def build_poi_matrix(poi_dict, zone_names):
+    """
+    Stacks poi_dict into a (zone, poi) float matrix aligned with zone_names.
+    Zones without POI data get a row of NaN, which is what a DataFrame built
+    from build_feature_row dicts holds for their missing POI columns.
+
+    Returns:
+        tuple: (list of POI column names, matrix)
+    """
+    zone_names = list(zone_names)
+    has_pois = np.array([bool(poi_dict) and zone in poi_dict for zone in zone_names], dtype=bool)
+    if not has_pois.any():
+        return [], np.empty((len(zone_names), 0))
+
+    poi_columns = list(poi_dict[zone_names[int(np.argmax(has_pois))]].keys())
+    matrix = np.full((len(zone_names), len(poi_columns)), np.nan)
+    for i, zone in enumerate(zone_names):
+        if has_pois[i]:
+            pois = poi_dict[zone]
+            matrix[i] = [pois.get(col, np.nan) for col in poi_columns]
+    return poi_columns, matrix
+
+def build_feature_frame(zone_names, zone_ids, pickup_datetimes, poi_columns, poi_matrix):
+    """
+    Columnar equivalent of build_feature_row for every (pickup_datetime, zone) pair,
+    plus the zoneID column generate_features_for_time adds.
+
+    Rows are ordered by datetime, then zone. The result has the same columns and
+    values as concatenating one DataFrame of build_feature_row dicts per datetime.
+
+    Args:
+        zone_names (array-like): Zone names, one per row of poi_matrix.
+        zone_ids (array-like): Zone IDs aligned with zone_names.
+        pickup_datetimes (list): Datetimes to build features for.
+        poi_columns, poi_matrix: Output of build_poi_matrix.
+    """
+    zone_names = np.asarray(zone_names, dtype=object)
+    n_zones = len(zone_names)
+    n_times = len(pickup_datetimes)
+
+    # Per-datetime scalars, repeated over zones
+    months, hours, days, weekends, holiday_flags, times_of_day = [], [], [], [], [], []
+    for pickup_datetime in pickup_datetimes:
+        months.append(pickup_datetime.month)
+        hours.append(pickup_datetime.hour)
+        days.append(pickup_datetime.weekday())
+        weekends.append(int(pickup_datetime.weekday() >= 5))
+        holiday_flags.append(int(is_us_holiday(pickup_datetime)))
+        times_of_day.append(get_time_of_day(pickup_datetime.hour))
+
+    def per_row(values):
+        return np.repeat(np.asarray(values), n_zones)
+
+    is_weekend = per_row(weekends)
+    time_of_day = per_row(np.array(times_of_day, dtype=object))
+    zones = np.tile(zone_names, n_times)
+
+    columns = {
+        "pickup_month": per_row(months).astype(float),
+        "pickup_hour": per_row(hours).astype(float),
+        "pickup_day_of_week": per_row(days).astype(float),
+        "is_weekend": is_weekend.astype(float),
+        "time_of_day_encoded": per_row([float(TIME_OF_DAY_CODES.get(t, -1)) for t in times_of_day])
+    }
+
+    # POI features, the time-of-day column name depends on the datetime. Columns for
+    # times of day after the first one are appended at the end, like pd.concat does.
+    tod_order = list(dict.fromkeys(times_of_day))
+    pois = np.tile(poi_matrix, (n_times, 1))
+    def poi_x_time_of_day(j, tod):
+        return np.where(time_of_day == tod, pois[:, j], np.nan)
+
+    for j, poi_type in enumerate(poi_columns):
+        density = pois[:, j]
+        columns[f"{poi_type}"] = density
+        columns[f"{poi_type}_x_isweekend"] = density * is_weekend
+        if tod_order:
+            columns[f"{poi_type}_x_{tod_order[0].replace(' ', '_')}"] = poi_x_time_of_day(j, tod_order[0])
+    late_columns = {}
+    for tod in tod_order[1:]:
+        for j, poi_type in enumerate(poi_columns):
+            late_columns[f"{poi_type}_x_{tod.replace(' ', '_')}"] = poi_x_time_of_day(j, tod)
+    if "nightlife_density_per_sq_mile" in poi_columns and "hotel_density_per_sq_mile" in poi_columns:
+        columns["nightlife_x_hotels"] = (
+            pois[:, poi_columns.index("nightlife_density_per_sq_mile")] *
+            pois[:, poi_columns.index("hotel_density_per_sq_mile")]
+        )
+    if "restaurant_density_per_sq_mile" in poi_columns and "tourism_density_per_sq_mile" in poi_columns:
+        columns["restaurants_x_tourism"] = (
+            pois[:, poi_columns.index("restaurant_density_per_sq_mile")] *
+            pois[:, poi_columns.index("tourism_density_per_sq_mile")]
+        )
+
+    # Raw categorical features for target encoding
+    hour_str = per_row([str(h) for h in hours]).astype(object)
+    day_str = per_row([str(d) for d in days]).astype(object)
+    weekend_str = is_weekend.astype(str).astype(object)
+    holiday_str = per_row([str(h) for h in holiday_flags]).astype(object)
+    tod_str = time_of_day.astype(object)
+    columns.update({
+        "pickup_zone": zones,
+        "day_time_interaction": day_str + "_" + tod_str,
+        "holiday_time_interaction": holiday_str + "_" + tod_str,
+        "zone_hour_interaction": zones + "_" + hour_str,
+        "zone_isweekend_interaction": zones + "_" + weekend_str,
+        "hour_isweekend_interaction": hour_str + "_" + weekend_str,
+        "zone_time_isweekend_interaction": zones + "_" + tod_str + "_" + weekend_str,
+        "zone_hour_isweekend_interaction": zones + "_" + hour_str + "_" + weekend_str,
+        "zone_hour_holiday_interaction": zones + "_" + hour_str + "_" + holiday_str
+    })
+    columns["zoneID"] = np.tile(np.asarray(zone_ids), n_times)
+    columns.update(late_columns)
+
+    return pd.DataFrame(columns)
+
 def build_feature_row(pickup_zone, pickup_datetime, poi_dict=None):
     pickup_month = pickup_datetime.month  
     is_holiday = is_us_holiday(pickup_datetime)
@@ -112,38 +239,188 @@ def generate_features_for_time(pickup_datetime, poi_dict=None, zone_list_path="z
 
     return df
 
-def apply_target_encoding(feature_df, encoding_dir="encoding_maps"):
-    for filename in os.listdir(encoding_dir):
-        if filename.endswith("_target_encoding.pkl"):
-            col_name = filename.replace("_target_encoding.pkl", "")
-            mapping = joblib.load(os.path.join(encoding_dir, filename))
-            encoded_col = f"{col_name}_target_encoded"
-            feature_df[encoded_col] = feature_df[col_name].map(mapping)
-            feature_df[encoded_col] = feature_df[encoded_col].fillna(np.mean(list(mapping.values())))
-
-    # Drop the raw object categorical features
-    raw_cols = [
-        "pickup_zone", "day_time_interaction", "holiday_time_interaction",
-        "zone_hour_interaction", "zone_isweekend_interaction", "hour_isweekend_interaction",
-        "zone_time_isweekend_interaction", "zone_hour_isweekend_interaction",
-        "zone_hour_holiday_interaction"
-    ]
-    feature_df = feature_df.drop(columns=[col for col in raw_cols if col in feature_df.columns], errors="ignore")
-    
-    # Ensure feature_df has only the allowed features
-    if allowed_features:
-        # We include 'zoneID' if needed for response formatting
-        allowed_cols = allowed_features + ["zoneID"]
-        feature_df = feature_df[[col for col in allowed_cols if col in feature_df.columns]]
+RAW_CATEGORICAL_COLUMNS = [
+    "pickup_zone", "day_time_interaction", "holiday_time_interaction",
+    "zone_hour_interaction", "zone_isweekend_interaction", "hour_isweekend_interaction",
+    "zone_time_isweekend_interaction", "zone_hour_isweekend_interaction",
+    "zone_hour_holiday_interaction"
+]
+
+def default_feature_list_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_features.pkl")
+
+def _join_strings(values):
+    return np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8)
 
-    return feature_df
+def _split_strings(buffer):
+    text = buffer.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+class TargetEncoder:
+    """
+    Every *_target_encoding.pkl map and the model feature list compiled into
+    integer-coded category vocabularies, encoded value arrays and precomputed
+    fill values. Persisted as a single .npz so a request does no directory
+    listing, no per-map joblib.load and no np.mean over the map values. The
+    .npz records the source_digest of the pickles it was compiled from.
+    """
+
+    def __init__(self, encodings, model_features, source_digest=None):
+        # encodings: {column: (categories, encoded values, default)}
+        self.encodings = {}
+        for col_name, (categories, values, default) in sorted(encodings.items()):
+            self.encodings[col_name] = (
+                pd.Index(list(categories), dtype=object),
+                np.asarray(values, dtype=np.float64),
+                float(default)
+            )
+        self.model_features = list(model_features)
+        self.source_digest = source_digest
+
+    @classmethod
+    def from_pickles(cls, encoding_dir, feature_list_path=None):
+        encodings = {}
+        for filename in os.listdir(encoding_dir):
+            if filename.endswith("_target_encoding.pkl"):
+                col_name = filename.replace("_target_encoding.pkl", "")
+                mapping = joblib.load(os.path.join(encoding_dir, filename))
+                encodings[col_name] = (list(mapping.keys()), list(mapping.values()), np.mean(list(mapping.values())))
+        model_features = joblib.load(feature_list_path or default_feature_list_path())
+        return cls(encodings, model_features)
+
+    def save(self, path):
+        arrays = {
+            "model_features": _join_strings(self.model_features),
+            "source_digest": _join_strings([self.source_digest or ""])
+        }
+        for col_name, (categories, values, default) in self.encodings.items():
+            arrays[f"categories__{col_name}"] = _join_strings([str(c) for c in categories])
+            arrays[f"values__{col_name}"] = values
+            arrays[f"default__{col_name}"] = np.array([default])
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            encodings = {}
+            for key in data.files:
+                if key.startswith("categories__"):
+                    col_name = key[len("categories__"):]
+                    encodings[col_name] = (
+                        _split_strings(data[key]),
+                        data[f"values__{col_name}"],
+                        data[f"default__{col_name}"][0]
+                    )
+            source_digest = _split_strings(data["source_digest"]) if "source_digest" in data.files else []
+            return cls(encodings, _split_strings(data["model_features"]), source_digest[0] if source_digest else None)
+
+    def encode(self, col_name, values):
+        """
+        Encoded values for one raw categorical column, the map mean where the category is unknown.
+        """
+        categories, encoded, default = self.encodings[col_name]
+        codes = categories.get_indexer(pd.Index(values, dtype=object))
+        result = np.where(codes >= 0, encoded[np.maximum(codes, 0)], np.nan)
+        return np.where(np.isnan(result), default, result)
+
+    def transform(self, feature_df):
+        """
+        Same output as apply_target_encoding.
+        """
+        for col_name in self.encodings:
+            feature_df[f"{col_name}_target_encoded"] = self.encode(col_name, feature_df[col_name])
+
+        # Drop the raw object categorical features
+        feature_df = feature_df.drop(columns=[col for col in RAW_CATEGORICAL_COLUMNS if col in feature_df.columns], errors="ignore")
+
+        # Ensure feature_df has only the allowed features
+        if allowed_features:
+            allowed_cols = allowed_features + ["zoneID"]
+            feature_df = feature_df[[col for col in allowed_cols if col in feature_df.columns]]
+        return feature_df
+
+    def align(self, feature_df):
+        """
+        Same output as align_with_model_features.
+        """
+        for col in self.model_features:
+            if col not in feature_df.columns:
+                feature_df[col] = 0.0
+        return feature_df[self.model_features]
+
+    def transform_and_align(self, feature_df):
+        """
+        apply_target_encoding followed by align_with_model_features in one pass:
+        builds the model input directly in model feature order.
+        """
+        columns = {}
+        for col in self.model_features:
+            if col.endswith("_target_encoded") and col[:-len("_target_encoded")] in self.encodings:
+                columns[col] = self.encode(col[:-len("_target_encoded")], feature_df[col[:-len("_target_encoded")]])
+            elif col in feature_df.columns:
+                columns[col] = feature_df[col].to_numpy()
+            else:
+                columns[col] = np.zeros(len(feature_df))
+        return pd.DataFrame(columns, index=feature_df.index)
+
+def source_digest(paths):
+    """
+    sha256 over the names and bytes of the files a TargetEncoder is compiled from.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(paths, key=os.path.basename):
+        digest.update(os.path.basename(path).encode("utf-8") + b"\n")
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+# Compiled encoders, loaded once per encoding directory
+_target_encoders = {}
+
+def get_target_encoder(encoding_dir, feature_list_path=None):
+    """
+    Returns the compiled TargetEncoder for an encoding directory. Uses the
+    target_encoder.npz next to the directory when it was compiled from pickles
+    with the same content, otherwise compiles it from the pickles and saves
+    it. The .npz is a build artifact: a fresh checkout compiles it on first use.
+    """
+    key = (encoding_dir, feature_list_path)
+    if key in _target_encoders:
+        return _target_encoders[key]
+
+    compiled_path = os.path.join(os.path.dirname(os.path.abspath(encoding_dir)), "target_encoder.npz")
+    sources = [os.path.join(encoding_dir, f) for f in os.listdir(encoding_dir) if f.endswith("_target_encoding.pkl")]
+    sources.append(feature_list_path or default_feature_list_path())
+    digest = source_digest(sources)
+
+    encoder = None
+    if os.path.exists(compiled_path):
+        try:
+            encoder = TargetEncoder.load(compiled_path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Could not read compiled target encoder %s, rebuilding it: %s", compiled_path, e)
+        if encoder is not None and encoder.source_digest != digest:
+            encoder = None
+    if encoder is None:
+        encoder = TargetEncoder.from_pickles(encoding_dir, feature_list_path)
+        encoder.source_digest = digest
+        try:
+            encoder.save(compiled_path)
+        except OSError as e:
+            logger.warning("Could not save compiled target encoder to %s: %s", compiled_path, e)
+
+    _target_encoders[key] = encoder
+    return encoder
+
+def apply_target_encoding(feature_df, encoding_dir="encoding_maps"):
+    return get_target_encoder(encoding_dir).transform(feature_df)
 
 def align_with_model_features(feature_df, feature_list_path=None):
     if feature_list_path is None:
-        feature_list_path = os.path.join(os.path.dirname(__file__), "model_features.pkl")
+        feature_list_path = default_feature_list_path()
 
     try:
-        allowed_features = joblib.load(feature_list_path)
+        allowed_features = _load_feature_list(feature_list_path)
     except Exception as e:
         raise ValueError(f"Could not load model_features.pkl: {e}")
 
@@ -153,6 +430,10 @@ def align_with_model_features(feature_df, feature_list_path=None):
 
     return feature_df[allowed_features]
 
+# Model feature lists, loaded once per path
+_feature_lists = {}
 
-
-
+def _load_feature_list(feature_list_path):
+    if feature_list_path not in _feature_lists:
+        _feature_lists[feature_list_path] = joblib.load(feature_list_path)
+    return _feature_lists[feature_list_path]
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+# Historical lags are 2023 counts, requests are mapped onto that year
+LAG_REFERENCE_YEAR = 2023
+DAYS_PER_YEAR = 366
+HOURS_PER_DAY = 24
+
+
+class LagTable:
+    """
+    Historical zone-level trip counts indexed as a (day_of_year, hour, zone) array.
+
+    Built once from historical_lags.csv so lag and rolling-average features are
+    fetched by direct indexing instead of filtering the whole file per request.
+    Cells with no historical row are NaN.
+    """
+
+    def __init__(self, lag_df):
+        lag_df = lag_df.copy()
+        lag_df["pickup_date"] = pd.to_datetime(lag_df["pickup_date"])
+        lag_df = lag_df[lag_df["pickup_date"].dt.year == LAG_REFERENCE_YEAR]
+        # Later rows win, like set_index(...).to_dict() did on duplicates
+        lag_df = lag_df.drop_duplicates(subset=["pickup_date", "pickup_hour", "pickup_zone"], keep="last")
+
+        self.zones = pd.Index(sorted(lag_df["pickup_zone"].astype(str).unique()))
+        self.counts = np.full((DAYS_PER_YEAR, HOURS_PER_DAY, len(self.zones)), np.nan, dtype=np.float32)
+        self.counts[
+            lag_df["pickup_date"].dt.dayofyear.to_numpy() - 1,
+            lag_df["pickup_hour"].to_numpy(dtype=np.int64),
+            self.zones.get_indexer(lag_df["pickup_zone"].astype(str)),
+        ] = lag_df["trip_count"].to_numpy(dtype=np.float32)
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(pd.read_csv(path))
+
+    @staticmethod
+    def day_index(pickup_time):
+        return pickup_time.replace(year=LAG_REFERENCE_YEAR).timetuple().tm_yday - 1
+
+    def hour_counts(self, pickup_time, lag):
+        """
+        Counts for every zone `lag` hours before pickup_time on the 2023 reference
+        date. As before, the hour wraps around midnight on the same date.
+        """
+        return self.counts[self.day_index(pickup_time), (pickup_time.hour - lag) % HOURS_PER_DAY]
+
+    def lag_features(self, pickup_time, zones, lag_hours_list=(1, 2), rolling_windows=(2,)):
+        """
+        Lag and rolling-average features aligned with `zones`, 0 where there is no history.
+
+        Args:
+            pickup_time (datetime): Target prediction datetime.
+            zones (array-like): Zone names to return values for.
+            lag_hours_list (list): Lags to return as trip_count_{lag}h_ago.
+            rolling_windows (list): Windows w to return as rolling_avg_{w}h,
+                the mean of the counts 1..w hours ago.
+
+        Returns:
+            dict: Feature name -> float64 array with one value per zone
+        """
+        return self.lag_features_for_times([pickup_time], zones, lag_hours_list, rolling_windows)
+
+    def lag_features_for_times(self, pickup_times, zones, lag_hours_list=(1, 2), rolling_windows=(2,)):
+        """
+        lag_features for every (pickup_time, zone) pair with one gather per lag.
+        Values are ordered by time, then zone, like generate_features_for_times.
+
+        Returns:
+            dict: Feature name -> float64 array of len(pickup_times) * len(zones)
+        """
+        codes = self.zones.get_indexer(pd.Index(zones, dtype=object))
+        known = codes >= 0
+        days = np.array([self.day_index(t) for t in pickup_times], dtype=np.int64)[:, None]
+        hours = np.array([t.hour for t in pickup_times], dtype=np.int64)[:, None]
+
+        needed = set(lag_hours_list)
+        for window in rolling_windows:
+            needed.update(range(1, window + 1))
+
+        per_lag = {}
+        for lag in sorted(needed):
+            values = self.counts[days, (hours - lag) % HOURS_PER_DAY, np.maximum(codes, 0)[None, :]]
+            values = np.where(known[None, :], values, np.nan)
+            per_lag[lag] = np.nan_to_num(values.astype(np.float64)).ravel()
+
+        features = {f"trip_count_{lag}h_ago": per_lag[lag] for lag in lag_hours_list}
+        for window in rolling_windows:
+            features[f"rolling_avg_{window}h"] = sum(per_lag[lag] for lag in range(1, window + 1)) / window
+        return features
+
+    def lag_dicts(self, pickup_time, lag_hours_list=(1, 2), rolling_windows=(2,)):
+        """
+        Same features as lag_features in the {feature: {pickup_zone: value}} form
+        returned by get_multiple_proxy_lags. A zone only appears in a lag dict if
+        it has a historical row for that hour, and in a rolling-average dict if
+        it has one for any hour of the window.
+        """
+        lag_dicts = {}
+        present = {}
+        for lag in set(lag_hours_list).union(*[range(1, w + 1) for w in rolling_windows]):
+            counts = self.hour_counts(pickup_time, lag)
+            present[lag] = {
+                zone: int(count) for zone, count in zip(self.zones, counts) if not np.isnan(count)
+            }
+
+        for lag in lag_hours_list:
+            lag_dicts[f"trip_count_{lag}h_ago"] = present[lag]
+
+        for window in rolling_windows:
+            lags = range(1, window + 1)
+            all_zones = set().union(*[present[lag].keys() for lag in lags])
+            lag_dicts[f"rolling_avg_{window}h"] = {
+                zone: sum(present[lag].get(zone, 0) for lag in lags) / window for zone in all_zones
+            }
+        return lag_dicts
@@ -0,0 +1,27 @@
+# rowwise_features.py
+"""
+The original per-zone feature builder, kept as the reference the columnar
+generate_features_for_time is tested and benchmarked against.
+"""
+
+import pandas as pd
+
+from feature_engineering import build_feature_row
+from utils import poi_dict, zone_lookup_df
+
+
+def rowwise_features(pickup_datetime):
+    """
+    The original per-zone implementation of generate_features_for_time.
+    """
+    all_rows = []
+    for _, row in zone_lookup_df.iterrows():
+        features = build_feature_row(
+            pickup_zone=row["zone"],
+            pickup_datetime=pickup_datetime,
+            poi_dict=poi_dict
+        )
+        features["zoneID"] = row["OBJECTID"]
+        features["pickup_zone"] = row["zone"]
+        all_rows.append(features)
+    return pd.DataFrame(all_rows)
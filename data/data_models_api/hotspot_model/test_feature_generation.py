@@ -0,0 +1,36 @@
+import unittest
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+from pytz import timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from rowwise_features import rowwise_features
+from utils import generate_features_for_time, generate_features_for_times
+
+NYC = timezone("America/New_York")
+
+
+class TestColumnarFeatureGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.times = [
+            NYC.localize(datetime(2025, 7, 11, 6)),    # weekday morning rush
+            NYC.localize(datetime(2025, 7, 4, 22)),    # holiday night
+            NYC.localize(datetime(2025, 8, 16, 13)),   # weekend midday
+            NYC.localize(datetime(2025, 12, 1, 2)),    # early morning
+        ]
+
+    def test_matches_rowwise_features(self):
+        for pickup_time in self.times:
+            pd.testing.assert_frame_equal(generate_features_for_time(pickup_time), rowwise_features(pickup_time))
+
+    def test_many_times_match_concatenated_frames(self):
+        expected = pd.concat([rowwise_features(t) for t in self.times], ignore_index=True)
+        pd.testing.assert_frame_equal(generate_features_for_times(self.times), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
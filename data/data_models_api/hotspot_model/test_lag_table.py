@@ -0,0 +1,57 @@
+import unittest
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from lag_table import LagTable
+
+
+class TestLagTable(unittest.TestCase):
+
+    def setUp(self):
+        self.lag_df = pd.DataFrame({
+            "pickup_date": ["2023-07-11", "2023-07-11", "2023-07-11", "2023-07-11", "2023-07-10", "2022-07-11"],
+            "pickup_hour": [9, 8, 9, 23, 9, 9],
+            "pickup_zone": ["SoHo", "SoHo", "Midtown Center", "SoHo", "SoHo", "SoHo"],
+            "trip_count": [10, 20, 5, 7, 99, 99],
+        })
+        self.table = LagTable(self.lag_df)
+        self.pickup_time = datetime(2025, 7, 11, 10, 30)
+
+    def test_lag_dicts_only_contain_zones_with_history(self):
+        lags = self.table.lag_dicts(self.pickup_time)
+        self.assertEqual(lags["trip_count_1h_ago"], {"SoHo": 10, "Midtown Center": 5})
+        self.assertEqual(lags["trip_count_2h_ago"], {"SoHo": 20})
+        self.assertEqual(lags["rolling_avg_2h"], {"SoHo": 15.0, "Midtown Center": 2.5})
+
+    def test_lag_features_are_aligned_with_zones(self):
+        features = self.table.lag_features(self.pickup_time, ["Midtown Center", "Unknown", "SoHo"])
+        np.testing.assert_array_equal(features["trip_count_1h_ago"], [5, 0, 10])
+        np.testing.assert_array_equal(features["trip_count_2h_ago"], [0, 0, 20])
+        np.testing.assert_array_equal(features["rolling_avg_2h"], [2.5, 0, 15])
+
+    def test_custom_lags_and_windows(self):
+        features = self.table.lag_features(
+            datetime(2025, 7, 11, 0), ["SoHo"], lag_hours_list=[1], rolling_windows=[1, 3]
+        )
+        # Hours wrap around midnight on the same reference date
+        np.testing.assert_array_equal(features["trip_count_1h_ago"], [7])
+        np.testing.assert_array_equal(features["rolling_avg_1h"], [7])
+        np.testing.assert_array_almost_equal(features["rolling_avg_3h"], [7 / 3])
+
+    def test_features_for_times_match_per_time_features(self):
+        times = [datetime(2025, 7, 10, 10), datetime(2025, 7, 11, 10), datetime(2025, 7, 11, 0)]
+        zones = ["SoHo", "Unknown", "Midtown Center"]
+        batched = self.table.lag_features_for_times(times, zones)
+        for name, values in batched.items():
+            expected = np.concatenate([self.table.lag_features(t, zones)[name] for t in times])
+            np.testing.assert_array_equal(values, expected)
+        np.testing.assert_array_equal(batched["trip_count_1h_ago"], [99, 0, 0, 10, 0, 5, 7, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
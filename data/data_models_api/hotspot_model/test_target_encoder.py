@@ -0,0 +1,80 @@
+import unittest
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from pytz import timezone
+
+HOTSPOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HOTSPOT_DIR)
+import feature_engineering
+from feature_engineering import TargetEncoder, align_with_model_features
+from utils import generate_features_for_time
+
+ENCODING_DIR = os.path.join(HOTSPOT_DIR, "models", "encoding_maps")
+NYC = timezone("America/New_York")
+
+
+def reference_encoding(feature_df):
+    """
+    Per-request map/fillna over every pickle, as the pipeline used to do it.
+    """
+    for filename in sorted(os.listdir(ENCODING_DIR)):
+        if filename.endswith("_target_encoding.pkl"):
+            col_name = filename.replace("_target_encoding.pkl", "")
+            mapping = joblib.load(os.path.join(ENCODING_DIR, filename))
+            encoded_col = f"{col_name}_target_encoded"
+            feature_df[encoded_col] = feature_df[col_name].map(mapping).fillna(np.mean(list(mapping.values())))
+    return align_with_model_features(feature_df)
+
+
+class TestTargetEncoder(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.encoder = TargetEncoder.from_pickles(ENCODING_DIR)
+        cls.features = generate_features_for_time(NYC.localize(datetime(2025, 7, 4, 22)))
+
+    def test_matches_per_request_encoding(self):
+        expected = reference_encoding(self.features.copy())
+        pd.testing.assert_frame_equal(self.encoder.transform_and_align(self.features.copy()), expected)
+        pd.testing.assert_frame_equal(self.encoder.align(self.encoder.transform(self.features.copy())), expected)
+
+    def test_unknown_categories_get_the_map_mean(self):
+        mapping = joblib.load(os.path.join(ENCODING_DIR, "pickup_zone_target_encoding.pkl"))
+        known = next(iter(mapping))
+        encoded = self.encoder.encode("pickup_zone", [known, "Not A Zone"])
+        self.assertEqual(encoded[0], mapping[known])
+        self.assertAlmostEqual(encoded[1], np.mean(list(mapping.values())))
+
+    def test_compiled_file_round_trip(self):
+        path = os.path.join(tempfile.mkdtemp(), "target_encoder.npz")
+        self.encoder.save(path)
+        loaded = TargetEncoder.load(path)
+        self.assertEqual(loaded.model_features, self.encoder.model_features)
+        pd.testing.assert_frame_equal(
+            loaded.transform_and_align(self.features.copy()),
+            self.encoder.transform_and_align(self.features.copy())
+        )
+
+    def test_compiled_file_from_other_pickles_is_rebuilt(self):
+        root = tempfile.mkdtemp()
+        encoding_dir = os.path.join(root, "encoding_maps")
+        shutil.copytree(ENCODING_DIR, encoding_dir)
+        compiled_path = os.path.join(root, "target_encoder.npz")
+        # A stale file that is newer than the pickles, as after a fresh checkout
+        TargetEncoder({}, ["stale"], source_digest="other pickles").save(compiled_path)
+
+        encoder = feature_engineering.get_target_encoder(encoding_dir)
+        self.assertEqual(encoder.model_features, self.encoder.model_features)
+        self.assertEqual(TargetEncoder.load(compiled_path).source_digest, encoder.source_digest)
+        self.assertIsNotNone(encoder.source_digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# artifact_fingerprints.py
+"""
+Content fingerprints of the artifacts behind a prediction.
+
+file_digest is the sha256 of a file's bytes, memoized on (size, mtime) so a
+file is only read again after it changes. artifact_fingerprint combines the
+digests of a set of files, keyed by file name, into a short version string:
+the same bytes give the same fingerprint wherever and whenever they are
+loaded, and a retrain that writes different bytes gives a new one even if
+the file keeps its name.
+"""
+
+import hashlib
+import os
+import threading
+
+FINGERPRINT_LENGTH = 16
+
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path):
+    """
+    Returns the sha256 hex digest of a file, or None if it cannot be read.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    with _digests_lock:
+        cached = _digests.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    with _digests_lock:
+        _digests[path] = (stamp, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def combine_fingerprints(parts):
+    """
+    Short fingerprint of a {name: digest or fingerprint} mapping, independent
+    of its order.
+    """
+    text = "\n".join(f"{name}={value}" for name, value in sorted(parts.items()))
+    return hashlib.sha256(text.encode()).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+def artifact_digests(paths):
+    """
+    Returns:
+        dict: File name -> sha256 digest (None for a missing file).
+    """
+    return {os.path.basename(path): file_digest(path) for path in paths}
+
+
+def artifact_fingerprint(paths):
+    """
+    Returns:
+        tuple: (fingerprint of the files, their artifact_digests)
+    """
+    digests = artifact_digests(paths)
+    return combine_fingerprints(digests), digests
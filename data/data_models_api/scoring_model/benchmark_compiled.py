@@ -0,0 +1,63 @@
+"""
+Parity and speed of the compiled predictors against the pickled models:
+the sklearn wrapper's predict, the Booster adapter (NativeModel) and the
+TL2cgen library, on the July scoring models and one hotspot model.
+
+Usage:
+    python benchmark_compiled.py [--repeat 20] [--compiled-dir compiled/]
+"""
+
+import argparse
+import os
+import tempfile
+import timeit
+
+import joblib
+import numpy as np
+
+from compiled_model import CompiledModel, HOTSPOT_MODEL_DIR, export_compiled_model, random_sample, scoring_sample
+from native_model import NativeModel
+from july_fixture import load_july_resources
+
+
+def best_us(fn, repeat, number):
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def compare(name, model, sample, single_rows, compiled_dir, repeat):
+    native = NativeModel(model)
+    meta = export_compiled_model(model, compiled_dir, sample, source=name)
+    compiled = CompiledModel.load(native, compiled_dir, meta["fingerprint"])
+
+    max_diff = np.max(np.abs(compiled.predict(sample) - model.predict(sample)))
+    row = sample.iloc[[0]]
+    timings = {
+        "pickle": (best_us(lambda: model.predict(sample), repeat, 5), best_us(lambda: model.predict(row), repeat, single_rows)),
+        "booster": (best_us(lambda: native.predict(sample), repeat, 5), best_us(lambda: native.predict(row), repeat, single_rows)),
+        "compiled": (best_us(lambda: compiled.predict(sample), repeat, 5), best_us(lambda: compiled.predict(row), repeat, single_rows)),
+    }
+    print(f"{name}: {len(sample)} rows, max |compiled - pickle| = {max_diff:.2e}")
+    for backend, (batch, single) in timings.items():
+        print(f"  {backend:9s} batch {batch / 1000:8.2f} ms (speed-up {timings['pickle'][0] / batch:5.1f}x)   "
+              f"1 row {single:8.1f} us (speed-up {timings['pickle'][1] / single:5.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled models against the pickled models")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--compiled-dir", help="Keep the compiled artifacts here instead of a temporary directory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        compiled_dir = args.compiled_dir or tmp
+        resources = load_july_resources()
+        for model_type in ["xgb", "lgb"]:
+            compare(f"scoring jul {model_type}", resources[f"{model_type}_model"],
+                    scoring_sample(resources, model_type, n=1000), 200, compiled_dir, args.repeat)
+
+        model = joblib.load(os.path.join(HOTSPOT_MODEL_DIR, "hotspot_model_6_to_7.pkl"))
+        compare("hotspot jul", model, random_sample(NativeModel(model), n=263), 200, compiled_dir, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
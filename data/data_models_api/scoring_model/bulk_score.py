@@ -0,0 +1,253 @@
+# bulk_score.py
+"""
+Offline bulk scoring of trip files.
+
+Streams a CSV or Parquet file of trips (pickup_zone, dropoff_zone,
+pickup_datetime in the API's MM/DD/YYYY HH:MM:SS AM/PM format) in chunks.
+Each chunk is grouped by month and scored with one batched predict per month
+(or read from a score cube with --cube-dir), in a pool of worker processes.
+
+Every finished chunk is written to its own part file in the output directory
+and recorded in _checkpoint.json, so an interrupted run started again with the
+same arguments skips the chunks that are already done.
+
+Usage:
+    python bulk_score.py trips.csv --output-dir scored/ --model xgb --workers 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from score_cube import ScoreCube, source_fingerprint
+from scoring_utils import load_reference_files, prepare_inputs, score_inputs
+
+TRIP_COLUMNS = ["pickup_zone", "dropoff_zone", "pickup_datetime"]
+CHECKPOINT_FILE = "_checkpoint.json"
+
+logger = logging.getLogger(__name__)
+
+# Per-process caches, filled on first use in each worker
+_resources = {}
+_cubes = {}
+
+
+def get_resources(month_abbr):
+    """
+    Month resources, or None for a month without models (e.g. January), whose
+    trips are left unscored instead of failing the run.
+    """
+    if month_abbr not in _resources:
+        try:
+            _resources[month_abbr] = load_reference_files(month_abbr)
+        except (FileNotFoundError, ValueError) as e:
+            logger.warning("No scoring resources for month %s, its trips stay unscored: %s", month_abbr, e)
+            _resources[month_abbr] = None
+    return _resources[month_abbr]
+
+
+def get_cube(cube_dir, month_abbr, model_type):
+    """
+    The month's score cube, or None if it is missing or was built from other
+    model files than the ones the trips would be scored with.
+    """
+    key = (cube_dir, month_abbr, model_type)
+    if key not in _cubes:
+        cube = ScoreCube.load(cube_dir, month_abbr, model_type)
+        if cube is not None and cube.source_fingerprint != source_fingerprint(month_abbr):
+            logger.warning("Score cube %s/%s is stale, scoring with the model", month_abbr, model_type)
+            cube = None
+        _cubes[key] = cube
+    return _cubes[key]
+
+
+def iter_chunks(input_path, chunk_size):
+    """
+    Yields DataFrames of at most chunk_size trips from a CSV or Parquet file.
+    """
+    if input_path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet needs pyarrow. Install with: pip install pyarrow")
+        for batch in pq.ParquetFile(input_path).iter_batches(batch_size=chunk_size, columns=TRIP_COLUMNS):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, usecols=TRIP_COLUMNS, dtype=str, chunksize=chunk_size)
+
+
+def score_frame(df, model_type, cube_dir=None):
+    """
+    Scores every trip of a DataFrame, one batch per month.
+
+    Returns:
+        DataFrame: the input columns plus predicted_score and final_score
+        (rounded like the API), NaN where a trip could not be scored
+    """
+    df = df.reset_index(drop=True)
+    predicted = np.full(len(df), np.nan)
+    final = np.full(len(df), np.nan)
+
+    pickup_datetime = pd.to_datetime(df["pickup_datetime"], format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+    months = pickup_datetime.dt.strftime("%b").str.lower()
+
+    for month, rows in df.groupby(months, sort=False).groups.items():
+        rows = np.asarray(rows)
+        pending = rows
+
+        cube = get_cube(cube_dir, month, model_type) if cube_dir else None
+        if cube is not None:
+            cube_predicted, cube_final, found = cube.lookup(
+                df["pickup_zone"].to_numpy(dtype=object)[rows],
+                df["dropoff_zone"].to_numpy(dtype=object)[rows],
+                pickup_datetime.dt.dayofweek.to_numpy()[rows],
+                pickup_datetime.dt.hour.to_numpy()[rows]
+            )
+            predicted[rows[found]] = cube_predicted[found]
+            final[rows[found]] = cube_final[found]
+            pending = rows[~found]
+        if len(pending) == 0:
+            continue
+
+        resources = get_resources(month)
+        if resources is None:
+            continue
+        trips = df.loc[pending, TRIP_COLUMNS].itertuples(index=False, name=None)
+        input_df, _ = prepare_inputs(trips, model_type, resources)
+        if input_df.empty:
+            continue
+        month_predicted, month_final = score_inputs(input_df, resources[f"{model_type}_model"], resources["scaler"])
+        predicted[pending[input_df.index]] = month_predicted
+        final[pending[input_df.index]] = month_final
+
+    return df.assign(predicted_score=np.round(predicted, 2), final_score=np.round(final, 4))
+
+
+def part_path(output_dir, chunk_index):
+    return os.path.join(output_dir, f"part-{chunk_index:05d}.csv")
+
+
+def score_chunk(chunk_index, df, model_type, output_dir, cube_dir=None):
+    """
+    Scores one chunk and writes its part file atomically. Runs in the workers.
+
+    Returns:
+        tuple: (chunk_index, rows, rows scored)
+    """
+    scored = score_frame(df, model_type, cube_dir)
+    path = part_path(output_dir, chunk_index)
+    scored.to_csv(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    return chunk_index, len(scored), int(scored["final_score"].notna().sum())
+
+
+def load_checkpoint(output_dir, run):
+    """
+    Returns the set of chunk indices already written by an earlier run with
+    the same arguments. Raises ValueError if the directory belongs to another run.
+    """
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        checkpoint = json.load(f)
+    if checkpoint["run"] != run:
+        raise ValueError(f"{output_dir} holds output of a different run: {checkpoint['run']}")
+    # A chunk only counts as done if its part file made it to disk
+    return {i for i in checkpoint["completed"] if os.path.exists(part_path(output_dir, i))}
+
+
+def save_checkpoint(output_dir, run, completed, finished=False):
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"run": run, "completed": sorted(completed), "finished": finished}, f)
+    os.replace(path + ".tmp", path)
+
+
+def run_bulk_scoring(input_path, output_dir, model_type="xgb", chunk_size=100000, workers=1, cube_dir=None, log_every=10):
+    """
+    Scores input_path into part files under output_dir, resuming from its checkpoint.
+
+    Returns:
+        dict: rows and chunks scored in this run, chunks skipped, seconds and rows/s
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    run = {
+        "input": os.path.abspath(input_path),
+        "model": model_type,
+        "chunk_size": chunk_size,
+        "cube_dir": os.path.abspath(cube_dir) if cube_dir else None
+    }
+    completed = load_checkpoint(output_dir, run)
+    skipped = len(completed)
+
+    start = time.perf_counter()
+    rows = scored = chunks = 0
+
+    def record(result):
+        nonlocal rows, scored, chunks
+        chunk_index, n_rows, n_scored = result
+        completed.add(chunk_index)
+        rows += n_rows
+        scored += n_scored
+        chunks += 1
+        save_checkpoint(output_dir, run, completed)
+        if chunks % log_every == 0:
+            elapsed = time.perf_counter() - start
+            print(f"{chunks} chunks, {rows} rows, {rows / elapsed:,.0f} rows/s")
+
+    chunk_iter = (
+        (i, df) for i, df in enumerate(iter_chunks(input_path, chunk_size)) if i not in completed
+    )
+    if workers > 1:
+        # Keep a bounded number of chunks in flight so memory stays flat on large files
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = set()
+            for chunk_index, df in chunk_iter:
+                in_flight.add(pool.submit(score_chunk, chunk_index, df, model_type, output_dir, cube_dir))
+                if len(in_flight) >= 2 * workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(future.result())
+            for future in in_flight:
+                record(future.result())
+    else:
+        for chunk_index, df in chunk_iter:
+            record(score_chunk(chunk_index, df, model_type, output_dir, cube_dir))
+
+    save_checkpoint(output_dir, run, completed, finished=True)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "rows_scored": scored,
+        "chunks": chunks,
+        "chunks_skipped": skipped,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV or Parquet file of trips in bulk")
+    parser.add_argument("input", help="CSV or .parquet file with pickup_zone, dropoff_zone, pickup_datetime")
+    parser.add_argument("--output-dir", required=True, help="Directory for part files and the checkpoint")
+    parser.add_argument("--model", choices=["xgb", "lgb"], default="xgb")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cube-dir", help="Answer from precomputed score cubes where possible")
+    args = parser.parse_args()
+
+    summary = run_bulk_scoring(args.input, args.output_dir, args.model, args.chunk_size, args.workers, args.cube_dir)
+    print(f"Scored {summary['rows']} rows ({summary['rows_scored']} with a score) in {summary['chunks']} chunks, "
+          f"skipped {summary['chunks_skipped']} finished chunks, "
+          f"{summary['seconds']}s, {summary['rows_per_second']:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
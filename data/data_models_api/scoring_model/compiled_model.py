@@ -0,0 +1,247 @@
+# compiled_model.py
+"""
+Compiled tree-ensemble predictors (Treelite + TL2cgen).
+
+The scoring and hotspot models are small tree ensembles. TL2cgen turns a
+Treelite model into C code with every split as an if/else, and gcc compiles it
+into a shared library, so prediction runs without walking tree structures.
+
+Artifacts are keyed by a fingerprint of the model's trees, not by file name:
+
+    compiled/{fingerprint}.so     compiled predictor
+    compiled/{fingerprint}.json   feature names, input dtype, parity check
+
+native_model(model) looks the fingerprint up when COMPILED_MODEL_DIR is set
+and serves from the compiled library if there is one, falling back to the
+Booster adapter otherwise (no artifact, or treelite/tl2cgen not installed).
+The export refuses to write an artifact whose predictions differ from the
+model's on sample rows.
+
+Export every scoring month and hotspot model (needs treelite, tl2cgen and gcc):
+    python compiled_model.py --output-dir compiled/
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_COMPILED_DIR = os.path.join(SCRIPT_DIR, "compiled")
+HOTSPOT_MODEL_DIR = os.path.join(SCRIPT_DIR, "..", "hotspot_model", "models")
+
+# Largest prediction difference accepted at export (XGBoost sums leaves in
+# float32, so the compiled sum can differ from the Booster's in the last bits)
+PARITY_TOLERANCE = 1e-5
+
+# TL2cgen passes each feature as a union of the value and an int "missing"
+# flag set to -1. A float64 whose low 32 bits are all ones aliases that flag
+# and would be read as missing, so such values are moved down one ulp
+# (the comparison only changes if a threshold sits exactly on that ulp).
+MISSING_ALIAS_BITS = np.uint32(0xFFFFFFFF)
+
+
+def require_tl2cgen():
+    try:
+        import tl2cgen
+        import treelite
+    except ImportError:
+        raise ImportError("Compiled models need treelite and tl2cgen. Install with: pip install treelite tl2cgen")
+    return treelite, tl2cgen
+
+
+def model_fingerprint(native):
+    """
+    SHA-256 (first 16 hex digits) of a NativeModel's serialized trees.
+    Identical trees give the same fingerprint whichever file they came from.
+    """
+    if native.kind == "xgb":
+        payload = bytes(native.booster.save_raw(raw_format="ubj"))
+    else:
+        payload = native.booster.model_to_string().encode()
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def artifact_paths(compiled_dir, fingerprint):
+    return os.path.join(compiled_dir, f"{fingerprint}.so"), os.path.join(compiled_dir, f"{fingerprint}.json")
+
+
+def avoid_missing_alias(X):
+    """
+    Moves float64 values that TL2cgen would read as missing one ulp down, in place.
+    """
+    if X.dtype != np.float64 or X.size == 0:
+        return X
+    low_words = X.view(np.uint32).reshape(*X.shape, 2)[..., 0 if np.little_endian else 1]
+    aliased = low_words == MISSING_ALIAS_BITS
+    if aliased.any():
+        X[aliased] = np.nextafter(X[aliased], -np.inf)
+    return X
+
+
+class CompiledModel:
+    """
+    Predictor backed by a TL2cgen shared library. Same predict interface as
+    NativeModel: DataFrames in any column order or arrays in feature order.
+    """
+
+    def __init__(self, native, library_path, dtype):
+        _, tl2cgen = require_tl2cgen()
+        self.native = native
+        self.kind = native.kind
+        self.feature_names = native.feature_names
+        self.n_features = native.n_features
+        self.dtype = np.dtype(dtype)
+        self.library_path = library_path
+        self.predictor = tl2cgen.Predictor(library_path, nthread=1)
+        self._dmatrix = tl2cgen.DMatrix
+
+    @classmethod
+    def load(cls, native, compiled_dir, fingerprint):
+        """
+        CompiledModel for a NativeModel, or None if no artifact matches its fingerprint.
+        """
+        library_path, meta_path = artifact_paths(compiled_dir, fingerprint)
+        if not (os.path.exists(library_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        if meta["n_features"] != native.n_features:
+            logger.warning("Compiled model %s has %d features, model has %d", fingerprint, meta["n_features"], native.n_features)
+            return None
+        return cls(native, library_path, meta["dtype"])
+
+    def predict(self, X):
+        X = self.native.to_array(X)
+        if len(X) == 0:
+            return np.empty(0, dtype=np.float64)
+        X = np.ascontiguousarray(X, dtype=self.dtype)
+        if self.dtype == np.float64:
+            # to_array hands back this thread's buffer, safe to modify
+            avoid_missing_alias(X)
+        preds = self.predictor.predict(self._dmatrix(X, dtype=self.dtype.name))
+        return np.asarray(preds, dtype=np.float64).reshape(len(X))
+
+
+def export_compiled_model(model, compiled_dir, sample, source=None):
+    """
+    Compiles a model into compiled_dir and checks it against the Booster on
+    sample rows (DataFrame or array of model inputs).
+
+    Returns:
+        dict: the artifact's metadata
+
+    Raises:
+        ValueError: if the compiled predictions differ from the model's
+    """
+    from native_model import NativeModel
+
+    treelite, tl2cgen = require_tl2cgen()
+    native = NativeModel(model)
+    fingerprint = model_fingerprint(native)
+    library_path, meta_path = artifact_paths(compiled_dir, fingerprint)
+    os.makedirs(compiled_dir, exist_ok=True)
+
+    if native.kind == "xgb":
+        tl_model = treelite.frontend.from_xgboost(native.booster)
+    else:
+        tl_model = treelite.frontend.from_lightgbm(native.booster)
+
+    start = time.perf_counter()
+    tmp_library = f"{library_path}.tmp-{os.getpid()}.so"
+    tl2cgen.export_lib(tl_model, toolchain="gcc", libpath=tmp_library, params={"parallel_comp": os.cpu_count() or 1})
+    compile_seconds = time.perf_counter() - start
+
+    compiled = CompiledModel(native, tmp_library, native.dtype)
+    expected = native.predict(sample)
+    max_diff = float(np.max(np.abs(compiled.predict(sample) - expected))) if len(expected) else 0.0
+    if max_diff > PARITY_TOLERANCE:
+        os.remove(tmp_library)
+        raise ValueError(f"Compiled model {fingerprint} differs from the model by {max_diff}")
+
+    meta = {
+        "fingerprint": fingerprint,
+        "kind": native.kind,
+        "dtype": np.dtype(native.dtype).name,
+        "n_features": native.n_features,
+        "feature_names": native.feature_names,
+        "source": source,
+        "compile_seconds": round(compile_seconds, 2),
+        "parity_rows": len(expected),
+        "parity_max_diff": max_diff,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    os.replace(tmp_library, library_path)
+    with open(meta_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def scoring_sample(resources, model_type, n=2000, seed=0):
+    """
+    Random scoring feature rows for a month, for the export parity check.
+    """
+    from reference_tables import ReferenceTables
+    from scoring_utils import build_features
+
+    tables = resources.get("reference_tables")
+    if tables is None:
+        tables = ReferenceTables(resources["hotness_df"], resources["duration_df"], resources["borough_map"])
+    rng = np.random.default_rng(seed)
+    zones = np.asarray(tables.zones, dtype=object)
+    return build_features(
+        rng.choice(zones, n), rng.choice(zones, n), rng.integers(0, 7, n), rng.integers(0, 24, n),
+        model_type, dict(resources, reference_tables=tables)
+    )
+
+
+def random_sample(native, n=2000, seed=0):
+    """
+    Random non-negative feature rows for models without a feature builder at hand.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.random((n, native.n_features)) * rng.choice([1, 10, 1000], native.n_features)
+    return pd.DataFrame(X, columns=native.feature_names) if native.feature_names else X
+
+
+def main():
+    import joblib
+    from native_model import NativeModel
+    from scoring_utils import available_months, load_reference_files
+
+    parser = argparse.ArgumentParser(description="Compile scoring and hotspot models with Treelite/TL2cgen")
+    parser.add_argument("--output-dir", default=DEFAULT_COMPILED_DIR)
+    parser.add_argument("--month", nargs="+", help="Scoring months to compile, defaults to every available month")
+    parser.add_argument("--skip-hotspot", action="store_true", help="Do not compile the hotspot models")
+    args = parser.parse_args()
+
+    for month_abbr in args.month or available_months():
+        resources = load_reference_files(month_abbr)
+        for model_type in ["xgb", "lgb"]:
+            meta = export_compiled_model(
+                resources[f"{model_type}_model"], args.output_dir,
+                scoring_sample(resources, model_type), source=f"scoring {month_abbr} {model_type}"
+            )
+            print(f"scoring {month_abbr} {model_type}: {meta['fingerprint']} "
+                  f"({meta['compile_seconds']}s, max diff {meta['parity_max_diff']:.2e})")
+
+    if not args.skip_hotspot:
+        for path in sorted(glob.glob(os.path.join(HOTSPOT_MODEL_DIR, "hotspot_model_*.pkl"))):
+            model = joblib.load(path)
+            meta = export_compiled_model(
+                model, args.output_dir, random_sample(NativeModel(model)), source=os.path.basename(path)
+            )
+            print(f"{os.path.basename(path)}: {meta['fingerprint']} "
+                  f"({meta['compile_seconds']}s, max diff {meta['parity_max_diff']:.2e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# july_fixture.py
+"""
+The committed July scoring resources, for tests and benchmarks.
+
+load_july_resources reads the July models, scaler, weights and hotness table
+directly (the duration variability CSV is not part of the repo and is
+generated from the hotness zones); to_datetime_string builds a pickup time in
+the API format for a day of week and hour.
+"""
+
+import json
+import os
+import pickle
+
+import joblib
+import numpy as np
+import pandas as pd
+
+SCORING_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_july_resources():
+    """
+    Loads the committed July models and hotness table. The duration variability
+    CSV is not part of the repo, so a synthetic one is generated from the hotness zones.
+    """
+    month_dir = os.path.join(SCORING_DIR, "july")
+    with open(os.path.join(month_dir, "model_july_xgb.pkl"), "rb") as f:
+        xgb_model = pickle.load(f)
+    with open(os.path.join(month_dir, "model_july_lgb.pkl"), "rb") as f:
+        lgb_model = pickle.load(f)
+    with open(os.path.join(month_dir, "scaler_july.json"), "r") as f:
+        scaler = json.load(f)
+    with open(os.path.join(month_dir, "scoring_weights_july.json"), "r") as f:
+        final_weights = json.load(f)
+
+    hotness_df = pd.read_csv(os.path.join(month_dir, "hotness_table_july.csv"))
+    zones = hotness_df["dropoff_zone"].unique()
+
+    rng = np.random.default_rng(0)
+    n = 5000
+    duration_df = pd.DataFrame({
+        "pickup_zone": rng.choice(zones, n),
+        "dropoff_zone": rng.choice(zones, n),
+        "pickup_day_of_week": rng.integers(0, 7, n),
+        "pickup_hour": rng.integers(0, 24, n),
+        "trip_duration_variability": rng.random(n) * 5,
+    }).drop_duplicates(subset=["pickup_zone", "dropoff_zone", "pickup_day_of_week", "pickup_hour"])
+
+    expected_dir = os.path.join(SCORING_DIR, "models", "expected_columns")
+    return {
+        "xgb_model": xgb_model,
+        "lgb_model": lgb_model,
+        "final_weights": final_weights,
+        "scaler": scaler,
+        "hotness_df": hotness_df,
+        "duration_df": duration_df,
+        "expected_columns": {
+            "xgb": joblib.load(os.path.join(expected_dir, "expected_columns_xgb.pkl")),
+            "lgb": joblib.load(os.path.join(expected_dir, "expected_columns_lgb.pkl")),
+        },
+        "borough_map": {},
+    }
+
+
+def to_datetime_string(day_of_week, hour):
+    # July 10th 2023 is a Monday
+    am_pm = "AM" if hour < 12 else "PM"
+    return f"07/{10 + day_of_week:02d}/2023 {(hour % 12) or 12}:15:00 {am_pm}"
@@ -0,0 +1,188 @@
+# month_bundle.py
+"""
+Per-month scoring bundle: everything load_reference_files returns for a month
+in one directory with a fixed layout.
+
+    bundles/{month}/
+        manifest.json        weights, scaler, expected columns, array index
+        model_xgb.pkl        the month's models, unchanged
+        model_lgb.pkl
+        {array}.npy          compiled ReferenceTables arrays
+
+The hotness and duration tables are stored already compiled (dense hotness
+array, sorted duration keys), as plain .npy files that the loader memory-maps.
+Loading a month is one JSON read, two small pickles and a few mmaps: no CSV
+parsing, no table compilation and no directory probing.
+
+Build bundles from the source files (CSV/pickle/JSON/joblib) with:
+    python month_bundle.py --month jul aug
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import time
+
+import numpy as np
+
+from reference_tables import ReferenceTables
+
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+MODEL_TYPES = ("xgb", "lgb")
+
+
+def bundle_manifest_path(bundle_path):
+    return os.path.join(bundle_path, MANIFEST_FILE)
+
+
+def has_bundle(bundle_path):
+    return os.path.exists(bundle_manifest_path(bundle_path))
+
+
+def write_month_bundle(resources, bundle_path, month_abbr, sources=None):
+    """
+    Writes a month's resources as a bundle, replacing any existing one.
+
+    The bundle is written to a temporary directory next to bundle_path and
+    renamed into place, so readers never see a half-written bundle.
+
+    Args:
+        resources (dict): Output of load_reference_files.
+        bundle_path (str): Bundle directory, e.g. bundles/jul.
+        month_abbr (str): Month abbreviation recorded in the manifest.
+        sources (list): Source files the bundle was built from, recorded in the manifest.
+
+    Returns:
+        str: bundle_path
+    """
+    tables = resources.get("reference_tables")
+    if tables is None:
+        tables = ReferenceTables(resources["hotness_df"], resources["duration_df"], resources["borough_map"])
+
+    tmp_path = f"{bundle_path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    arrays = {}
+    for name, array in tables.to_arrays().items():
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(array))
+        arrays[name] = {"file": f"{name}.npy", "dtype": str(array.dtype), "shape": list(array.shape)}
+
+    models = {}
+    for model_type in MODEL_TYPES:
+        models[model_type] = f"model_{model_type}.pkl"
+        with open(os.path.join(tmp_path, models[model_type]), "wb") as f:
+            pickle.dump(resources[f"{model_type}_model"], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    manifest = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "month": month_abbr,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "final_weights": resources["final_weights"],
+        "scaler": resources["scaler"],
+        "expected_columns": {k: list(v) for k, v in resources["expected_columns"].items()},
+        "models": models,
+        "arrays": arrays,
+        "sources": [os.path.basename(p) for p in sources or []]
+    }
+    with open(bundle_manifest_path(tmp_path), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    old_path = f"{bundle_path}.old-{os.getpid()}"
+    if os.path.exists(bundle_path):
+        os.replace(bundle_path, old_path)
+    os.replace(tmp_path, bundle_path)
+    shutil.rmtree(old_path, ignore_errors=True)
+    return bundle_path
+
+
+def read_bundle_manifest(bundle_path):
+    with open(bundle_manifest_path(bundle_path), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Bundle {bundle_path} has format version {manifest.get('format_version')}, "
+            f"expected {BUNDLE_FORMAT_VERSION}; rebuild it with month_bundle.py"
+        )
+    return manifest
+
+
+def bundle_files(bundle_path):
+    """
+    Every file load_month_bundle reads, manifest first.
+    """
+    manifest = read_bundle_manifest(bundle_path)
+    files = [MANIFEST_FILE] + list(manifest["models"].values()) + [a["file"] for a in manifest["arrays"].values()]
+    return [os.path.join(bundle_path, f) for f in files]
+
+
+def load_month_bundle(bundle_path, mmap_mode="r"):
+    """
+    Loads a bundle into the same resource dict as load_reference_files.
+
+    The compiled tables are memory-mapped (pass mmap_mode=None to read them
+    into memory). hotness_df and duration_df are None: every scoring path
+    uses the compiled reference_tables.
+    """
+    manifest = read_bundle_manifest(bundle_path)
+
+    arrays = {
+        name: np.load(os.path.join(bundle_path, entry["file"]), mmap_mode=mmap_mode)
+        for name, entry in manifest["arrays"].items()
+    }
+    reference_tables = ReferenceTables.from_arrays(arrays)
+
+    models = {}
+    for model_type, file_name in manifest["models"].items():
+        with open(os.path.join(bundle_path, file_name), "rb") as f:
+            models[f"{model_type}_model"] = pickle.load(f)
+
+    borough_map = {
+        zone: borough
+        for zone, borough in zip(reference_tables.zones, reference_tables.zone_borough)
+        if borough != "Unknown"
+    }
+    return {
+        **models,
+        "final_weights": manifest["final_weights"],
+        "scaler": manifest["scaler"],
+        "hotness_df": None,
+        "duration_df": None,
+        "expected_columns": manifest["expected_columns"],
+        "borough_map": borough_map,
+        "reference_tables": reference_tables
+    }
+
+
+def main():
+    from scoring_utils import BUNDLE_DIR, available_months, load_source_files, source_file_paths
+
+    parser = argparse.ArgumentParser(description="Convert a month's scoring files into a bundle")
+    parser.add_argument("--month", nargs="+", help="Month abbreviation(s), defaults to every month with source files")
+    parser.add_argument("--output-dir", default=BUNDLE_DIR)
+    args = parser.parse_args()
+
+    months = args.month or available_months(bundles=False)
+    if not months:
+        raise SystemExit("No month has scoring source files, no bundles written")
+    for month_abbr in months:
+        start = time.perf_counter()
+        resources = load_source_files(month_abbr)
+        source_seconds = time.perf_counter() - start
+
+        bundle_path = write_month_bundle(
+            resources, os.path.join(args.output_dir, month_abbr), month_abbr, source_file_paths(month_abbr)
+        )
+
+        start = time.perf_counter()
+        load_month_bundle(bundle_path)
+        bundle_seconds = time.perf_counter() - start
+        print(f"Wrote {bundle_path}: source load {source_seconds * 1000:.0f} ms, "
+              f"bundle load {bundle_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
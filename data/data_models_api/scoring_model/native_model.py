@@ -0,0 +1,191 @@
+# native_model.py
+"""
+Inference straight on the XGBoost / LightGBM Booster, bypassing the sklearn
+wrappers.
+
+XGBRegressor.predict and LGBMRegressor.predict validate and convert the
+DataFrame on every call, which costs more than the trees themselves for the
+few rows a request scores. NativeModel extracts the Booster once, fixes the
+feature order from the trained model and predicts from a contiguous NumPy
+array copied into a per-thread preallocated buffer.
+
+Input dtype follows what each library evaluates trees in: XGBoost converts
+every input to float32 internally, so float32 is exact; LightGBM compares
+features against double thresholds, so it gets float64 (float32 input changes
+LightGBM predictions).
+
+native_model(model) returns the cached adapter for a loaded model, so every
+caller holding the same model object shares one adapter. With
+COMPILED_MODEL_DIR set, a compiled predictor for the model is used instead
+when one has been exported (compiled_model.py). Set NATIVE_INFERENCE=0 to
+predict through the sklearn wrappers instead.
+"""
+
+import logging
+import os
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NATIVE_INFERENCE = os.environ.get("NATIVE_INFERENCE", "1") != "0"
+COMPILED_MODEL_DIR = os.environ.get("COMPILED_MODEL_DIR")
+
+# Each thread keeps a buffer of up to MAX_BUFFER_ROWS rows; bigger batches
+# (cube builds, bulk scoring) get a one-off array instead of pinning memory
+INITIAL_BUFFER_ROWS = 512
+MAX_BUFFER_ROWS = 16384
+
+
+class NativeModel:
+    """
+    Booster-level predictor for a fitted XGBRegressor or LGBMRegressor (or a
+    bare Booster). predict returns the same values as the wrapper's predict.
+    """
+
+    def __init__(self, model, feature_names=None):
+        kind = type(model).__module__.split(".")[0]
+        if kind == "xgboost":
+            self.kind = "xgb"
+            self.booster = model.get_booster() if hasattr(model, "get_booster") else model
+            self.dtype = np.float32
+            booster_features = self.booster.feature_names
+            self.n_features = self.booster.num_features()
+            # Same trees as the wrapper's predict: stop at best_iteration after early stopping
+            try:
+                self.iteration_range = (0, model.best_iteration + 1)
+            except AttributeError:
+                self.iteration_range = (0, 0)
+        elif kind == "lightgbm":
+            self.kind = "lgb"
+            self.booster = model.booster_ if hasattr(model, "booster_") else model
+            self.dtype = np.float64
+            booster_features = self.booster.feature_name()
+            self.n_features = self.booster.num_feature()
+            self.iteration_range = None
+        else:
+            raise TypeError(f"Unsupported model type: {type(model).__name__}")
+
+        # Column order of the arrays predict expects, fixed by the trained model
+        self.feature_names = list(feature_names if feature_names is not None else booster_features or [])
+        if self.feature_names and len(self.feature_names) != self.n_features:
+            raise ValueError(f"Model has {self.n_features} features, got {len(self.feature_names)} feature names")
+        self.feature_index = pd.Index(self.feature_names)
+        # DataFrame column tuple -> positions in feature order (None when already in order)
+        self._column_orders = {}
+        self._local = threading.local()
+
+    def column_order(self, columns):
+        """
+        Positions of the model features among a DataFrame's columns, None if
+        the columns are already in feature order. LightGBM stores feature
+        names with whitespace replaced by underscores, so for LightGBM the
+        columns are matched after the same replacement.
+        """
+        if not self.feature_names or columns.equals(self.feature_index):
+            return None
+        key = tuple(columns)
+        if key not in self._column_orders:
+            names = pd.Index(columns)
+            if self.kind == "lgb":
+                names = names.str.replace(r"\s", "_", regex=True)
+            positions = names.get_indexer(self.feature_index)
+            if (positions < 0).any():
+                raise ValueError(f"Missing model features: {list(self.feature_index[positions < 0])}")
+            in_order = len(names) == self.n_features and (positions == np.arange(self.n_features)).all()
+            self._column_orders[key] = None if in_order else positions
+        return self._column_orders[key]
+
+    def buffer(self, n_rows):
+        """
+        This thread's preallocated (n_rows, n_features) input array.
+        """
+        if n_rows > MAX_BUFFER_ROWS:
+            return np.empty((n_rows, self.n_features), dtype=self.dtype)
+        buf = getattr(self._local, "buf", None)
+        if buf is None or len(buf) < n_rows:
+            buf = np.empty((max(n_rows, INITIAL_BUFFER_ROWS), self.n_features), dtype=self.dtype)
+            self._local.buf = buf
+        return buf[:n_rows]
+
+    def to_array(self, X):
+        """
+        Copies a DataFrame (any column order) or a 2-D array in feature order
+        into this thread's buffer.
+        """
+        if isinstance(X, pd.DataFrame):
+            order = self.column_order(X.columns)
+            X = X.to_numpy()
+            if order is not None:
+                X = X[:, order]
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected an (n, {self.n_features}) feature array, got shape {X.shape}")
+        buf = self.buffer(len(X))
+        np.copyto(buf, X, casting="unsafe")
+        return buf
+
+    def predict(self, X):
+        X = self.to_array(X)
+        if len(X) == 0:
+            return np.empty(0, dtype=np.float64)
+        if self.kind == "xgb":
+            preds = self.booster.inplace_predict(X, iteration_range=self.iteration_range, validate_features=False)
+        else:
+            preds = self.booster.predict(X)
+        return np.asarray(preds, dtype=np.float64).ravel()
+
+
+def compiled_or_native(model, feature_names=None):
+    """
+    The compiled predictor for a model when COMPILED_MODEL_DIR holds one,
+    its NativeModel otherwise.
+    """
+    native = NativeModel(model, feature_names)
+    if not COMPILED_MODEL_DIR:
+        return native
+    try:
+        from compiled_model import CompiledModel, model_fingerprint
+
+        fingerprint = model_fingerprint(native)
+        compiled = CompiledModel.load(native, COMPILED_MODEL_DIR, fingerprint)
+    except Exception as e:
+        logger.warning("Compiled model unavailable, using the Booster: %s", e)
+        return native
+    if compiled is None:
+        logger.info("No compiled model %s in %s, using the Booster", fingerprint, COMPILED_MODEL_DIR)
+        return native
+    logger.info("Serving compiled model %s", compiled.library_path)
+    return compiled
+
+
+# Adapters live as long as the model object they wrap
+_adapters = weakref.WeakKeyDictionary()
+_adapters_lock = threading.Lock()
+
+
+def native_model(model, feature_names=None):
+    """
+    Cached predictor for a loaded model (CompiledModel or NativeModel), or
+    the model itself when native inference is disabled or the model type is
+    not supported.
+    """
+    if not NATIVE_INFERENCE or hasattr(model, "native") or isinstance(model, NativeModel):
+        return model
+    try:
+        return _adapters[model]
+    except KeyError:
+        pass
+    except TypeError:
+        # Not weak-referenceable, nothing to cache against
+        return model
+    with _adapters_lock:
+        if model not in _adapters:
+            try:
+                _adapters[model] = compiled_or_native(model, feature_names)
+            except TypeError:
+                return model
+        return _adapters[model]
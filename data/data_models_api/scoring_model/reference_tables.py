@@ -0,0 +1,143 @@
+# reference_tables.py
+
+import numpy as np
+import pandas as pd
+
+
+DAYS_PER_WEEK = 7
+HOURS_PER_DAY = 24
+
+
+class ReferenceTables:
+    """
+    Integer-indexed lookup arrays compiled from a month's reference tables.
+
+    Zone names are mapped to integer codes once. The hotness table becomes a
+    dense (zone, day_of_week, hour) array and the sparse pickup x dropoff
+    duration table becomes a sorted array of packed keys searched with
+    np.searchsorted, so feature lookups need no DataFrame merge.
+
+    Unknown zones and missing (zone, day, hour) cells look up as 0, the same
+    value prepare_input used to fill after its left merges.
+    """
+
+    def __init__(self, hotness_df, duration_df, borough_map):
+        hotness_df = hotness_df.drop_duplicates(
+            subset=["dropoff_zone", "pickup_day_of_week", "pickup_hour"], keep="first"
+        )
+        duration_df = duration_df.drop_duplicates(
+            subset=["pickup_zone", "dropoff_zone", "pickup_day_of_week", "pickup_hour"], keep="first"
+        )
+
+        zones = set(hotness_df["dropoff_zone"]) | set(duration_df["pickup_zone"]) | set(duration_df["dropoff_zone"])
+        zones |= set(borough_map)
+        self.zones = pd.Index(sorted(str(z) for z in zones))
+        self.n_zones = len(self.zones)
+
+        # Per-zone attributes used by the categorical features
+        self.zone_borough = np.array([borough_map.get(z, "Unknown") for z in self.zones], dtype=object)
+        self.zone_is_airport = np.asarray(self.zones.str.contains("Airport"), dtype=bool)
+
+        # Dense hotness array: (dropoff zone, day of week, hour)
+        self.hotness = np.zeros((self.n_zones, DAYS_PER_WEEK, HOURS_PER_DAY), dtype=np.float64)
+        zone_codes = self.zone_codes(hotness_df["dropoff_zone"])
+        self.hotness[
+            zone_codes,
+            hotness_df["pickup_day_of_week"].to_numpy(dtype=np.int64),
+            hotness_df["pickup_hour"].to_numpy(dtype=np.int64),
+        ] = np.nan_to_num(hotness_df["dropoff_zone_hotness"].to_numpy(dtype=np.float64))
+
+        # Sparse duration table: packed (pickup, dropoff, day, hour) keys, sorted for binary search
+        keys = self.pack_keys(
+            self.zone_codes(duration_df["pickup_zone"]),
+            self.zone_codes(duration_df["dropoff_zone"]),
+            duration_df["pickup_day_of_week"].to_numpy(dtype=np.int64),
+            duration_df["pickup_hour"].to_numpy(dtype=np.int64),
+        )
+        values = np.nan_to_num(duration_df["trip_duration_variability"].to_numpy(dtype=np.float64))
+        order = np.argsort(keys, kind="stable")
+        self.duration_keys = keys[order]
+        self.duration_values = values[order]
+
+    # Arrays that fully describe the compiled tables, see to_arrays / from_arrays
+    ARRAY_NAMES = ("zones", "zone_borough", "zone_is_airport", "hotness", "duration_keys", "duration_values")
+
+    def to_arrays(self):
+        """
+        The compiled tables as plain NumPy arrays (strings as fixed-width unicode)
+        so they can be saved as .npy files and memory-mapped back.
+        """
+        return {
+            "zones": np.asarray(self.zones, dtype=str),
+            "zone_borough": self.zone_borough.astype(str),
+            "zone_is_airport": self.zone_is_airport,
+            "hotness": self.hotness,
+            "duration_keys": self.duration_keys,
+            "duration_values": self.duration_values,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Rebuilds the tables from to_arrays output without recompiling. Numeric
+        arrays are used as given, so memory-mapped arrays stay memory-mapped.
+        """
+        tables = cls.__new__(cls)
+        tables.zones = pd.Index(np.asarray(arrays["zones"]).astype(object))
+        tables.n_zones = len(tables.zones)
+        tables.zone_borough = np.asarray(arrays["zone_borough"]).astype(object)
+        tables.zone_is_airport = np.asarray(arrays["zone_is_airport"], dtype=bool)
+        tables.hotness = arrays["hotness"]
+        tables.duration_keys = arrays["duration_keys"]
+        tables.duration_values = arrays["duration_values"]
+        return tables
+
+    def zone_codes(self, zone_names):
+        """
+        Maps zone names to integer codes, -1 for zones that are not in the tables.
+        """
+        return self.zones.get_indexer(pd.Index(zone_names, dtype=object)).astype(np.int64)
+
+    def pack_keys(self, pickup_codes, dropoff_codes, day_of_week, hour):
+        pickup_codes = np.asarray(pickup_codes, dtype=np.int64)
+        dropoff_codes = np.asarray(dropoff_codes, dtype=np.int64)
+        day_of_week = np.asarray(day_of_week, dtype=np.int64)
+        hour = np.asarray(hour, dtype=np.int64)
+        return ((pickup_codes * self.n_zones + dropoff_codes) * DAYS_PER_WEEK + day_of_week) * HOURS_PER_DAY + hour
+
+    def dropoff_hotness(self, dropoff_codes, day_of_week, hour):
+        dropoff_codes = np.asarray(dropoff_codes, dtype=np.int64)
+        known = dropoff_codes >= 0
+        values = self.hotness[
+            np.where(known, dropoff_codes, 0),
+            np.asarray(day_of_week, dtype=np.int64),
+            np.asarray(hour, dtype=np.int64),
+        ]
+        return np.where(known, values, 0.0)
+
+    def duration_variability(self, pickup_codes, dropoff_codes, day_of_week, hour):
+        pickup_codes = np.asarray(pickup_codes, dtype=np.int64)
+        dropoff_codes = np.asarray(dropoff_codes, dtype=np.int64)
+        known = (pickup_codes >= 0) & (dropoff_codes >= 0)
+        if len(self.duration_keys) == 0:
+            return np.zeros(len(pickup_codes), dtype=np.float64)
+
+        keys = self.pack_keys(pickup_codes, dropoff_codes, day_of_week, hour)
+        positions = np.searchsorted(self.duration_keys, keys)
+        positions = np.minimum(positions, len(self.duration_keys) - 1)
+        found = known & (self.duration_keys[positions] == keys)
+        return np.where(found, self.duration_values[positions], 0.0)
+
+    def borough(self, zone_codes):
+        zone_codes = np.asarray(zone_codes, dtype=np.int64)
+        return np.where(zone_codes >= 0, self.zone_borough[np.maximum(zone_codes, 0)], "Unknown")
+
+    def is_airport(self, zone_codes, zone_names):
+        zone_codes = np.asarray(zone_codes, dtype=np.int64)
+        flags = self.zone_is_airport[np.maximum(zone_codes, 0)]
+        unknown = zone_codes < 0
+        if unknown.any():
+            names = pd.Series(np.asarray(zone_names, dtype=object)[unknown])
+            flags = flags.copy()
+            flags[unknown] = names.str.contains("Airport").fillna(False).to_numpy(dtype=bool)
+        return flags
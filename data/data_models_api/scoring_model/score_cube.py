@@ -0,0 +1,257 @@
+# score_cube.py
+"""
+Precomputed score cubes for the trip scoring models.
+
+Scoring inputs depend only on (pickup zone, dropoff zone, day of week, hour)
+plus the month, so every score a month's model can return is computed offline
+in one batched pass and stored as a (pickup, dropoff, day, hour) array:
+
+- float16 cubes store the raw model score, final_score is derived from the scaler
+- uint8 cubes store final_score quantized to 1/255 steps, predicted_score is
+  rebuilt from it and is therefore clipped to the scaler range
+
+Each cube is a plain .npy file, loaded with mmap_mode="r", plus a JSON manifest
+with the zone vocabulary, scaler, quantization tolerance (the largest
+difference from the model's final_score before it is rounded for the response)
+and the content fingerprint of the month files the cube was built from, so a
+server can tell when a retrained model has made the cube stale.
+
+Usage:
+    python score_cube.py --month jul --model xgb --dtype float16
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from artifact_fingerprints import artifact_fingerprint
+from reference_tables import ReferenceTables, DAYS_PER_WEEK, HOURS_PER_DAY
+from native_model import native_model
+from scoring_utils import MONTH_LOOKUP, build_features, load_reference_files, reference_file_paths
+
+DEFAULT_CUBE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cubes")
+CUBE_DTYPES = ("float16", "uint8")
+UINT8_LEVELS = 255
+
+
+def cube_paths(cube_dir, month_abbr, model_type):
+    name = f"score_cube_{MONTH_LOOKUP[month_abbr.lower()]}_{model_type}"
+    return os.path.join(cube_dir, f"{name}.npy"), os.path.join(cube_dir, f"{name}.json")
+
+
+def source_fingerprint(month_abbr):
+    """
+    Content fingerprint of the files load_reference_files reads for a month,
+    the same value the API's model registry records for the loaded month.
+    """
+    return artifact_fingerprint(reference_file_paths(month_abbr))[0]
+
+
+def build_score_cube(resources, model_type, dtype="float16", zones=None, block_size=8, fingerprint=None):
+    """
+    Scores every (pickup, dropoff, day, hour) cell of a month.
+
+    Args:
+        resources (dict): Output of load_reference_files.
+        model_type (str): "xgb" or "lgb".
+        dtype (str): "float16" (raw scores) or "uint8" (quantized final scores).
+        zones (list): Zone names to include, defaults to every zone in the reference tables.
+        block_size (int): Pickup zones per predict call, bounds peak memory.
+        fingerprint (str): source_fingerprint of the files resources were loaded from.
+
+    Returns:
+        tuple: (cube array, manifest dict)
+    """
+    if dtype not in CUBE_DTYPES:
+        raise ValueError(f"Unsupported cube dtype: {dtype}")
+
+    tables = resources.get("reference_tables")
+    if tables is None:
+        tables = ReferenceTables(resources["hotness_df"], resources["duration_df"], resources["borough_map"])
+    refs = dict(resources, reference_tables=tables)
+    model = resources[f"{model_type}_model"]
+    scaler = resources["scaler"]
+
+    zones = np.asarray(tables.zones if zones is None else list(zones), dtype=object)
+    n_zones = len(zones)
+    cells_per_pickup = n_zones * DAYS_PER_WEEK * HOURS_PER_DAY
+
+    # (dropoff, day, hour) grid shared by every pickup zone, in C order
+    dropoff_grid = np.repeat(zones, DAYS_PER_WEEK * HOURS_PER_DAY)
+    day_grid = np.tile(np.repeat(np.arange(DAYS_PER_WEEK), HOURS_PER_DAY), n_zones)
+    hour_grid = np.tile(np.arange(HOURS_PER_DAY), n_zones * DAYS_PER_WEEK)
+
+    raw = np.empty((n_zones, n_zones, DAYS_PER_WEEK, HOURS_PER_DAY), dtype=np.float32)
+    for start in range(0, n_zones, block_size):
+        block = zones[start:start + block_size]
+        features = build_features(
+            np.repeat(block, cells_per_pickup),
+            np.tile(dropoff_grid, len(block)),
+            np.tile(day_grid, len(block)),
+            np.tile(hour_grid, len(block)),
+            model_type,
+            refs
+        )
+        raw[start:start + len(block)] = native_model(model).predict(features).astype(np.float32).reshape(
+            len(block), n_zones, DAYS_PER_WEEK, HOURS_PER_DAY
+        )
+
+    p_min, p_max = scaler["min"], scaler["max"]
+    if dtype == "float16":
+        cube = raw.astype(np.float16)
+        # Half a float16 ulp at the largest score, carried through the scaler
+        max_abs = float(np.abs(raw).max()) if raw.size else 0.0
+        tolerance = 0.5 * float(np.spacing(np.float16(max_abs))) / (p_max - p_min)
+    else:
+        final = np.clip((np.clip(raw, p_min, p_max) - p_min) / (p_max - p_min), 0, 1)
+        cube = np.round(final * UINT8_LEVELS).astype(np.uint8)
+        tolerance = 0.5 / UINT8_LEVELS
+
+    manifest = {
+        "model_type": model_type,
+        "dtype": dtype,
+        "zones": [str(z) for z in zones],
+        "scaler": {"min": p_min, "max": p_max},
+        "final_score_tolerance": tolerance,
+        "source_fingerprint": fingerprint,
+        "built_at": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    }
+    return cube, manifest
+
+
+def save_score_cube(cube, manifest, cube_dir, month_abbr):
+    os.makedirs(cube_dir, exist_ok=True)
+    cube_path, manifest_path = cube_paths(cube_dir, month_abbr, manifest["model_type"])
+    np.save(cube_path, cube)
+    with open(manifest_path, "w") as f:
+        json.dump(dict(manifest, month=month_abbr.lower()), f)
+    return cube_path, manifest_path
+
+
+class ScoreCube:
+    """
+    Read-only, memory-mapped score cube for one month and model.
+    """
+
+    def __init__(self, cube, manifest):
+        self.cube = cube
+        self.manifest = manifest
+        self.dtype = manifest["dtype"]
+        self.p_min = manifest["scaler"]["min"]
+        self.p_max = manifest["scaler"]["max"]
+        self.zones = pd.Index(manifest["zones"])
+        self.zone_codes = {zone: code for code, zone in enumerate(manifest["zones"])}
+        # None for cubes built before the manifest recorded it
+        self.source_fingerprint = manifest.get("source_fingerprint")
+
+    @classmethod
+    def load(cls, cube_dir, month_abbr, model_type):
+        """
+        Returns the cube for (month, model) or None if it has not been built.
+        """
+        cube_path, manifest_path = cube_paths(cube_dir, month_abbr, model_type)
+        if not (os.path.exists(cube_path) and os.path.exists(manifest_path)):
+            return None
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        return cls(np.load(cube_path, mmap_mode="r"), manifest)
+
+    def to_scores(self, values):
+        """
+        Converts stored cube values to (predicted_score, final_score) arrays.
+        """
+        values = np.asarray(values)
+        if self.dtype == "uint8":
+            final = values.astype(np.float64) / UINT8_LEVELS
+            return self.p_min + final * (self.p_max - self.p_min), final
+        raw = values.astype(np.float64)
+        final = np.clip((np.clip(raw, self.p_min, self.p_max) - self.p_min) / (self.p_max - self.p_min), 0, 1)
+        return raw, final
+
+    def lookup(self, pickup_zones, dropoff_zones, day_of_week, hour):
+        """
+        Vectorized lookup. Returns (predicted_scores, final_scores, found mask);
+        rows with a zone outside the cube are not found and must go to the model.
+        """
+        pickup_codes = self.zones.get_indexer(pd.Index(pickup_zones, dtype=object))
+        dropoff_codes = self.zones.get_indexer(pd.Index(dropoff_zones, dtype=object))
+        found = (pickup_codes >= 0) & (dropoff_codes >= 0)
+        values = self.cube[
+            np.where(found, pickup_codes, 0),
+            np.where(found, dropoff_codes, 0),
+            np.asarray(day_of_week, dtype=np.int64),
+            np.asarray(hour, dtype=np.int64)
+        ]
+        predicted, final = self.to_scores(values)
+        return predicted, final, found
+
+    def score_trip(self, pickup_zone, dropoff_zone, pickup_datetime_str):
+        """
+        Same output as scoring_utils.score_trip, or None if the trip is not in the cube.
+        """
+        pickup_code = self.zone_codes.get(pickup_zone)
+        dropoff_code = self.zone_codes.get(dropoff_zone)
+        if pickup_code is None or dropoff_code is None:
+            return None
+        try:
+            pickup_datetime = datetime.strptime(pickup_datetime_str, "%m/%d/%Y %I:%M:%S %p")
+        except ValueError:
+            return None
+
+        value = self.cube[pickup_code, dropoff_code, pickup_datetime.weekday(), pickup_datetime.hour]
+        predicted, final = self.to_scores(value)
+        return {
+            "predicted_score": round(float(predicted), 2),
+            "final_score": round(float(final), 4)
+        }
+
+    def score_trips(self, trips):
+        """
+        Batch version of score_trip: one entry per trip, None where the trip is
+        not in the cube or its datetime cannot be parsed.
+        """
+        df = pd.DataFrame(list(trips), columns=["pickup_zone", "dropoff_zone", "pickup_datetime"])
+        pickup_datetime = pd.to_datetime(df["pickup_datetime"], format="%m/%d/%Y %I:%M:%S %p", errors="coerce")
+        valid = pickup_datetime.notna().to_numpy()
+
+        predicted, final, found = self.lookup(
+            df["pickup_zone"].to_numpy(dtype=object),
+            df["dropoff_zone"].to_numpy(dtype=object),
+            np.where(valid, pickup_datetime.dt.dayofweek.fillna(0), 0),
+            np.where(valid, pickup_datetime.dt.hour.fillna(0), 0)
+        )
+        return [
+            {"predicted_score": round(float(p), 2), "final_score": round(float(f), 4)} if ok else None
+            for p, f, ok in zip(predicted, final, found & valid)
+        ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build precomputed trip score cubes")
+    parser.add_argument("--month", required=True, nargs="+", help="Month abbreviation(s), e.g. jul aug")
+    parser.add_argument("--model", choices=["xgb", "lgb"], nargs="+", default=["xgb", "lgb"])
+    parser.add_argument("--dtype", choices=CUBE_DTYPES, default="float16")
+    parser.add_argument("--output-dir", default=DEFAULT_CUBE_DIR)
+    parser.add_argument("--block-size", type=int, default=8, help="Pickup zones per predict call")
+    args = parser.parse_args()
+
+    for month_abbr in args.month:
+        fingerprint = source_fingerprint(month_abbr)
+        resources = load_reference_files(month_abbr)
+        for model_type in args.model:
+            start = time.perf_counter()
+            cube, manifest = build_score_cube(
+                resources, model_type, args.dtype, block_size=args.block_size, fingerprint=fingerprint
+            )
+            cube_path, _ = save_score_cube(cube, manifest, args.output_dir, month_abbr)
+            print(f"Built {cube_path} {cube.shape} {cube.dtype} "
+                  f"({cube.nbytes / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
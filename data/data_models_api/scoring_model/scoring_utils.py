@@ -6,9 +6,15 @@ import os
 import json
 import pickle
 import joblib
+import logging
 from datetime import datetime
 from sklearn.preprocessing import MinMaxScaler
+from reference_tables import ReferenceTables
+from month_bundle import bundle_files, bundle_manifest_path, has_bundle, load_month_bundle
+from native_model import native_model
+from stage_timing import span
 
+logger = logging.getLogger(__name__)
 
 # Load zone → borough map (used for encoding)
 ZONE_COORDINATES_PATH = os.path.join("Data", "zone_coordinates.csv")
@@ -17,29 +23,52 @@ try:
     zones_df = pd.read_csv(ZONE_COORDINATES_PATH, encoding="ISO-8859-1")
     borough_map = zones_df.set_index("zone")["borough"].to_dict()
 except Exception as e:
-    print(f"Failed to load borough map: {e}")
+    logger.warning("Failed to load borough map: %s", e)
     borough_map = {}  # fallback
 
 
-# Load all required files for a given month
-def load_reference_files(month_abbr):
-    # Map 3-letter abbreviation to full lowercase month name
-    month_lookup = {
-        "jan": "january", "feb": "february", "mar": "march", "apr": "april",
-        "may": "may", "jun": "june", "jul": "july", "aug": "august",
-        "sep": "september", "oct": "october", "nov": "november", "dec": "december"
-    }
+# Map 3-letter abbreviation to full lowercase month name
+MONTH_LOOKUP = {
+    "jan": "january", "feb": "february", "mar": "march", "apr": "april",
+    "may": "may", "jun": "june", "jul": "july", "aug": "august",
+    "sep": "september", "oct": "october", "nov": "november", "dec": "december"
+}
 
-    month_folder = month_lookup.get(month_abbr.lower())  # e.g., "july"
-    if not month_folder:
+
+# Per-month bundles written by month_bundle.py, preferred over the source files
+BUNDLE_DIR = os.environ.get(
+    "SCORING_BUNDLE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "bundles")
+)
+
+
+def bundle_path(month_abbr):
+    """
+    Bundle directory of a month, e.g. bundles/jul. The path is fixed, no probing.
+    """
+    if month_abbr.lower() not in MONTH_LOOKUP:
         raise ValueError(f"Invalid month abbreviation: {month_abbr}")
+    return os.path.join(BUNDLE_DIR, month_abbr.lower())
 
-    # Debug: Print current working directory and path construction
-    print(f"DEBUG: Current working directory: {os.getcwd()}")
-    print(f"DEBUG: __file__ location: {__file__}")
-    print(f"DEBUG: Month abbreviation: {month_abbr}")
-    print(f"DEBUG: Month folder: {month_folder}")
-    
+
+# Folder holding {month}/ and expected_columns/, replaces the probing below when set
+MODEL_DIR = os.environ.get("SCORING_MODEL_DIR")
+
+
+# Locate the folders holding a month's source files
+def find_month_paths(month_abbr):
+    """
+    Returns (month_folder, base_path, expected_columns_path) for a month,
+    from MODEL_DIR when set, otherwise probing the local, Docker and
+    working-directory layouts.
+    """
+    month_folder = MONTH_LOOKUP.get(month_abbr.lower())  # e.g., "july"
+    if not month_folder:
+        raise ValueError(f"Invalid month abbreviation: {month_abbr}")
+    if MODEL_DIR:
+        base_path = os.path.join(MODEL_DIR, month_folder)
+        if not os.path.exists(os.path.join(base_path, f"model_{month_folder}_xgb.pkl")):
+            raise FileNotFoundError(f"Could not find models directory for month: {month_folder} in {MODEL_DIR}")
+        return month_folder, base_path, os.path.join(MODEL_DIR, "expected_columns")
     # Try multiple possible paths, prioritizing relative to this file
     script_dir = os.path.dirname(os.path.abspath(__file__))
     possible_paths = [
@@ -63,24 +92,126 @@ def load_reference_files(month_abbr):
     
     base_path = None
     for path in possible_paths:
-        print(f"DEBUG: Checking path: {path}")
         test_file = os.path.join(path, f"model_{month_folder}_xgb.pkl")
         if os.path.exists(test_file):
-            print(f"DEBUG: Found models at: {path}")
+            logger.debug("Found models for %s at %s", month_folder, path)
             base_path = path
             break
-        else:
-            print(f"DEBUG: Path not found: {test_file}")
     
     if base_path is None:
-        print(f"DEBUG: No valid path found. Listing directory contents:")
-        print(f"DEBUG: Script directory: {script_dir}")
-        print(f"DEBUG: Contents of script directory: {os.listdir(script_dir)}")
-        print(f"DEBUG: Contents of current directory: {os.listdir('.')}")
-        if os.path.exists("data"):
-            print(f"DEBUG: Contents of data/: {os.listdir('data')}")
+        logger.debug(
+            "No models directory for %s, checked %s (cwd %s, script dir %s)",
+            month_folder, possible_paths, os.getcwd(), script_dir
+        )
         raise FileNotFoundError(f"Could not find models directory for month: {month_folder}")
 
+    # Try multiple paths for expected_columns
+    possible_expected_paths = [
+        # In models directory
+        os.path.join(script_dir, "models", "expected_columns"),
+        # As sibling to month folder
+        os.path.join(os.path.dirname(base_path), "expected_columns"),
+        # In script directory directly
+        os.path.join(script_dir, "expected_columns"),
+        # Absolute Docker paths
+        os.path.join("/app", "data", "data_models_api", "scoring_model", "models", "expected_columns"),
+        os.path.join("/app", "data", "data_models_api", "scoring_model", "expected_columns"),
+        # From working directory
+        os.path.join("data", "data_models_api", "scoring_model", "models", "expected_columns"),
+        os.path.join("data", "data_models_api", "scoring_model", "expected_columns"),
+        # Legacy paths
+        os.path.join("models", "expected_columns"),
+        "expected_columns"
+    ]
+    
+    expected_columns_path = None
+    for path in possible_expected_paths:
+        if os.path.exists(os.path.join(path, "expected_columns_xgb.pkl")):
+            expected_columns_path = path
+            logger.debug("Found expected_columns at %s", path)
+            break
+    
+    if expected_columns_path is None:
+        raise FileNotFoundError("Could not find expected_columns directory")
+
+    return month_folder, base_path, expected_columns_path
+
+
+def source_file_paths(month_abbr):
+    """
+    Every file load_source_files reads for a month.
+    """
+    month_folder, base_path, expected_columns_path = find_month_paths(month_abbr)
+    return [
+        os.path.join(base_path, f"model_{month_folder}_xgb.pkl"),
+        os.path.join(base_path, f"model_{month_folder}_lgb.pkl"),
+        os.path.join(base_path, f"scoring_weights_{month_folder}.json"),
+        os.path.join(base_path, f"scaler_{month_folder}.json"),
+        os.path.join(base_path, f"hotness_table_{month_folder}.csv"),
+        os.path.join(base_path, f"duration_variability_{month_folder}.csv"),
+        os.path.join(expected_columns_path, "expected_columns_xgb.pkl"),
+        os.path.join(expected_columns_path, "expected_columns_lgb.pkl"),
+    ]
+
+
+# (month, bundle path, MODEL_DIR) -> (bundle manifest mtime or None, resolved paths)
+_reference_paths = {}
+
+
+def reference_file_paths(month_abbr):
+    """
+    Every file load_reference_files reads for a month: the bundle's files
+    if the month has a bundle, its source files otherwise.
+
+    The model registry calls this on every staleness check, so the resolved
+    paths are cached per month and only re-resolved when the bundle manifest
+    appears, changes or goes away. Source files that move need a restart.
+    """
+    path = bundle_path(month_abbr)
+    try:
+        manifest_mtime = os.path.getmtime(bundle_manifest_path(path))
+    except OSError:
+        manifest_mtime = None
+    key = (month_abbr.lower(), path, MODEL_DIR)
+    cached = _reference_paths.get(key)
+    if cached is None or cached[0] != manifest_mtime:
+        paths = bundle_files(path) if manifest_mtime is not None else source_file_paths(month_abbr)
+        cached = _reference_paths[key] = (manifest_mtime, paths)
+    return list(cached[1])
+
+
+def available_months(bundles=True):
+    """
+    Month abbreviations that have a bundle (unless bundles is False) or a model folder.
+    """
+    months = []
+    for month_abbr in MONTH_LOOKUP:
+        if bundles and has_bundle(bundle_path(month_abbr)):
+            months.append(month_abbr)
+            continue
+        try:
+            find_month_paths(month_abbr)
+        except FileNotFoundError:
+            continue
+        months.append(month_abbr)
+    return months
+
+
+# Load all required files for a given month
+def load_reference_files(month_abbr):
+    """
+    Loads a month's models and reference tables, from its bundle when one
+    has been built and from the source files otherwise.
+    """
+    path = bundle_path(month_abbr)
+    if has_bundle(path):
+        return load_month_bundle(path)
+    return load_source_files(month_abbr)
+
+
+def load_source_files(month_abbr):
+    month_folder, base_path, expected_columns_path = find_month_paths(month_abbr)
+
     try:
         with open(os.path.join(base_path, f"model_{month_folder}_xgb.pkl"), "rb") as f:
             xgb_model = pickle.load(f)
@@ -95,45 +226,18 @@ def load_reference_files(month_abbr):
         hotness_df = pd.read_csv(
         os.path.join(base_path, f"hotness_table_{month_folder}.csv")
         ).rename(columns=lambda x: x.strip())
-        print(" Hotness columns:", hotness_df.columns.tolist())  # ← add this line
+        logger.debug("Hotness columns: %s", hotness_df.columns.tolist())
 
         duration_df = pd.read_csv(
         os.path.join(base_path, f"duration_variability_{month_folder}.csv")
         ).rename(columns=lambda x: x.strip())
         
-        # Try multiple paths for expected_columns
-        possible_expected_paths = [
-            # In models directory
-            os.path.join(script_dir, "models", "expected_columns"),
-            # As sibling to month folder
-            os.path.join(os.path.dirname(base_path), "expected_columns"),
-            # In script directory directly
-            os.path.join(script_dir, "expected_columns"),
-            # Absolute Docker paths
-            os.path.join("/app", "data", "data_models_api", "scoring_model", "models", "expected_columns"),
-            os.path.join("/app", "data", "data_models_api", "scoring_model", "expected_columns"),
-            # From working directory
-            os.path.join("data", "data_models_api", "scoring_model", "models", "expected_columns"),
-            os.path.join("data", "data_models_api", "scoring_model", "expected_columns"),
-            # Legacy paths
-            os.path.join("models", "expected_columns"),
-            "expected_columns"
-        ]
-        
-        expected_columns_path = None
-        for path in possible_expected_paths:
-            print(f"DEBUG: Checking expected_columns path: {path}")
-            if os.path.exists(os.path.join(path, "expected_columns_xgb.pkl")):
-                expected_columns_path = path
-                print(f"DEBUG: Found expected_columns at: {path}")
-                break
-        
-        if expected_columns_path is None:
-            raise FileNotFoundError("Could not find expected_columns directory")
-        
         expected_columns_xgb = joblib.load(os.path.join(expected_columns_path, "expected_columns_xgb.pkl"))
         expected_columns_lgb = joblib.load(os.path.join(expected_columns_path, "expected_columns_lgb.pkl"))
 
+        # Compile the lookup tables once so requests index arrays instead of merging
+        reference_tables = ReferenceTables(hotness_df, duration_df, borough_map)
+
         return {
             "xgb_model": xgb_model,
             "lgb_model": lgb_model,
@@ -145,87 +249,112 @@ def load_reference_files(month_abbr):
                 "xgb": expected_columns_xgb,
                 "lgb": expected_columns_lgb
             },
-            "borough_map": borough_map
+            "borough_map": borough_map,
+            "reference_tables": reference_tables
         }
     except FileNotFoundError as e:
-        print(f" File not found in '{base_path}': {e}")
+        logger.error("File not found in '%s': %s", base_path, e)
         raise
 
 
 # Feature generation logic (from raw input)
 def prepare_input(pickup_zone, dropoff_zone, pickup_datetime_str, model_type, refs):
-    try:
-        pickup_datetime = datetime.strptime(pickup_datetime_str, "%m/%d/%Y %I:%M:%S %p")
-    except ValueError:
-        return None, "Invalid datetime format. Expected: MM/DD/YYYY HH:MM:SS AM/PM"
+    full_df, errors = prepare_inputs([(pickup_zone, dropoff_zone, pickup_datetime_str)], model_type, refs)
+    if errors[0]:
+        return None, errors[0]
+    return full_df, None
+
+# Vectorized feature generation for many trips at once
+def prepare_inputs(trips, model_type, refs):
+    """
+    Builds model features for a batch of trips in a single vectorized pass.
+
+    Args:
+        trips (list): (pickup_zone, dropoff_zone, pickup_datetime_str) tuples.
+        model_type (str): "xgb" or "lgb", selects the expected columns.
+        refs (dict): Same reference dict used by prepare_input.
+
+    Returns:
+        tuple: (DataFrame of features for the valid trips, indexed by their
+        position in `trips`, list with an error string or None per trip)
+    """
+    df = pd.DataFrame(list(trips), columns=["pickup_zone", "dropoff_zone", "pickup_datetime"])
+    df["pickup_datetime"] = pd.to_datetime(
+        df["pickup_datetime"], format="%m/%d/%Y %I:%M:%S %p", errors="coerce"
+    )
 
-    df = pd.DataFrame([{
-        "pickup_zone": pickup_zone,
-        "dropoff_zone": dropoff_zone,
-        "pickup_datetime": pickup_datetime
-    }])
+    invalid = df["pickup_datetime"].isna().to_numpy()
+    errors = [
+        "Invalid datetime format. Expected: MM/DD/YYYY HH:MM:SS AM/PM" if bad else None
+        for bad in invalid
+    ]
+    df = df[~invalid]
+
+    full_df = build_features(
+        df["pickup_zone"].to_numpy(dtype=object),
+        df["dropoff_zone"].to_numpy(dtype=object),
+        df["pickup_datetime"].dt.dayofweek.to_numpy(),
+        df["pickup_datetime"].dt.hour.to_numpy(),
+        model_type,
+        refs
+    )
+    full_df.index = df.index
+
+    return full_df, errors
+
+
+def build_features(pickup_zones, dropoff_zones, day_of_week, hour, model_type, refs):
+    """
+    Builds the model feature frame from per-trip arrays of zone names, day of
+    week (Monday=0) and hour. Every scoring input depends only on these four values.
+    """
+    df = pd.DataFrame({
+        "pickup_zone": pickup_zones,
+        "dropoff_zone": dropoff_zones,
+        "pickup_day_of_week": np.asarray(day_of_week, dtype=np.int64),
+        "pickup_hour": np.asarray(hour, dtype=np.int64)
+    })
 
     # Extract time-based features
-    df["pickup_hour"] = df["pickup_datetime"].dt.hour
-    df["pickup_day_of_week"] = df["pickup_datetime"].dt.dayofweek
-    df["dropoff_day_of_week"] = df["pickup_day_of_week"]
     df["is_weekend"] = df["pickup_day_of_week"].isin([5, 6]).astype(int)
     df["sin_hour"] = np.sin(2 * np.pi * df["pickup_hour"] / 24)
     df["cos_hour"] = np.cos(2 * np.pi * df["pickup_hour"] / 24)
-    df["dropoff_hour"] = df["pickup_hour"]
-
-    # Merge dropoff hotness (with column rename fix)
-    hotness_df = refs["hotness_df"].rename(columns={
-    "pickup_day_of_week": "hotness_day_of_week",
-    "pickup_hour": "hotness_hour"
-    })
-    df = df.merge(
-        hotness_df,
-        how="left",
-        left_on=["dropoff_zone", "dropoff_day_of_week", "dropoff_hour"],
-        right_on=["dropoff_zone", "hotness_day_of_week", "hotness_hour"]
-    )
-    df["dropoff_zone_hotness"] = df["dropoff_zone_hotness"].fillna(0)
 
-    # Merge trip duration variability (no rename needed)
-    df = df.merge(
-        refs["duration_df"],
-        how="left",
-        on=["pickup_zone", "dropoff_zone", "pickup_day_of_week", "pickup_hour"]
-    )
-    df["trip_duration_variability"] = df["trip_duration_variability"].fillna(0)
+    # Look up hotness and duration variability from the compiled tables
+    tables = refs.get("reference_tables")
+    if tables is None:
+        tables = ReferenceTables(refs["hotness_df"], refs["duration_df"], refs["borough_map"])
+    pickup_codes = tables.zone_codes(df["pickup_zone"])
+    dropoff_codes = tables.zone_codes(df["dropoff_zone"])
+    day_of_week = df["pickup_day_of_week"].to_numpy()
+    hour = df["pickup_hour"].to_numpy()
 
-    # Map boroughs
-    borough_map = refs["borough_map"]
-    df["pickup_borough"] = df["pickup_zone"].map(borough_map).fillna("Unknown")
-    df["dropoff_borough"] = df["dropoff_zone"].map(borough_map).fillna("Unknown")
+    df["dropoff_zone_hotness"] = tables.dropoff_hotness(dropoff_codes, day_of_week, hour)
+    df["trip_duration_variability"] = tables.duration_variability(pickup_codes, dropoff_codes, day_of_week, hour)
 
     # Flag airport trips
     df["is_airport_trip"] = (
-        df["pickup_zone"].str.contains("Airport") |
-        df["dropoff_zone"].str.contains("Airport")
+        tables.is_airport(pickup_codes, df["pickup_zone"]) |
+        tables.is_airport(dropoff_codes, df["dropoff_zone"])
     ).astype(int)
 
-    # One-hot encode
-    cat_cols = ["is_airport_trip", "pickup_borough", "dropoff_borough"]
-    df_encoded = pd.get_dummies(df[cat_cols], drop_first=True)
-
-    # Combine numeric + encoded
-    numeric_cols = ["dropoff_zone_hotness", "trip_duration_variability", "sin_hour", "cos_hour", "is_weekend"]
-    full_df = pd.concat([df[numeric_cols], df_encoded], axis=1)
-
-    # Align columns
+    # Align to the expected columns. The per-request pipeline ran
+    # get_dummies(drop_first=True) on a one-row frame, which drops the only
+    # borough category it sees, so the served models always got zeros in the
+    # pickup_borough_*/dropoff_borough_* columns. Keep them at zero so batch
+    # and single-trip scores match what /score_* returned before.
     expected_cols = refs["expected_columns"][model_type]
-    for col in expected_cols:
-        if col not in full_df.columns:
-            full_df[col] = 0
-    full_df = full_df[expected_cols]
+    full_df = pd.DataFrame(0.0, index=df.index, columns=expected_cols)
+    numeric_cols = ["dropoff_zone_hotness", "trip_duration_variability", "sin_hour", "cos_hour", "is_weekend", "is_airport_trip"]
+    for col in numeric_cols:
+        if col in full_df.columns:
+            full_df[col] = df[col].astype(float)
 
-    return full_df, None
+    return full_df
 
 # Final prediction + normalization
 def score_input(input_df, model, scaler):
-    raw_score = model.predict(input_df)[0]
+    raw_score = native_model(model).predict(input_df)[0]
 
     # Use stored percentile-based range
     p_min = scaler["min"]
@@ -238,46 +367,101 @@ def score_input(input_df, model, scaler):
     return raw_score, norm_score
 
 
-def score_trip(pickup_zone, dropoff_zone, pickup_datetime, model, weights, scaler, hotness_table, duration_table, borough_map, expected_columns):
+# Batched prediction + normalization (one predict call for every row)
+def score_inputs(input_df, model, scaler):
+    raw_scores = native_model(model).predict(input_df)
+
+    p_min = scaler["min"]
+    p_max = scaler["max"]
+
+    clipped = np.clip(raw_scores, p_min, p_max)
+    norm_scores = np.clip((clipped - p_min) / (p_max - p_min), 0, 1)
+
+    return raw_scores, norm_scores
+
+
+def score_trip(pickup_zone, dropoff_zone, pickup_datetime, model, weights, scaler, hotness_table, duration_table, borough_map, expected_columns, reference_tables=None):
     refs = {
         "hotness_df": hotness_table,
         "duration_df": duration_table,
         "final_weights": weights,
         "scaler": scaler,
         "borough_map": borough_map,
-        "expected_columns": expected_columns
+        "expected_columns": expected_columns,
+        "reference_tables": reference_tables
     }
 
     model_type = "xgb" if "XGB" in type(model).__name__ else "lgb"
 
-    input_df, err = prepare_input(pickup_zone, dropoff_zone, pickup_datetime, model_type, refs)
+    with span("score_trip", "prepare_input"):
+        input_df, err = prepare_input(pickup_zone, dropoff_zone, pickup_datetime, model_type, refs)
     if err:
-        print("Error during feature prep:", err)
+        logger.info("Error during feature prep: %s", err)
         return None
-    
-     #  Add  DEBUG block
-    print("\n DEBUG INFO")
-    print("Pickup zone:", pickup_zone)
-    print("Dropoff zone:", dropoff_zone)
-    print("Pickup datetime:", pickup_datetime)
-    print("Prepared input row:")
-    print(input_df.head(1).to_dict(orient='records'))
-    if "dropoff_zone_hotness" in input_df.columns:
-        print("Hotness:", input_df['dropoff_zone_hotness'].iloc[0])
-    if "trip_duration_variability" in input_df.columns:
-        print("Duration variability:", input_df['trip_duration_variability'].iloc[0])
-    #  End DEBUG block
-    
+
+    # Building the record is not free, so only do it when debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Prepared input row", extra={
+            "pickup_zone": pickup_zone,
+            "dropoff_zone": dropoff_zone,
+            "pickup_datetime": pickup_datetime,
+            "input_row": input_df.head(1).to_dict(orient="records"),
+            "scaler_range": [scaler["min"], scaler["max"]]
+        })
+
     try:
-        predicted_score, final_score = score_input(input_df, model, scaler)
-        print(f"Scaler min/max: {scaler['min']} – {scaler['max']}")
+        with span("score_trip", "predict"):
+            predicted_score, final_score = score_input(input_df, model, scaler)
         return {
             "predicted_score": round(float(predicted_score), 2),
             "final_score": round(float(final_score), 4)
         }
     except Exception as e:
-        print("Scoring failed:", e)
+        logger.exception("Scoring failed: %s", e)
         return None
 
 
+def score_trips(trips, model, weights, scaler, hotness_table, duration_table, borough_map, expected_columns, reference_tables=None):
+    """
+    Scores many trips with one feature pass and a single model.predict call.
+
+    Args:
+        trips (list): (pickup_zone, dropoff_zone, pickup_datetime_str) tuples.
+        Remaining arguments are the same as for score_trip. Pass the
+        reference_tables compiled by load_reference_files to skip rebuilding them.
+
+    Returns:
+        list: One entry per trip, in input order. Each is the same dict that
+        score_trip returns, or None if the trip could not be scored.
+    """
+    refs = {
+        "hotness_df": hotness_table,
+        "duration_df": duration_table,
+        "final_weights": weights,
+        "scaler": scaler,
+        "borough_map": borough_map,
+        "expected_columns": expected_columns,
+        "reference_tables": reference_tables
+    }
+
+    model_type = "xgb" if "XGB" in type(model).__name__ else "lgb"
+
+    with span("score_trips", "prepare_inputs"):
+        input_df, errors = prepare_inputs(trips, model_type, refs)
+    results = [None] * len(errors)
+    if input_df.empty:
+        return results
+
+    try:
+        with span("score_trips", "predict"):
+            predicted_scores, final_scores = score_inputs(input_df, model, scaler)
+    except Exception as e:
+        logger.exception("Batch scoring failed: %s", e)
+        return results
 
+    for idx, predicted_score, final_score in zip(input_df.index, predicted_scores, final_scores):
+        results[idx] = {
+            "predicted_score": round(float(predicted_score), 2),
+            "final_score": round(float(final_score), 4)
+        }
+    return results
@@ -0,0 +1,133 @@
+# stage_timing.py
+"""
+Per-stage latency histograms kept in process.
+
+    with span("hotspots", "predict"):
+        preds = model.predict(df)
+
+Every (pipeline, stage) pair gets a fixed-bucket Histogram the first time it
+is timed. A span is two perf_counter calls, a bisect and an uncontended lock
+(about a microsecond), so the spans stay on in production; STAGE_TIMING=0
+turns them into no-ops. Histograms live in the process that recorded them:
+under gunicorn each worker keeps and exposes its own.
+"""
+
+import math
+import os
+import threading
+from bisect import bisect_left
+from itertools import accumulate
+from time import perf_counter
+
+STAGE_TIMING = os.environ.get("STAGE_TIMING", "1") != "0"
+
+# Upper bounds in seconds, from half a millisecond to a cold model load
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Thread-safe fixed-bucket histogram of durations in seconds, in the
+    Prometheus shape: a value is counted in the first bucket whose upper bound
+    is >= the value, with a final +Inf bucket.
+    """
+
+    __slots__ = ("bounds", "_counts", "_count", "_sum", "_lock")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.bounds, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._sum += seconds
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: "buckets" as (upper bound, cumulative count) pairs ending with
+            +Inf, plus "count" and "sum".
+        """
+        with self._lock:
+            counts = list(self._counts)
+            count, total = self._count, self._sum
+        return {
+            "buckets": list(zip(self.bounds + (math.inf,), accumulate(counts))),
+            "count": count,
+            "sum": total
+        }
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(pipeline, stage):
+    """
+    Returns the histogram for a stage, creating it on first use.
+    """
+    key = (pipeline, stage)
+    hist = _histograms.get(key)
+    if hist is None:
+        with _histograms_lock:
+            hist = _histograms.setdefault(key, Histogram())
+    return hist
+
+
+class _Span:
+    __slots__ = ("_hist", "_start")
+
+    def __init__(self, hist):
+        self._hist = hist
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._hist.observe(perf_counter() - self._start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(pipeline, stage):
+    """
+    Context manager that records the duration of its block (including blocks
+    that raise) in the stage's histogram.
+    """
+    if not STAGE_TIMING:
+        return _NO_SPAN
+    return _Span(histogram(pipeline, stage))
+
+
+def stage_histograms():
+    """
+    Returns:
+        dict: (pipeline, stage) -> Histogram.snapshot() for every timed stage.
+    """
+    with _histograms_lock:
+        items = list(_histograms.items())
+    return {key: hist.snapshot() for key, hist in sorted(items)}
+
+
+def reset():
+    with _histograms_lock:
+        _histograms.clear()
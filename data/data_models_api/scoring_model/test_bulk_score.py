@@ -0,0 +1,113 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bulk_score
+from score_cube import build_score_cube, save_score_cube, source_fingerprint
+from scoring_utils import score_trips
+from july_fixture import load_july_resources, to_datetime_string
+
+
+class TestBulkScore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.resources = load_july_resources()
+        bulk_score._resources["jul"] = cls.resources
+        zones = sorted(cls.resources["hotness_df"]["dropoff_zone"].unique())[:20]
+
+        rng = np.random.default_rng(2)
+        cls.trips = [
+            (rng.choice(zones), rng.choice(zones), to_datetime_string(int(rng.integers(7)), int(rng.integers(24))))
+            for _ in range(250)
+        ]
+        cls.trips[3] = (zones[0], zones[1], "not a date")
+        cls.zones = zones
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.input_path = os.path.join(self.tmp.name, "trips.csv")
+        pd.DataFrame(self.trips, columns=bulk_score.TRIP_COLUMNS).to_csv(self.input_path, index=False)
+        self.output_dir = os.path.join(self.tmp.name, "scored")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_output(self):
+        parts = sorted(p for p in os.listdir(self.output_dir) if p.startswith("part-"))
+        return pd.concat([pd.read_csv(os.path.join(self.output_dir, p)) for p in parts], ignore_index=True)
+
+    def expected_scores(self):
+        r = self.resources
+        return score_trips(
+            self.trips, r["xgb_model"], r["final_weights"], r["scaler"],
+            r["hotness_df"], r["duration_df"], r["borough_map"], r["expected_columns"]
+        )
+
+    def test_matches_batch_scoring(self):
+        summary = bulk_score.run_bulk_scoring(self.input_path, self.output_dir, "xgb", chunk_size=100)
+        self.assertEqual(summary["rows"], 250)
+        self.assertEqual(summary["rows_scored"], 249)
+        self.assertEqual(summary["chunks"], 3)
+
+        output = self.read_output()
+        for (_, row), want in zip(output.iterrows(), self.expected_scores()):
+            if want is None:
+                self.assertTrue(np.isnan(row["final_score"]))
+            else:
+                self.assertAlmostEqual(row["final_score"], want["final_score"], places=4)
+                self.assertAlmostEqual(row["predicted_score"], want["predicted_score"], places=2)
+
+    def test_resume_only_scores_missing_chunks(self):
+        bulk_score.run_bulk_scoring(self.input_path, self.output_dir, "xgb", chunk_size=100)
+        os.remove(bulk_score.part_path(self.output_dir, 1))
+
+        summary = bulk_score.run_bulk_scoring(self.input_path, self.output_dir, "xgb", chunk_size=100)
+        self.assertEqual(summary["chunks"], 1)
+        self.assertEqual(summary["chunks_skipped"], 2)
+        self.assertEqual(len(self.read_output()), 250)
+        with open(os.path.join(self.output_dir, bulk_score.CHECKPOINT_FILE)) as f:
+            checkpoint = json.load(f)
+        self.assertEqual(checkpoint["completed"], [0, 1, 2])
+        self.assertTrue(checkpoint["finished"])
+
+    def test_checkpoint_of_other_run_is_rejected(self):
+        bulk_score.run_bulk_scoring(self.input_path, self.output_dir, "xgb", chunk_size=100)
+        with self.assertRaises(ValueError):
+            bulk_score.run_bulk_scoring(self.input_path, self.output_dir, "xgb", chunk_size=50)
+
+    def test_cube_answers_before_model(self):
+        cube_dir = os.path.join(self.tmp.name, "cubes")
+        cube, manifest = build_score_cube(self.resources, "xgb", zones=self.zones, fingerprint=source_fingerprint("jul"))
+        save_score_cube(cube, manifest, cube_dir, "jul")
+        self.assertIsNotNone(bulk_score.get_cube(cube_dir, "jul", "xgb"))
+
+        bulk_score.run_bulk_scoring(self.input_path, self.output_dir, "xgb", chunk_size=100, cube_dir=cube_dir)
+        output = self.read_output()
+        tolerance = manifest["final_score_tolerance"] + 1e-4
+        for (_, row), want in zip(output.iterrows(), self.expected_scores()):
+            if want is not None:
+                self.assertAlmostEqual(row["final_score"], want["final_score"], delta=tolerance)
+
+    def test_stale_cube_is_not_used(self):
+        cube_dir = os.path.join(self.tmp.name, "cubes")
+        cube, manifest = build_score_cube(self.resources, "xgb", zones=self.zones[:2], fingerprint="old model")
+        save_score_cube(cube, manifest, cube_dir, "jul")
+        self.assertIsNone(bulk_score.get_cube(cube_dir, "jul", "xgb"))
+
+    def test_month_without_models_stays_unscored(self):
+        january = (self.zones[0], self.zones[1], "01/14/2025 10:00:00 AM")
+        df = pd.DataFrame([self.trips[0], january], columns=bulk_score.TRIP_COLUMNS)
+        scored = bulk_score.score_frame(df, "xgb")
+        self.assertFalse(np.isnan(scored["final_score"][0]))
+        self.assertTrue(np.isnan(scored["final_score"][1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import native_model
+from compiled_model import CompiledModel, avoid_missing_alias, export_compiled_model, scoring_sample
+from native_model import NativeModel
+from scoring_utils import prepare_inputs
+from july_fixture import load_july_resources, to_datetime_string
+
+try:
+    import tl2cgen  # noqa: F401
+    import treelite  # noqa: F401
+    HAS_TL2CGEN = True
+except ImportError:
+    HAS_TL2CGEN = False
+
+
+class TestMissingAlias(unittest.TestCase):
+
+    def test_only_aliased_values_move(self):
+        aliased = 0.49999999999999994  # low 32 bits all ones
+        X = np.array([[aliased, 0.5, 1.0]])
+        avoid_missing_alias(X)
+        self.assertEqual(X[0, 0], np.nextafter(aliased, -np.inf))
+        self.assertEqual(list(X[0, 1:]), [0.5, 1.0])
+
+
+@unittest.skipUnless(HAS_TL2CGEN, "treelite and tl2cgen are not installed")
+class TestCompiledModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.resources = load_july_resources()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.meta = {
+            model_type: export_compiled_model(
+                cls.resources[f"{model_type}_model"], cls.tmp.name,
+                scoring_sample(cls.resources, model_type, n=500), source=f"jul {model_type}"
+            )
+            for model_type in ["xgb", "lgb"]
+        }
+
+        zones = sorted(cls.resources["hotness_df"]["dropoff_zone"].unique())
+        rng = np.random.default_rng(6)
+        cls.trips = [
+            (rng.choice(zones), rng.choice(zones), to_datetime_string(int(rng.integers(7)), int(rng.integers(24))))
+            for _ in range(1000)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def compiled(self, model_type):
+        native = NativeModel(self.resources[f"{model_type}_model"])
+        return CompiledModel.load(native, self.tmp.name, self.meta[model_type]["fingerprint"])
+
+    def test_compiled_predictions_match_model(self):
+        for model_type in ["xgb", "lgb"]:
+            features, _ = prepare_inputs(self.trips, model_type, self.resources)
+            expected = self.resources[f"{model_type}_model"].predict(features)
+            compiled = self.compiled(model_type)
+            np.testing.assert_allclose(compiled.predict(features), expected, rtol=0, atol=1e-5)
+            self.assertAlmostEqual(compiled.predict(features.iloc[[7]])[0], expected[7], delta=1e-5)
+
+    def test_native_model_serves_compiled_artifact(self):
+        model = self.resources["lgb_model"]
+        with mock.patch.object(native_model, "COMPILED_MODEL_DIR", self.tmp.name), \
+                mock.patch.object(native_model, "_adapters", native_model.weakref.WeakKeyDictionary()):
+            self.assertIsInstance(native_model.native_model(model), CompiledModel)
+
+    def test_missing_artifact_falls_back_to_booster(self):
+        model = self.resources["xgb_model"]
+        with tempfile.TemporaryDirectory() as empty_dir, \
+                mock.patch.object(native_model, "COMPILED_MODEL_DIR", empty_dir), \
+                mock.patch.object(native_model, "_adapters", native_model.weakref.WeakKeyDictionary()):
+            self.assertIsInstance(native_model.native_model(model), NativeModel)
+
+
+if __name__ == "__main__":
+    unittest.main()
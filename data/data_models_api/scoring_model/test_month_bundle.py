@@ -0,0 +1,88 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import scoring_utils
+from month_bundle import bundle_files, load_month_bundle, write_month_bundle
+from reference_tables import ReferenceTables
+from scoring_utils import score_trips
+from july_fixture import load_july_resources, to_datetime_string
+
+
+class TestMonthBundle(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.resources = load_july_resources()
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.bundle_path = write_month_bundle(cls.resources, os.path.join(cls.tmp.name, "jul"), "jul")
+
+        zones = sorted(cls.resources["hotness_df"]["dropoff_zone"].unique())[:30]
+        rng = np.random.default_rng(3)
+        cls.trips = [
+            (rng.choice(zones), rng.choice(zones), to_datetime_string(int(rng.integers(7)), int(rng.integers(24))))
+            for _ in range(200)
+        ] + [("Not A Zone", zones[0], to_datetime_string(2, 8))]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def score(self, resources, model_type):
+        r = resources
+        return score_trips(
+            self.trips, r[f"{model_type}_model"], r["final_weights"], r["scaler"],
+            r["hotness_df"], r["duration_df"], r["borough_map"], r["expected_columns"],
+            r.get("reference_tables")
+        )
+
+    def test_bundle_scores_match_source_files(self):
+        bundle = load_month_bundle(self.bundle_path)
+        for model_type in ["xgb", "lgb"]:
+            self.assertEqual(self.score(bundle, model_type), self.score(self.resources, model_type))
+
+    def test_tables_are_memory_mapped(self):
+        tables = load_month_bundle(self.bundle_path)["reference_tables"]
+        self.assertIsInstance(tables.hotness, np.memmap)
+        self.assertIsInstance(tables.duration_keys, np.memmap)
+
+        compiled = ReferenceTables(self.resources["hotness_df"], self.resources["duration_df"], self.resources["borough_map"])
+        np.testing.assert_array_equal(tables.hotness, compiled.hotness)
+        np.testing.assert_array_equal(tables.duration_keys, compiled.duration_keys)
+        self.assertEqual(list(tables.zones), list(compiled.zones))
+
+    def test_load_reference_files_prefers_bundle(self):
+        with mock.patch.object(scoring_utils, "BUNDLE_DIR", self.tmp.name):
+            self.assertIn("jul", scoring_utils.available_months())
+            self.assertEqual(scoring_utils.reference_file_paths("jul"), bundle_files(self.bundle_path))
+            with mock.patch.object(scoring_utils, "load_source_files") as load_source_files:
+                resources = scoring_utils.load_reference_files("jul")
+            load_source_files.assert_not_called()
+        self.assertIsNotNone(resources["reference_tables"])
+
+    def test_reference_paths_are_resolved_once(self):
+        with tempfile.TemporaryDirectory() as bundle_dir, \
+                mock.patch.object(scoring_utils, "BUNDLE_DIR", bundle_dir), \
+                mock.patch.dict(scoring_utils._reference_paths, clear=True):
+            with mock.patch.object(scoring_utils, "source_file_paths", return_value=["a.pkl"]) as source_file_paths:
+                self.assertEqual(scoring_utils.reference_file_paths("jul"), ["a.pkl"])
+                self.assertEqual(scoring_utils.reference_file_paths("jul"), ["a.pkl"])
+            source_file_paths.assert_called_once_with("jul")
+
+            # A bundle built later replaces the cached source paths
+            path = write_month_bundle(self.resources, os.path.join(bundle_dir, "jul"), "jul")
+            self.assertEqual(scoring_utils.reference_file_paths("jul"), bundle_files(path))
+
+    def test_rewrite_replaces_bundle(self):
+        path = write_month_bundle(self.resources, os.path.join(self.tmp.name, "aug"), "aug")
+        write_month_bundle(self.resources, path, "aug")
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["aug", "jul"])
+
+
+if __name__ == "__main__":
+    unittest.main()
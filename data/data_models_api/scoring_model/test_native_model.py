@@ -0,0 +1,112 @@
+import unittest
+import os
+import sys
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from native_model import NativeModel, native_model
+from scoring_utils import prepare_inputs, score_trip, score_trips
+from july_fixture import load_july_resources, to_datetime_string
+
+HOTSPOT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "hotspot_model", "models", "hotspot_model_6_to_7.pkl"
+)
+
+
+class TestNativeModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.resources = load_july_resources()
+        zones = sorted(cls.resources["hotness_df"]["dropoff_zone"].unique())
+        rng = np.random.default_rng(4)
+        cls.trips = [
+            (rng.choice(zones), rng.choice(zones), to_datetime_string(int(rng.integers(7)), int(rng.integers(24))))
+            for _ in range(500)
+        ] + [("Newark Airport", "Great Kills", to_datetime_string(6, 23))]
+        cls.features = {
+            model_type: prepare_inputs(cls.trips, model_type, cls.resources)[0] for model_type in ["xgb", "lgb"]
+        }
+
+    def test_batch_predictions_match_sklearn(self):
+        for model_type, features in self.features.items():
+            model = self.resources[f"{model_type}_model"]
+            np.testing.assert_array_equal(NativeModel(model).predict(features), model.predict(features))
+
+    def test_single_row_predictions_match_sklearn(self):
+        for model_type, features in self.features.items():
+            model = self.resources[f"{model_type}_model"]
+            adapter = NativeModel(model)
+            for i in range(0, len(features), 50):
+                row = features.iloc[[i]]
+                self.assertEqual(adapter.predict(row)[0], model.predict(row)[0])
+
+    def test_column_order_and_arrays(self):
+        features = self.features["lgb"]
+        model = self.resources["lgb_model"]
+        adapter = NativeModel(model)
+        expected = model.predict(features)
+        shuffled = features[features.columns[::-1]]
+        np.testing.assert_array_equal(adapter.predict(shuffled), expected)
+        np.testing.assert_array_equal(adapter.predict(features.to_numpy()), expected)
+        with self.assertRaises(ValueError):
+            adapter.predict(features.drop(columns=features.columns[0]))
+        with self.assertRaises(ValueError):
+            adapter.predict(features.to_numpy()[:, :-1])
+
+    def test_hotspot_model_matches_sklearn(self):
+        model = joblib.load(HOTSPOT_MODEL_PATH)
+        rng = np.random.default_rng(5)
+        features = pd.DataFrame(rng.random((263, model.n_features_in_)) * 100, columns=model.feature_name_)
+        np.testing.assert_array_equal(NativeModel(model).predict(features), model.predict(features))
+
+    def test_threads_do_not_share_buffers(self):
+        model = self.resources["xgb_model"]
+        adapter = NativeModel(model)
+        features = self.features["xgb"]
+        expected = model.predict(features)
+        failures = []
+
+        def worker(offset):
+            for _ in range(20):
+                rows = features.iloc[offset::4]
+                if not np.array_equal(adapter.predict(rows), expected[offset::4]):
+                    failures.append(offset)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(failures, [])
+
+    def test_adapter_is_cached_per_model(self):
+        model = self.resources["xgb_model"]
+        self.assertIs(native_model(model), native_model(model))
+        self.assertIsNot(native_model(model), native_model(self.resources["lgb_model"]))
+
+    def test_scoring_functions_unchanged(self):
+        r = self.resources
+        for model_type in ["xgb", "lgb"]:
+            model = r[f"{model_type}_model"]
+            batch = score_trips(
+                self.trips, model, r["final_weights"], r["scaler"], r["hotness_df"],
+                r["duration_df"], r["borough_map"], r["expected_columns"]
+            )
+            features = self.features[model_type]
+            raw = model.predict(features)
+            for idx, result in zip(features.index, (batch[i] for i in features.index)):
+                self.assertEqual(result["predicted_score"], round(float(raw[idx]), 2))
+            single = score_trip(
+                *self.trips[0], model, r["final_weights"], r["scaler"], r["hotness_df"],
+                r["duration_df"], r["borough_map"], r["expected_columns"]
+            )
+            self.assertEqual(single, batch[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
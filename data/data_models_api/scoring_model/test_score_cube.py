@@ -0,0 +1,70 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from score_cube import build_score_cube, save_score_cube, ScoreCube
+from scoring_utils import score_trips
+from july_fixture import load_july_resources, to_datetime_string
+
+
+class TestScoreCube(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.resources = load_july_resources()
+        zones = sorted(cls.resources["hotness_df"]["dropoff_zone"].unique())[:20]
+        cls.zones = zones + ["JFK Airport"]
+
+        rng = np.random.default_rng(1)
+        cls.trips = [
+            (rng.choice(cls.zones), rng.choice(cls.zones), to_datetime_string(int(rng.integers(7)), int(rng.integers(24))))
+            for _ in range(200)
+        ]
+        cls.cube_dir = tempfile.mkdtemp()
+
+    def check_cube_matches_model(self, model_type, dtype):
+        r = self.resources
+        cube, manifest = build_score_cube(r, model_type, dtype, zones=self.zones)
+        save_score_cube(cube, manifest, self.cube_dir, "jul")
+        loaded = ScoreCube.load(self.cube_dir, "jul", model_type)
+        self.assertIsInstance(loaded.cube, np.memmap)
+
+        expected = score_trips(
+            self.trips, r[f"{model_type}_model"], r["final_weights"], r["scaler"],
+            r["hotness_df"], r["duration_df"], r["borough_map"], r["expected_columns"]
+        )
+        batch = loaded.score_trips(self.trips)
+        single = [loaded.score_trip(*trip) for trip in self.trips]
+        self.assertEqual(batch, single)
+
+        # Both sides round final_score to 4 decimals for the response
+        tolerance = manifest["final_score_tolerance"] + 1e-4
+        for want, got in zip(expected, batch):
+            self.assertAlmostEqual(want["final_score"], got["final_score"], delta=tolerance)
+
+    def test_float16_cube_matches_model_scores(self):
+        for model_type in ["xgb", "lgb"]:
+            self.check_cube_matches_model(model_type, "float16")
+
+    def test_uint8_cube_matches_model_scores(self):
+        self.check_cube_matches_model("xgb", "uint8")
+
+    def test_manifest_records_the_source_fingerprint(self):
+        cube, manifest = build_score_cube(self.resources, "xgb", zones=self.zones[:2], fingerprint="abc123")
+        save_score_cube(cube, manifest, self.cube_dir, "aug")
+        self.assertEqual(ScoreCube.load(self.cube_dir, "aug", "xgb").source_fingerprint, "abc123")
+
+    def test_trips_outside_cube_are_not_found(self):
+        cube, manifest = build_score_cube(self.resources, "xgb", zones=self.zones[:2])
+        loaded = ScoreCube(cube, manifest)
+        self.assertIsNone(loaded.score_trip("Not A Zone", self.zones[0], "07/24/2025 3:00:00 PM"))
+        self.assertIsNone(loaded.score_trip(self.zones[0], self.zones[1], "not a date"))
+        self.assertEqual(loaded.score_trips([(self.zones[0], "Not A Zone", "07/24/2025 3:00:00 PM")]), [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,267 @@
+import unittest
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SCORING_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCORING_DIR)
+from scoring_utils import prepare_inputs, score_trip, score_trips
+from reference_tables import ReferenceTables
+from july_fixture import load_july_resources, to_datetime_string
+
+ZONE_COORDINATES_PATH = os.path.join(SCORING_DIR, "..", "hotspot_model", "zone_coordinates.csv")
+
+
+def load_borough_map():
+    zones_df = pd.read_csv(ZONE_COORDINATES_PATH, usecols=["zone", "borough"], encoding="ISO-8859-1")
+    return zones_df.set_index("zone")["borough"].to_dict()
+
+
+def baseline_prepare_input(pickup_zone, dropoff_zone, pickup_datetime_str, model_type, refs):
+    # Frozen copy of the one-row merge/get_dummies prepare_input that
+    # /score_xgb and /score_lgbm served before batch scoring, do not update it
+    pickup_datetime = datetime.strptime(pickup_datetime_str, "%m/%d/%Y %I:%M:%S %p")
+    df = pd.DataFrame([{
+        "pickup_zone": pickup_zone,
+        "dropoff_zone": dropoff_zone,
+        "pickup_datetime": pickup_datetime
+    }])
+
+    df["pickup_hour"] = df["pickup_datetime"].dt.hour
+    df["pickup_day_of_week"] = df["pickup_datetime"].dt.dayofweek
+    df["dropoff_day_of_week"] = df["pickup_day_of_week"]
+    df["is_weekend"] = df["pickup_day_of_week"].isin([5, 6]).astype(int)
+    df["sin_hour"] = np.sin(2 * np.pi * df["pickup_hour"] / 24)
+    df["cos_hour"] = np.cos(2 * np.pi * df["pickup_hour"] / 24)
+    df["dropoff_hour"] = df["pickup_hour"]
+
+    hotness_df = refs["hotness_df"].rename(columns={
+        "pickup_day_of_week": "hotness_day_of_week",
+        "pickup_hour": "hotness_hour"
+    })
+    df = df.merge(
+        hotness_df,
+        how="left",
+        left_on=["dropoff_zone", "dropoff_day_of_week", "dropoff_hour"],
+        right_on=["dropoff_zone", "hotness_day_of_week", "hotness_hour"]
+    )
+    df["dropoff_zone_hotness"] = df["dropoff_zone_hotness"].fillna(0)
+
+    df = df.merge(
+        refs["duration_df"],
+        how="left",
+        on=["pickup_zone", "dropoff_zone", "pickup_day_of_week", "pickup_hour"]
+    )
+    df["trip_duration_variability"] = df["trip_duration_variability"].fillna(0)
+
+    borough_map = refs["borough_map"]
+    df["pickup_borough"] = df["pickup_zone"].map(borough_map).fillna("Unknown")
+    df["dropoff_borough"] = df["dropoff_zone"].map(borough_map).fillna("Unknown")
+
+    df["is_airport_trip"] = (
+        df["pickup_zone"].str.contains("Airport") |
+        df["dropoff_zone"].str.contains("Airport")
+    ).astype(int)
+
+    cat_cols = ["is_airport_trip", "pickup_borough", "dropoff_borough"]
+    df_encoded = pd.get_dummies(df[cat_cols], drop_first=True)
+
+    numeric_cols = ["dropoff_zone_hotness", "trip_duration_variability", "sin_hour", "cos_hour", "is_weekend"]
+    full_df = pd.concat([df[numeric_cols], df_encoded], axis=1)
+
+    expected_cols = refs["expected_columns"][model_type]
+    for col in expected_cols:
+        if col not in full_df.columns:
+            full_df[col] = 0
+    return full_df[expected_cols]
+
+
+class TestBaselineParity(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.resources = dict(load_july_resources(), borough_map=load_borough_map())
+        sample = cls.resources["duration_df"].sample(40, random_state=1)
+        cls.trips = [
+            (row.pickup_zone, row.dropoff_zone, to_datetime_string(row.pickup_day_of_week, row.pickup_hour))
+            for row in sample.itertuples()
+        ]
+        cls.trips += [
+            ("JFK Airport", "SoHo", "07/24/2025 12:00:00 AM"),
+            ("SoHo", "LaGuardia Airport", "07/26/2025 12:00:00 PM"),
+            ("Newark Airport", "JFK Airport", "07/27/2025 11:59:59 PM"),
+            ("Times Sq/Theatre District", "Midtown Center", "07/25/2025 12:59:59 AM"),
+            ("Unknown Zone", "SoHo", "07/24/2025 1:00:00 PM"),
+            ("SoHo", "Another Unknown Zone", "07/24/2025 11:00:00 AM"),
+            ("Unknown Airport", "Unknown Zone", "07/24/2025 12:30:00 PM"),
+        ]
+
+    def score_kwargs(self, model_key):
+        r = self.resources
+        return dict(
+            model=r[model_key],
+            weights=r["final_weights"],
+            scaler=r["scaler"],
+            hotness_table=r["hotness_df"],
+            duration_table=r["duration_df"],
+            borough_map=r["borough_map"],
+            expected_columns=r["expected_columns"],
+        )
+
+    def test_features_match_baseline_prepare_input(self):
+        for model_type in ["xgb", "lgb"]:
+            batch, errors = prepare_inputs(self.trips, model_type, self.resources)
+            self.assertEqual(errors, [None] * len(self.trips))
+            for idx, trip in enumerate(self.trips):
+                expected = baseline_prepare_input(*trip, model_type, self.resources)
+                np.testing.assert_array_equal(
+                    batch.loc[idx].to_numpy(dtype=float), expected.iloc[0].to_numpy(dtype=float), err_msg=str(trip)
+                )
+
+    def test_scores_match_baseline(self):
+        scaler = self.resources["scaler"]
+        for model_key, model_type in [("xgb_model", "xgb"), ("lgb_model", "lgb")]:
+            kwargs = self.score_kwargs(model_key)
+            batch = score_trips(self.trips, **kwargs)
+            single = [score_trip(*trip, **kwargs) for trip in self.trips]
+            for trip, batch_score, single_score in zip(self.trips, batch, single):
+                raw = kwargs["model"].predict(baseline_prepare_input(*trip, model_type, self.resources))[0]
+                final = np.clip((np.clip(raw, scaler["min"], scaler["max"]) - scaler["min"]) / (scaler["max"] - scaler["min"]), 0, 1)
+                self.assertAlmostEqual(batch_score["predicted_score"], round(float(raw), 2), places=6, msg=str(trip))
+                self.assertAlmostEqual(batch_score["final_score"], round(float(final), 4), places=6, msg=str(trip))
+                self.assertEqual(single_score, batch_score)
+
+
+class TestBatchScoring(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.resources = load_july_resources()
+        sample = cls.resources["duration_df"].head(50)
+        cls.trips = [
+            (row.pickup_zone, row.dropoff_zone, to_datetime_string(row.pickup_day_of_week, row.pickup_hour))
+            for row in sample.itertuples()
+        ]
+        cls.trips.append(("JFK Airport", "SoHo", "07/24/2025 3:00:00 PM"))
+        cls.trips.append(("Unknown Zone", "Another Unknown Zone", "07/24/2025 3:00:00 AM"))
+
+    def score_kwargs(self, model_key):
+        r = self.resources
+        return dict(
+            model=r[model_key],
+            weights=r["final_weights"],
+            scaler=r["scaler"],
+            hotness_table=r["hotness_df"],
+            duration_table=r["duration_df"],
+            borough_map=r["borough_map"],
+            expected_columns=r["expected_columns"],
+        )
+
+    def test_batch_matches_single_trip_scores(self):
+        for model_key in ["xgb_model", "lgb_model"]:
+            kwargs = self.score_kwargs(model_key)
+            batch = score_trips(self.trips, **kwargs)
+            single = [score_trip(*trip, **kwargs) for trip in self.trips]
+            self.assertEqual(batch, single)
+
+    def test_invalid_datetime_is_reported_per_trip(self):
+        trips = [self.trips[0], ("SoHo", "JFK Airport", "not a date"), self.trips[1]]
+        results = score_trips(trips, **self.score_kwargs("xgb_model"))
+        self.assertEqual(len(results), 3)
+        self.assertIsNone(results[1])
+        self.assertIsNotNone(results[0])
+        self.assertIsNotNone(results[2])
+
+
+class TestReferenceTables(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.resources = dict(load_july_resources(), borough_map=load_borough_map())
+        r = cls.resources
+        cls.tables = ReferenceTables(r["hotness_df"], r["duration_df"], r["borough_map"])
+
+    def test_lookups_match_table_rows(self):
+        hotness_df = self.resources["hotness_df"].sample(200, random_state=0)
+        codes = self.tables.zone_codes(hotness_df["dropoff_zone"])
+        values = self.tables.dropoff_hotness(codes, hotness_df["pickup_day_of_week"], hotness_df["pickup_hour"])
+        np.testing.assert_array_equal(values, hotness_df["dropoff_zone_hotness"].to_numpy(dtype=float))
+
+        duration_df = self.resources["duration_df"].sample(200, random_state=0)
+        values = self.tables.duration_variability(
+            self.tables.zone_codes(duration_df["pickup_zone"]),
+            self.tables.zone_codes(duration_df["dropoff_zone"]),
+            duration_df["pickup_day_of_week"],
+            duration_df["pickup_hour"],
+        )
+        np.testing.assert_array_equal(values, duration_df["trip_duration_variability"].to_numpy())
+
+    def test_unknown_zones_look_up_as_zero(self):
+        codes = self.tables.zone_codes(["Not A Zone", "SoHo"])
+        self.assertEqual(codes[0], -1)
+        np.testing.assert_array_equal(self.tables.dropoff_hotness(codes[:1], [0], [0]), [0.0])
+        np.testing.assert_array_equal(self.tables.duration_variability(codes[:1], codes[1:], [0], [0]), [0.0])
+        np.testing.assert_array_equal(self.tables.borough(codes[:1]), ["Unknown"])
+
+    def test_lookups_match_merge_lookups(self):
+        r = self.resources
+        rng = np.random.default_rng(2)
+        zones = np.append(self.tables.zones, ["Not A Zone", "Unknown Airport"]).astype(object)
+        known = r["duration_df"].sample(300, random_state=2)
+        n = 700
+        trips = pd.concat([
+            known[["pickup_zone", "dropoff_zone", "pickup_day_of_week", "pickup_hour"]],
+            pd.DataFrame({
+                "pickup_zone": rng.choice(zones, n),
+                "dropoff_zone": rng.choice(zones, n),
+                "pickup_day_of_week": rng.integers(0, 7, n),
+                "pickup_hour": rng.integers(0, 24, n),
+            })
+        ], ignore_index=True)
+
+        # The df.merge lookups prepare_input ran before the tables were compiled
+        hotness_df = r["hotness_df"].rename(columns={
+            "pickup_day_of_week": "hotness_day_of_week",
+            "pickup_hour": "hotness_hour"
+        })
+        merged = trips.merge(
+            hotness_df,
+            how="left",
+            left_on=["dropoff_zone", "pickup_day_of_week", "pickup_hour"],
+            right_on=["dropoff_zone", "hotness_day_of_week", "hotness_hour"]
+        ).merge(
+            r["duration_df"],
+            how="left",
+            on=["pickup_zone", "dropoff_zone", "pickup_day_of_week", "pickup_hour"]
+        )
+        self.assertEqual(len(merged), len(trips))
+
+        pickup_codes = self.tables.zone_codes(trips["pickup_zone"])
+        dropoff_codes = self.tables.zone_codes(trips["dropoff_zone"])
+        day_of_week = trips["pickup_day_of_week"].to_numpy()
+        hour = trips["pickup_hour"].to_numpy()
+        np.testing.assert_array_equal(
+            self.tables.dropoff_hotness(dropoff_codes, day_of_week, hour),
+            merged["dropoff_zone_hotness"].fillna(0).to_numpy(dtype=float)
+        )
+        np.testing.assert_array_equal(
+            self.tables.duration_variability(pickup_codes, dropoff_codes, day_of_week, hour),
+            merged["trip_duration_variability"].fillna(0).to_numpy()
+        )
+        for zones_column, codes in [("pickup_zone", pickup_codes), ("dropoff_zone", dropoff_codes)]:
+            np.testing.assert_array_equal(
+                self.tables.borough(codes),
+                trips[zones_column].map(r["borough_map"]).fillna("Unknown").to_numpy()
+            )
+            np.testing.assert_array_equal(
+                self.tables.is_airport(codes, trips[zones_column]),
+                trips[zones_column].str.contains("Airport").to_numpy()
+            )
+        self.assertIn("Manhattan", set(self.tables.borough(pickup_codes)))
+
+
+if __name__ == "__main__":
+    unittest.main()
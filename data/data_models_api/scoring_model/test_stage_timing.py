@@ -0,0 +1,58 @@
+import unittest
+import math
+import os
+import sys
+import timeit
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import stage_timing
+from stage_timing import Histogram, span, stage_histograms
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_buckets_are_cumulative_and_upper_inclusive(self):
+        hist = Histogram(bounds=(0.001, 0.01))
+        for seconds in [0.0005, 0.001, 0.005, 2.0]:
+            hist.observe(seconds)
+        snapshot = hist.snapshot()
+        self.assertEqual(snapshot["buckets"], [(0.001, 2), (0.01, 3), (math.inf, 4)])
+        self.assertEqual(snapshot["count"], 4)
+        self.assertAlmostEqual(snapshot["sum"], 2.0065)
+
+
+class TestSpan(unittest.TestCase):
+
+    def setUp(self):
+        stage_timing.reset()
+
+    def tearDown(self):
+        stage_timing.reset()
+
+    def test_span_records_including_failed_blocks(self):
+        with span("test", "ok"):
+            pass
+        with self.assertRaises(ValueError):
+            with span("test", "fails"):
+                raise ValueError("boom")
+        histograms = stage_histograms()
+        self.assertEqual(histograms[("test", "ok")]["count"], 1)
+        self.assertEqual(histograms[("test", "fails")]["count"], 1)
+
+    def test_disabled_spans_record_nothing(self):
+        with mock.patch.object(stage_timing, "STAGE_TIMING", False):
+            with span("test", "off"):
+                pass
+        self.assertEqual(stage_histograms(), {})
+
+    def test_span_overhead_is_a_few_microseconds(self):
+        def timed():
+            with span("test", "overhead"):
+                pass
+        seconds = min(timeit.repeat(timed, number=10000, repeat=3)) / 10000
+        self.assertLess(seconds, 10e-6)
+
+
+if __name__ == "__main__":
+    unittest.main()